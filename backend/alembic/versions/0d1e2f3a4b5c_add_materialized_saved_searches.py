@@ -0,0 +1,51 @@
+"""Add materialized saved search results
+
+Revision ID: 0d1e2f3a4b5c
+Revises: 9c0d1e2f3a4b
+Create Date: 2025-11-06 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0d1e2f3a4b5c'
+down_revision = '9c0d1e2f3a4b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """
+    Let saved searches keep a stored, incrementally maintained result set.
+
+    This migration:
+    1. Adds materialized (opt-in flag) and materialized_at to saved_searches
+    2. Creates saved_search_results (saved_search_id, note_id, rank)
+    """
+
+    op.add_column('saved_searches', sa.Column('materialized', sa.Boolean(), server_default='false', nullable=False))
+    op.add_column('saved_searches', sa.Column('materialized_at', sa.DateTime(timezone=True), nullable=True))
+
+    op.create_table(
+        'saved_search_results',
+        sa.Column('saved_search_id', sa.Integer(), nullable=False),
+        sa.Column('note_id', sa.Integer(), nullable=False),
+        sa.Column('rank', sa.Float(), nullable=False, server_default='0'),
+        sa.ForeignKeyConstraint(['saved_search_id'], ['saved_searches.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['note_id'], ['notes.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('saved_search_id', 'note_id')
+    )
+
+    op.create_index('ix_saved_search_results_note_id', 'saved_search_results', ['note_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Remove materialized saved search results."""
+
+    op.drop_index('ix_saved_search_results_note_id', table_name='saved_search_results')
+    op.drop_table('saved_search_results')
+
+    op.drop_column('saved_searches', 'materialized_at')
+    op.drop_column('saved_searches', 'materialized')
@@ -58,4 +58,6 @@ def downgrade() -> None:
     op.drop_index(op.f('ix_users_id'), table_name='users')
     op.drop_index(op.f('ix_users_email'), table_name='users')
     op.drop_table('users')
-    # ### end Alembic commands ###
\ No newline at end of file
+    # ### end Alembic commands ###
+    # drop_table leaves the notes.note_type enum behind
+    op.execute("DROP TYPE IF EXISTS notetype;")
\ No newline at end of file
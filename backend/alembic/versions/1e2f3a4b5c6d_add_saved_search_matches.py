@@ -0,0 +1,52 @@
+"""Add saved search matches recorded by the percolator
+
+Revision ID: 1e2f3a4b5c6d
+Revises: 0d1e2f3a4b5c
+Create Date: 2025-11-07 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1e2f3a4b5c6d'
+down_revision = '0d1e2f3a4b5c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """
+    Record which saved searches a note matched when it was written.
+
+    This migration:
+    1. Creates saved_search_matches (saved_search_id, note_id, matched_at)
+    2. Adds an index on note_id and one on (saved_search_id, matched_at DESC)
+    """
+
+    op.create_table(
+        'saved_search_matches',
+        sa.Column('saved_search_id', sa.Integer(), nullable=False),
+        sa.Column('note_id', sa.Integer(), nullable=False),
+        sa.Column('matched_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['saved_search_id'], ['saved_searches.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['note_id'], ['notes.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('saved_search_id', 'note_id')
+    )
+
+    op.create_index('ix_saved_search_matches_note_id', 'saved_search_matches', ['note_id'], unique=False)
+    op.create_index(
+        'ix_saved_search_matches_recent',
+        'saved_search_matches',
+        ['saved_search_id', sa.text('matched_at DESC')],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    """Remove saved search matches."""
+
+    op.drop_index('ix_saved_search_matches_recent', table_name='saved_search_matches')
+    op.drop_index('ix_saved_search_matches_note_id', table_name='saved_search_matches')
+    op.drop_table('saved_search_matches')
@@ -0,0 +1,47 @@
+"""Add MinHash signatures and LSH band keys for near-duplicate detection
+
+Revision ID: 2f3a4b5c6d7e
+Revises: 1e2f3a4b5c6d
+Create Date: 2025-11-10 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '2f3a4b5c6d7e'
+down_revision = '1e2f3a4b5c6d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """
+    Store each note's MinHash signature and LSH band keys, computed on save.
+
+    This migration:
+    1. Adds minhash (bytea, 128 uint32 values) and lsh_bands (bigint[16])
+    2. Adds a GIN index on lsh_bands for overlap (&&) candidate lookups
+
+    Existing notes have no signature until backfill_note_minhash.py is run.
+    """
+
+    op.add_column('notes', sa.Column('minhash', sa.LargeBinary(), nullable=True))
+    op.add_column('notes', sa.Column('lsh_bands', postgresql.ARRAY(sa.BigInteger()), nullable=True))
+
+    op.create_index(
+        'ix_notes_lsh_bands',
+        'notes',
+        ['lsh_bands'],
+        unique=False,
+        postgresql_using='gin'
+    )
+
+
+def downgrade() -> None:
+    """Drop the duplicate detection index and columns."""
+    op.drop_index('ix_notes_lsh_bands', table_name='notes')
+    op.drop_column('notes', 'lsh_bands')
+    op.drop_column('notes', 'minhash')
@@ -0,0 +1,121 @@
+"""Add per-user lexeme dictionary for search spelling suggestions
+
+Revision ID: 3a4b5c6d7e8f
+Revises: 2f3a4b5c6d7e
+Create Date: 2025-11-12 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3a4b5c6d7e8f'
+down_revision = '2f3a4b5c6d7e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """
+    Keep every user's note lexemes with the number of notes containing them.
+
+    This migration:
+    1. Enables btree_gin, so one GIN index can serve user_id = ... AND lexeme % ...
+    2. Creates user_lexemes (user_id, lexeme, note_count) with that index
+    3. Adds an AFTER trigger on notes that applies the lexemes added and
+       removed by each insert, update and delete
+    4. Fills the table from ts_stat() over each user's title_tsv || content_tsv
+    """
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gin;")
+
+    op.create_table(
+        'user_lexemes',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('lexeme', sa.Text(), nullable=False),
+        sa.Column('note_count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id', 'lexeme')
+    )
+
+    op.execute("""
+        CREATE INDEX ix_user_lexemes_lexeme_trgm
+        ON user_lexemes USING gin (user_id, lexeme gin_trgm_ops);
+    """)
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION notes_lexemes_update_trigger()
+        RETURNS trigger AS $$
+        DECLARE
+            old_lexemes text[] := '{}';
+            new_lexemes text[] := '{}';
+        BEGIN
+            IF TG_OP <> 'INSERT' THEN
+                old_lexemes := tsvector_to_array(
+                    coalesce(OLD.title_tsv, '') || coalesce(OLD.content_tsv, ''));
+            END IF;
+            IF TG_OP <> 'DELETE' THEN
+                new_lexemes := tsvector_to_array(
+                    coalesce(NEW.title_tsv, '') || coalesce(NEW.content_tsv, ''));
+            END IF;
+
+            -- Within one user only the difference changes any count
+            IF TG_OP = 'UPDATE' AND NEW.user_id = OLD.user_id THEN
+                IF old_lexemes = new_lexemes THEN
+                    RETURN NULL;
+                END IF;
+                SELECT ARRAY(SELECT unnest(old_lexemes) EXCEPT SELECT unnest(new_lexemes)),
+                       ARRAY(SELECT unnest(new_lexemes) EXCEPT SELECT unnest(old_lexemes))
+                INTO old_lexemes, new_lexemes;
+            END IF;
+
+            IF cardinality(old_lexemes) > 0 THEN
+                UPDATE user_lexemes
+                SET note_count = note_count - 1
+                WHERE user_id = OLD.user_id AND lexeme = ANY (old_lexemes);
+
+                DELETE FROM user_lexemes
+                WHERE user_id = OLD.user_id AND lexeme = ANY (old_lexemes)
+                  AND note_count <= 0;
+            END IF;
+
+            IF cardinality(new_lexemes) > 0 THEN
+                -- Sorted so concurrent writers lock shared rows in the same order
+                INSERT INTO user_lexemes (user_id, lexeme, note_count)
+                SELECT NEW.user_id, lexeme, 1
+                FROM unnest(new_lexemes) AS lexeme
+                ORDER BY lexeme
+                ON CONFLICT (user_id, lexeme)
+                DO UPDATE SET note_count = user_lexemes.note_count + 1;
+            END IF;
+
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+
+    op.execute("""
+        CREATE TRIGGER notes_lexemes_update
+        AFTER INSERT OR DELETE OR UPDATE OF title, content_text, content_structured, user_id
+        ON notes
+        FOR EACH ROW
+        EXECUTE FUNCTION notes_lexemes_update_trigger();
+    """)
+
+    op.execute("""
+        INSERT INTO user_lexemes (user_id, lexeme, note_count)
+        SELECT users.id, stat.word, stat.ndoc
+        FROM users
+        CROSS JOIN LATERAL ts_stat(format(
+            'SELECT title_tsv || content_tsv FROM notes WHERE user_id = %s', users.id
+        )) AS stat;
+    """)
+
+
+def downgrade() -> None:
+    """Drop the lexeme trigger and dictionary (btree_gin is left installed)."""
+    op.execute("DROP TRIGGER IF EXISTS notes_lexemes_update ON notes;")
+    op.execute("DROP FUNCTION IF EXISTS notes_lexemes_update_trigger();")
+    op.execute("DROP INDEX IF EXISTS ix_user_lexemes_lexeme_trgm;")
+    op.drop_table('user_lexemes')
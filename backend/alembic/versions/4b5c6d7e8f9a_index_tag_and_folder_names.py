@@ -0,0 +1,433 @@
+"""Index tag names and folder paths in the note search vector
+
+Revision ID: 4b5c6d7e8f9a
+Revises: 3a4b5c6d7e8f
+Create Date: 2025-11-13 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4b5c6d7e8f9a'
+down_revision = '3a4b5c6d7e8f'
+branch_labels = None
+depends_on = None
+
+# Rows rewritten per statement (and per transaction) by the backfill
+BATCH_SIZE = 5000
+
+# Notes whose content_tsv carries (or should carry) label lexemes
+LABELLED_NOTES = """(
+    folder_id IS NOT NULL
+    OR EXISTS (SELECT 1 FROM note_tags WHERE note_tags.note_id = notes.id)
+)"""
+
+
+def upgrade() -> None:
+    """
+    Fold tag names and the folder path into content_tsv.
+
+    Tag names are indexed with weight 'C' and the names of the note's folder and
+    its ancestors with weight 'D', after the body lexemes (weights 'A'/'B'), so
+    free-text search matches them through ix_notes_content_tsv and ranks them
+    below title and body matches. The body part is recovered with
+    ts_filter(content_tsv, '{a,b}') when only the labels change.
+
+    This migration:
+    1. Adds notes_body_tsvector(text, jsonb) and notes_labels_tsvector(note_id,
+       folder_id), and notes_refresh_labels(note_ids) to rewrite the labels
+    2. Makes the notes_tsvector_update trigger append the labels and recompute
+       the vectors only when title, content or folder change
+    3. Adds statement-level triggers on note_tags inserts, deletes and updates
+       (which also cover tag deletes and merges) and row-level triggers on tag
+       renames and folder renames/moves
+    4. Replaces the row-level notes_lexemes_update trigger with statement-level
+       notes_lexemes_* triggers that apply each statement's summed lexeme
+       deltas, so label lexemes are counted in user_lexemes and a label refresh
+       of many notes writes every user_lexemes row once
+    5. Rebuilds content_tsv of tagged and filed notes in batches
+    """
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION notes_body_tsvector(content_text text, content_structured jsonb)
+        RETURNS tsvector AS $$
+            SELECT CASE
+                WHEN content_text IS NOT NULL THEN
+                    setweight(to_tsvector('english', content_text), 'B')
+                WHEN content_structured IS NOT NULL THEN
+                    notes_structured_tsvector(content_structured)
+                ELSE
+                    ''::tsvector
+            END;
+        $$ LANGUAGE sql IMMUTABLE;
+    """)
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION notes_labels_tsvector(note_id integer, folder_id integer)
+        RETURNS tsvector AS $$
+            SELECT setweight(to_tsvector('english', coalesce(
+                (SELECT string_agg(tags.name, ' ')
+                 FROM note_tags
+                 JOIN tags ON tags.id = note_tags.tag_id
+                 WHERE note_tags.note_id = $1),
+                ''
+            )), 'C')
+            || setweight(to_tsvector('english', coalesce(
+                (WITH RECURSIVE path AS (
+                    SELECT id, name, parent_id, 1 AS depth
+                    FROM folders WHERE id = $2
+                    UNION ALL
+                    SELECT folders.id, folders.name, folders.parent_id, path.depth + 1
+                    FROM folders
+                    JOIN path ON folders.id = path.parent_id
+                    -- Guards against a parent_id cycle
+                    WHERE path.depth < 32
+                 )
+                 SELECT string_agg(name, ' ' ORDER BY depth DESC) FROM path),
+                ''
+            )), 'D');
+        $$ LANGUAGE sql STABLE;
+    """)
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION notes_refresh_labels(note_ids integer[])
+        RETURNS void AS $$
+            -- A join rather than id = ANY ($1): a parameter array is not hashed,
+            -- so a sequential scan would compare every row with every id
+            UPDATE notes
+            SET content_tsv = ts_filter(coalesce(notes.content_tsv, ''), '{a,b}')
+                || notes_labels_tsvector(notes.id, notes.folder_id)
+            FROM unnest($1) AS refreshed(id)
+            WHERE notes.id = refreshed.id;
+        $$ LANGUAGE sql;
+    """)
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION notes_tsvector_update_trigger()
+        RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' OR NEW.title IS DISTINCT FROM OLD.title THEN
+                -- Title tsvector with weight 'A' (highest)
+                NEW.title_tsv := setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A');
+            END IF;
+
+            IF TG_OP = 'INSERT'
+               OR NEW.content_text IS DISTINCT FROM OLD.content_text
+               OR NEW.content_structured IS DISTINCT FROM OLD.content_structured THEN
+                NEW.content_tsv := notes_body_tsvector(NEW.content_text, NEW.content_structured)
+                    || notes_labels_tsvector(NEW.id, NEW.folder_id);
+            ELSIF NEW.folder_id IS DISTINCT FROM OLD.folder_id THEN
+                NEW.content_tsv := ts_filter(coalesce(OLD.content_tsv, ''), '{a,b}')
+                    || notes_labels_tsvector(NEW.id, NEW.folder_id);
+            END IF;
+
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION note_tags_labels_update_trigger()
+        RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                PERFORM notes_refresh_labels(
+                    ARRAY(SELECT DISTINCT note_id FROM new_note_tags ORDER BY note_id)
+                );
+            ELSIF TG_OP = 'DELETE' THEN
+                PERFORM notes_refresh_labels(
+                    ARRAY(SELECT DISTINCT note_id FROM old_note_tags ORDER BY note_id)
+                );
+            ELSE
+                -- Both the notes that lost and the notes that gained a tag
+                PERFORM notes_refresh_labels(ARRAY(
+                    SELECT note_id FROM old_note_tags
+                    UNION
+                    SELECT note_id FROM new_note_tags
+                    ORDER BY note_id
+                ));
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+
+    # Transition tables allow a single event per trigger
+    op.execute("""
+        CREATE TRIGGER note_tags_labels_insert
+        AFTER INSERT ON note_tags
+        REFERENCING NEW TABLE AS new_note_tags
+        FOR EACH STATEMENT
+        EXECUTE FUNCTION note_tags_labels_update_trigger();
+    """)
+
+    op.execute("""
+        CREATE TRIGGER note_tags_labels_delete
+        AFTER DELETE ON note_tags
+        REFERENCING OLD TABLE AS old_note_tags
+        FOR EACH STATEMENT
+        EXECUTE FUNCTION note_tags_labels_update_trigger();
+    """)
+
+    op.execute("""
+        CREATE TRIGGER note_tags_labels_update
+        AFTER UPDATE ON note_tags
+        REFERENCING OLD TABLE AS old_note_tags NEW TABLE AS new_note_tags
+        FOR EACH STATEMENT
+        EXECUTE FUNCTION note_tags_labels_update_trigger();
+    """)
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION tags_labels_update_trigger()
+        RETURNS trigger AS $$
+        BEGIN
+            PERFORM notes_refresh_labels(ARRAY(
+                SELECT note_id FROM note_tags WHERE tag_id = NEW.id ORDER BY note_id
+            ));
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+
+    op.execute("""
+        CREATE TRIGGER tags_labels_update
+        AFTER UPDATE OF name ON tags
+        FOR EACH ROW
+        WHEN (OLD.name IS DISTINCT FROM NEW.name)
+        EXECUTE FUNCTION tags_labels_update_trigger();
+    """)
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION folders_labels_update_trigger()
+        RETURNS trigger AS $$
+        BEGIN
+            -- Notes in the folder and in every folder below it
+            PERFORM notes_refresh_labels(ARRAY(
+                WITH RECURSIVE subtree AS (
+                    SELECT NEW.id AS id, 1 AS depth
+                    UNION ALL
+                    SELECT folders.id, subtree.depth + 1
+                    FROM folders
+                    JOIN subtree ON folders.parent_id = subtree.id
+                    WHERE subtree.depth < 32
+                )
+                SELECT notes.id
+                FROM notes
+                JOIN subtree ON notes.folder_id = subtree.id
+                ORDER BY notes.id
+            ));
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+
+    op.execute("""
+        CREATE TRIGGER folders_labels_update
+        AFTER UPDATE OF name, parent_id ON folders
+        FOR EACH ROW
+        WHEN (OLD.name IS DISTINCT FROM NEW.name OR OLD.parent_id IS DISTINCT FROM NEW.parent_id)
+        EXECUTE FUNCTION folders_labels_update_trigger();
+    """)
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION notes_lexemes_delta_trigger()
+        RETURNS trigger AS $$
+        DECLARE
+            delta_users integer[];
+            delta_lexemes text[];
+            deltas integer[];
+            emptied_users integer[];
+            emptied_lexemes text[];
+        BEGIN
+            -- +1 per lexeme of each new row version and -1 per lexeme of each
+            -- old one, summed per user and lexeme over the whole statement
+            IF TG_OP = 'UPDATE' THEN
+                -- Only rows whose vectors or owner changed
+                SELECT array_agg(user_id), array_agg(lexeme), array_agg(delta)
+                INTO delta_users, delta_lexemes, deltas
+                FROM (
+                    SELECT user_id, lexeme, sum(delta)::integer AS delta
+                    FROM (
+                        SELECT new_notes.user_id,
+                               unnest(tsvector_to_array(coalesce(new_notes.title_tsv, '')
+                                   || coalesce(new_notes.content_tsv, ''))) AS lexeme,
+                               1 AS delta
+                        FROM old_notes JOIN new_notes ON new_notes.id = old_notes.id
+                        WHERE new_notes.title_tsv IS DISTINCT FROM old_notes.title_tsv
+                           OR new_notes.content_tsv IS DISTINCT FROM old_notes.content_tsv
+                           OR new_notes.user_id <> old_notes.user_id
+                        UNION ALL
+                        SELECT old_notes.user_id,
+                               unnest(tsvector_to_array(coalesce(old_notes.title_tsv, '')
+                                   || coalesce(old_notes.content_tsv, ''))),
+                               -1
+                        FROM old_notes JOIN new_notes ON new_notes.id = old_notes.id
+                        WHERE new_notes.title_tsv IS DISTINCT FROM old_notes.title_tsv
+                           OR new_notes.content_tsv IS DISTINCT FROM old_notes.content_tsv
+                           OR new_notes.user_id <> old_notes.user_id
+                    ) AS changes
+                    GROUP BY user_id, lexeme
+                    HAVING sum(delta) <> 0
+                ) AS summed;
+            ELSIF TG_OP = 'INSERT' THEN
+                SELECT array_agg(user_id), array_agg(lexeme), array_agg(delta)
+                INTO delta_users, delta_lexemes, deltas
+                FROM (
+                    SELECT user_id, lexeme, count(*)::integer AS delta
+                    FROM new_notes, unnest(tsvector_to_array(
+                        coalesce(title_tsv, '') || coalesce(content_tsv, ''))) AS lexeme
+                    GROUP BY user_id, lexeme
+                ) AS summed;
+            ELSE
+                SELECT array_agg(user_id), array_agg(lexeme), array_agg(delta)
+                INTO delta_users, delta_lexemes, deltas
+                FROM (
+                    SELECT user_id, lexeme, -count(*)::integer AS delta
+                    FROM old_notes, unnest(tsvector_to_array(
+                        coalesce(title_tsv, '') || coalesce(content_tsv, ''))) AS lexeme
+                    GROUP BY user_id, lexeme
+                ) AS summed;
+            END IF;
+
+            IF delta_users IS NULL THEN
+                RETURN NULL;
+            END IF;
+
+            -- Sorted so concurrent writers lock shared rows in the same order;
+            -- a missing row with a negative delta is inserted, then deleted
+            WITH applied AS (
+                INSERT INTO user_lexemes (user_id, lexeme, note_count)
+                SELECT *
+                FROM unnest(delta_users, delta_lexemes, deltas)
+                ORDER BY 1, 2
+                ON CONFLICT (user_id, lexeme)
+                DO UPDATE SET note_count = user_lexemes.note_count + EXCLUDED.note_count
+                RETURNING user_id, lexeme, note_count
+            )
+            SELECT array_agg(user_id), array_agg(lexeme)
+            INTO emptied_users, emptied_lexemes
+            FROM applied
+            WHERE note_count <= 0;
+
+            IF emptied_users IS NOT NULL THEN
+                DELETE FROM user_lexemes
+                USING unnest(emptied_users, emptied_lexemes) AS emptied(user_id, lexeme)
+                WHERE user_lexemes.user_id = emptied.user_id
+                  AND user_lexemes.lexeme = emptied.lexeme;
+            END IF;
+
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+
+    # Label refreshes only set content_tsv and may touch thousands of notes;
+    # a per-row trigger would rewrite the same user_lexemes rows for each
+    op.execute("DROP TRIGGER IF EXISTS notes_lexemes_update ON notes;")
+    _create_lexemes_delta_triggers()
+
+    _backfill(
+        "ts_filter(notes.content_tsv, '{a,b}')"
+        " || notes_labels_tsvector(notes.id, notes.folder_id)"
+    )
+
+
+def downgrade() -> None:
+    """Drop the label triggers and strip label lexemes from content_tsv."""
+    op.execute("DROP TRIGGER IF EXISTS folders_labels_update ON folders;")
+    op.execute("DROP TRIGGER IF EXISTS tags_labels_update ON tags;")
+    op.execute("DROP TRIGGER IF EXISTS note_tags_labels_update ON note_tags;")
+    op.execute("DROP TRIGGER IF EXISTS note_tags_labels_delete ON note_tags;")
+    op.execute("DROP TRIGGER IF EXISTS note_tags_labels_insert ON note_tags;")
+    op.execute("DROP FUNCTION IF EXISTS folders_labels_update_trigger();")
+    op.execute("DROP FUNCTION IF EXISTS tags_labels_update_trigger();")
+    op.execute("DROP FUNCTION IF EXISTS note_tags_labels_update_trigger();")
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION notes_tsvector_update_trigger()
+        RETURNS trigger AS $$
+        BEGIN
+            -- Update title tsvector with weight 'A' (highest)
+            NEW.title_tsv := setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A');
+
+            -- Update content tsvector
+            IF NEW.content_text IS NOT NULL THEN
+                NEW.content_tsv := setweight(to_tsvector('english', coalesce(NEW.content_text, '')), 'B');
+            ELSIF NEW.content_structured IS NOT NULL THEN
+                -- Section titles and string values only, no JSON syntax
+                NEW.content_tsv := notes_structured_tsvector(NEW.content_structured);
+            ELSE
+                NEW.content_tsv := to_tsvector('english', '');
+            END IF;
+
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+
+    # Still counting content_tsv updates, so the stripped lexemes are released
+    _backfill("ts_filter(notes.content_tsv, '{a,b}')")
+
+    for event in ("insert", "delete", "update"):
+        op.execute(f"DROP TRIGGER IF EXISTS notes_lexemes_{event} ON notes;")
+    op.execute("DROP FUNCTION IF EXISTS notes_lexemes_delta_trigger();")
+    op.execute("""
+        CREATE TRIGGER notes_lexemes_update
+        AFTER INSERT OR DELETE OR UPDATE OF title, content_text, content_structured, user_id
+        ON notes
+        FOR EACH ROW
+        EXECUTE FUNCTION notes_lexemes_update_trigger();
+    """)
+
+    op.execute("DROP FUNCTION IF EXISTS notes_refresh_labels(integer[]);")
+    op.execute("DROP FUNCTION IF EXISTS notes_labels_tsvector(integer, integer);")
+    op.execute("DROP FUNCTION IF EXISTS notes_body_tsvector(text, jsonb);")
+
+
+def _create_lexemes_delta_triggers() -> None:
+    """Run notes_lexemes_delta_trigger once per notes statement."""
+    # Transition tables allow a single event per trigger (and no column list)
+    for event, tables in (
+        ("insert", "NEW TABLE AS new_notes"),
+        ("delete", "OLD TABLE AS old_notes"),
+        ("update", "OLD TABLE AS old_notes NEW TABLE AS new_notes"),
+    ):
+        op.execute(f"""
+            CREATE TRIGGER notes_lexemes_{event}
+            AFTER {event.upper()} ON notes
+            REFERENCING {tables}
+            FOR EACH STATEMENT
+            EXECUTE FUNCTION notes_lexemes_delta_trigger();
+        """)
+
+
+def _backfill(tsvector_sql: str) -> None:
+    """Recompute content_tsv of tagged or filed notes in id-ordered batches."""
+    batch = sa.text(f"""
+        WITH batch AS (
+            SELECT id FROM notes
+            WHERE {LABELLED_NOTES}
+              AND id > :last_id
+            ORDER BY id
+            LIMIT :batch_size
+        )
+        UPDATE notes
+        SET content_tsv = {tsvector_sql}
+        FROM batch
+        WHERE notes.id = batch.id
+        RETURNING notes.id
+    """)
+
+    # Commit every batch so a large table is never locked in one transaction
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        last_id = 0
+        while True:
+            ids = bind.execute(
+                batch, {"last_id": last_id, "batch_size": BATCH_SIZE}
+            ).scalars().all()
+            if not ids:
+                break
+            last_id = max(ids)
@@ -0,0 +1,44 @@
+"""Index structured note key paths for field: search
+
+Revision ID: 5c6d7e8f9a0b
+Revises: 4b5c6d7e8f9a
+Create Date: 2025-11-14 10:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '5c6d7e8f9a0b'
+down_revision = '4b5c6d7e8f9a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """
+    Add a GIN index for field:Key=value containment lookups.
+
+    This migration:
+    1. Indexes (user_id, content_structured jsonb_path_ops), so a user's notes
+       with a given value at a key path (content_structured @> ...) are found
+       in one index scan. user_id uses the btree_gin operator class enabled by
+       3a4b5c6d7e8f; jsonb_path_ops stores one hash per value and key path,
+       which is smaller than the default jsonb_ops and all that @> needs.
+    """
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gin;")
+
+    op.create_index(
+        'ix_notes_user_content_structured_path',
+        'notes',
+        ['user_id', 'content_structured'],
+        unique=False,
+        postgresql_using='gin',
+        postgresql_ops={'content_structured': 'jsonb_path_ops'}
+    )
+
+
+def downgrade() -> None:
+    """Drop the key-path index."""
+    op.drop_index('ix_notes_user_content_structured_path', table_name='notes')
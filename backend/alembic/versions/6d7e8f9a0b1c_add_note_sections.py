@@ -0,0 +1,181 @@
+"""Add per-section rows for structured notes
+
+Revision ID: 6d7e8f9a0b1c
+Revises: 5c6d7e8f9a0b
+Create Date: 2025-11-15 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '6d7e8f9a0b1c'
+down_revision = '5c6d7e8f9a0b'
+branch_labels = None
+depends_on = None
+
+# Notes rebuilt per statement (and per transaction) by the backfill
+BATCH_SIZE = 1000
+
+
+def upgrade() -> None:
+    """
+    Store every section of a structured note as a row with its own tsvector.
+
+    This migration:
+    1. Creates note_sections (note_id, user_id, path, body, tsv); path is the
+       key path of a non-object value, body its plain text and tsv the path
+       keys (weight 'A') plus its string values (weight 'B')
+    2. Adds notes_rebuild_sections(note_ids), which replaces the rows of the
+       given notes from content_structured
+    3. Rebuilds a note's sections after inserts and after updates that change
+       its content or owner
+    4. Fills the table from existing structured notes in batches
+    """
+
+    op.create_table(
+        'note_sections',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('note_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('path', postgresql.ARRAY(sa.Text()), nullable=False),
+        sa.Column('body', sa.Text(), nullable=False),
+        sa.Column('tsv', postgresql.TSVECTOR(), nullable=False),
+        sa.ForeignKeyConstraint(['note_id'], ['notes.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'ix_note_sections_note_path', 'note_sections', ['note_id', 'path'], unique=True
+    )
+    op.create_index(
+        'ix_note_sections_tsv',
+        'note_sections',
+        ['tsv'],
+        unique=False,
+        postgresql_using='gin'
+    )
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION note_section_text(value jsonb)
+        RETURNS text AS $$
+            SELECT CASE jsonb_typeof(value)
+                WHEN 'string' THEN value #>> '{}'
+                WHEN 'null' THEN ''
+                WHEN 'array' THEN coalesce(
+                    (SELECT string_agg(
+                                CASE WHEN jsonb_typeof(item) = 'string'
+                                     THEN item #>> '{}' ELSE item::text END,
+                                E'\\n' ORDER BY position)
+                     FROM jsonb_array_elements(value) WITH ORDINALITY AS items(item, position)),
+                    ''
+                )
+                ELSE value::text
+            END;
+        $$ LANGUAGE sql IMMUTABLE;
+    """)
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION notes_rebuild_sections(note_ids integer[])
+        RETURNS void AS $$
+            DELETE FROM note_sections WHERE note_id = ANY ($1);
+
+            WITH RECURSIVE sections(note_id, user_id, path, value) AS (
+                SELECT notes.id, notes.user_id, ARRAY[entry.key], entry.value
+                FROM notes
+                CROSS JOIN LATERAL jsonb_each(
+                    CASE WHEN jsonb_typeof(notes.content_structured) = 'object'
+                         THEN notes.content_structured ELSE '{}' END
+                ) AS entry
+                WHERE notes.id = ANY ($1)
+                  AND notes.content_text IS NULL
+                UNION ALL
+                -- Nested objects are split further; anything else is a section
+                SELECT sections.note_id, sections.user_id,
+                       sections.path || entry.key, entry.value
+                FROM sections
+                CROSS JOIN LATERAL jsonb_each(
+                    CASE WHEN jsonb_typeof(sections.value) = 'object'
+                         THEN sections.value ELSE '{}' END
+                ) AS entry
+            )
+            INSERT INTO note_sections (note_id, user_id, path, body, tsv)
+            SELECT note_id, user_id, path, note_section_text(value),
+                   setweight(to_tsvector('english', array_to_string(path, ' ')), 'A')
+                   || setweight(jsonb_to_tsvector('english', value, '["string"]'), 'B')
+            FROM sections
+            WHERE jsonb_typeof(value) <> 'object';
+        $$ LANGUAGE sql;
+    """)
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION notes_sections_update_trigger()
+        RETURNS trigger AS $$
+        BEGIN
+            PERFORM notes_rebuild_sections(ARRAY[NEW.id]);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+
+    op.execute("""
+        CREATE TRIGGER notes_sections_insert
+        AFTER INSERT ON notes
+        FOR EACH ROW
+        WHEN (NEW.content_structured IS NOT NULL)
+        EXECUTE FUNCTION notes_sections_update_trigger();
+    """)
+
+    op.execute("""
+        CREATE TRIGGER notes_sections_update
+        AFTER UPDATE OF content_text, content_structured, user_id ON notes
+        FOR EACH ROW
+        WHEN (
+            OLD.content_structured IS DISTINCT FROM NEW.content_structured
+            OR OLD.content_text IS DISTINCT FROM NEW.content_text
+            OR OLD.user_id IS DISTINCT FROM NEW.user_id
+        )
+        EXECUTE FUNCTION notes_sections_update_trigger();
+    """)
+
+    _backfill_sections()
+
+
+def downgrade() -> None:
+    """Drop the section triggers, functions and table."""
+    op.execute("DROP TRIGGER IF EXISTS notes_sections_update ON notes;")
+    op.execute("DROP TRIGGER IF EXISTS notes_sections_insert ON notes;")
+    op.execute("DROP FUNCTION IF EXISTS notes_sections_update_trigger();")
+    op.execute("DROP FUNCTION IF EXISTS notes_rebuild_sections(integer[]);")
+    op.execute("DROP FUNCTION IF EXISTS note_section_text(jsonb);")
+    op.drop_index('ix_note_sections_tsv', table_name='note_sections')
+    op.drop_index('ix_note_sections_note_path', table_name='note_sections')
+    op.drop_table('note_sections')
+
+
+def _backfill_sections() -> None:
+    """Build the sections of existing structured notes in id-ordered batches."""
+    batch = sa.text("""
+        SELECT id FROM notes
+        WHERE content_text IS NULL
+          AND content_structured IS NOT NULL
+          AND id > :last_id
+        ORDER BY id
+        LIMIT :batch_size
+    """)
+    rebuild = sa.text("SELECT notes_rebuild_sections(CAST(:ids AS integer[]))")
+
+    # Commit every batch so a large table is never locked in one transaction
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        last_id = 0
+        while True:
+            ids = bind.execute(
+                batch, {"last_id": last_id, "batch_size": BATCH_SIZE}
+            ).scalars().all()
+            if not ids:
+                break
+            bind.execute(rebuild, {"ids": ids})
+            last_id = max(ids)
@@ -0,0 +1,81 @@
+"""Add trigram indexes for substring search and autocomplete
+
+Revision ID: 7a8b9c0d1e2f
+Revises: 6f7a8b9c0d1e
+Create Date: 2025-11-03 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a8b9c0d1e2f'
+down_revision = '6f7a8b9c0d1e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """
+    Add pg_trgm GIN indexes so ILIKE '%q%' and similarity lookups can use an index.
+
+    This migration:
+    1. Enables the pg_trgm extension
+    2. Indexes note titles, text content and a text rendering of structured content
+    3. Indexes tag names for autocomplete
+    4. Indexes analytics query text for prefix suggestions
+    """
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm;")
+
+    op.create_index(
+        'ix_notes_title_trgm',
+        'notes',
+        ['title'],
+        unique=False,
+        postgresql_using='gin',
+        postgresql_ops={'title': 'gin_trgm_ops'}
+    )
+
+    op.create_index(
+        'ix_notes_content_text_trgm',
+        'notes',
+        ['content_text'],
+        unique=False,
+        postgresql_using='gin',
+        postgresql_ops={'content_text': 'gin_trgm_ops'}
+    )
+
+    # Expression index: queries must filter on CAST(content_structured AS TEXT)
+    op.execute("""
+        CREATE INDEX ix_notes_content_structured_trgm
+        ON notes USING gin (CAST(content_structured AS TEXT) gin_trgm_ops);
+    """)
+
+    op.create_index(
+        'ix_tags_name_trgm',
+        'tags',
+        ['name'],
+        unique=False,
+        postgresql_using='gin',
+        postgresql_ops={'name': 'gin_trgm_ops'}
+    )
+
+    op.create_index(
+        'ix_search_analytics_query_text_trgm',
+        'search_analytics',
+        ['query_text'],
+        unique=False,
+        postgresql_using='gin',
+        postgresql_ops={'query_text': 'gin_trgm_ops'}
+    )
+
+
+def downgrade() -> None:
+    """Drop trigram indexes (the pg_trgm extension is left installed)."""
+    op.drop_index('ix_search_analytics_query_text_trgm', table_name='search_analytics')
+    op.drop_index('ix_tags_name_trgm', table_name='tags')
+    op.drop_index('ix_notes_content_structured_trgm', table_name='notes')
+    op.drop_index('ix_notes_content_text_trgm', table_name='notes')
+    op.drop_index('ix_notes_title_trgm', table_name='notes')
@@ -0,0 +1,155 @@
+"""Keep a note count on every tag
+
+Revision ID: 7e8f9a0b1c2d
+Revises: 6d7e8f9a0b1c
+Create Date: 2025-11-17 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7e8f9a0b1c2d'
+down_revision = '6d7e8f9a0b1c'
+branch_labels = None
+depends_on = None
+
+# Tags recounted per statement (and per transaction) by the backfill
+BATCH_SIZE = 5000
+
+
+def upgrade() -> None:
+    """
+    Store the number of notes of each tag in tags.note_count.
+
+    Tag listings read the column through ix_tags_user_id_name instead of
+    counting note_tags per request.
+
+    This migration:
+    1. Adds tags.note_count (default 0)
+    2. Adds tags_reconcile_note_counts(tag_ids), which recounts the given tags
+       from note_tags and returns how many were wrong
+    3. Adds statement-level triggers on note_tags inserts, deletes and updates
+       that add each statement's per-tag delta to note_count
+    4. Counts the notes of existing tags in batches
+    """
+
+    op.add_column(
+        'tags',
+        sa.Column('note_count', sa.Integer(), server_default='0', nullable=False)
+    )
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION tags_reconcile_note_counts(tag_ids integer[])
+        RETURNS integer AS $$
+            WITH actual AS (
+                SELECT tags.id, count(note_tags.note_id) AS note_count
+                FROM tags
+                LEFT JOIN note_tags ON note_tags.tag_id = tags.id
+                WHERE tags.id = ANY ($1)
+                GROUP BY tags.id
+            ), fixed AS (
+                UPDATE tags
+                SET note_count = actual.note_count
+                FROM actual
+                WHERE tags.id = actual.id
+                  AND tags.note_count <> actual.note_count
+                RETURNING tags.id
+            )
+            SELECT count(*)::integer FROM fixed;
+        $$ LANGUAGE sql;
+    """)
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION note_tags_count_update_trigger()
+        RETURNS trigger AS $$
+        BEGIN
+            -- One row update per tag and statement, however many notes changed
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                UPDATE tags
+                SET note_count = tags.note_count + added.delta
+                FROM (
+                    SELECT tag_id, count(*) AS delta
+                    FROM new_note_tags
+                    GROUP BY tag_id
+                ) AS added
+                WHERE tags.id = added.tag_id;
+            END IF;
+
+            IF TG_OP IN ('DELETE', 'UPDATE') THEN
+                UPDATE tags
+                SET note_count = greatest(tags.note_count - removed.delta, 0)
+                FROM (
+                    SELECT tag_id, count(*) AS delta
+                    FROM old_note_tags
+                    GROUP BY tag_id
+                ) AS removed
+                WHERE tags.id = removed.tag_id;
+            END IF;
+
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+
+    # Transition tables allow a single event per trigger
+    op.execute("""
+        CREATE TRIGGER note_tags_count_insert
+        AFTER INSERT ON note_tags
+        REFERENCING NEW TABLE AS new_note_tags
+        FOR EACH STATEMENT
+        EXECUTE FUNCTION note_tags_count_update_trigger();
+    """)
+
+    op.execute("""
+        CREATE TRIGGER note_tags_count_delete
+        AFTER DELETE ON note_tags
+        REFERENCING OLD TABLE AS old_note_tags
+        FOR EACH STATEMENT
+        EXECUTE FUNCTION note_tags_count_update_trigger();
+    """)
+
+    op.execute("""
+        CREATE TRIGGER note_tags_count_update
+        AFTER UPDATE ON note_tags
+        REFERENCING OLD TABLE AS old_note_tags NEW TABLE AS new_note_tags
+        FOR EACH STATEMENT
+        EXECUTE FUNCTION note_tags_count_update_trigger();
+    """)
+
+    _backfill_note_counts()
+
+
+def downgrade() -> None:
+    """Drop the count triggers, the reconcile function and the column."""
+    op.execute("DROP TRIGGER IF EXISTS note_tags_count_update ON note_tags;")
+    op.execute("DROP TRIGGER IF EXISTS note_tags_count_delete ON note_tags;")
+    op.execute("DROP TRIGGER IF EXISTS note_tags_count_insert ON note_tags;")
+    op.execute("DROP FUNCTION IF EXISTS note_tags_count_update_trigger();")
+    op.execute("DROP FUNCTION IF EXISTS tags_reconcile_note_counts(integer[]);")
+    op.drop_column('tags', 'note_count')
+
+
+def _backfill_note_counts() -> None:
+    """Count the notes of existing tags in id-ordered batches."""
+    batch = sa.text("""
+        SELECT id FROM tags
+        WHERE id > :last_id
+        ORDER BY id
+        LIMIT :batch_size
+    """)
+    reconcile = sa.text("SELECT tags_reconcile_note_counts(CAST(:ids AS integer[]))")
+
+    # Commit every batch so a large table is never locked in one transaction
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        last_id = 0
+        while True:
+            ids = bind.execute(
+                batch, {"last_id": last_id, "batch_size": BATCH_SIZE}
+            ).scalars().all()
+            if not ids:
+                break
+            bind.execute(reconcile, {"ids": ids})
+            last_id = max(ids)
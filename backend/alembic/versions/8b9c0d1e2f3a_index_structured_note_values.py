@@ -0,0 +1,135 @@
+"""Index only the values of structured notes
+
+Revision ID: 8b9c0d1e2f3a
+Revises: 7a8b9c0d1e2f
+Create Date: 2025-11-04 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b9c0d1e2f3a'
+down_revision = '7a8b9c0d1e2f'
+branch_labels = None
+depends_on = None
+
+# Rows rewritten per statement (and per transaction) by the backfill
+BATCH_SIZE = 5000
+
+
+def upgrade() -> None:
+    """
+    Build content_tsv for structured notes from their values, not raw JSON text.
+
+    This migration:
+    1. Adds notes_structured_tsvector(jsonb): section titles (top-level keys)
+       with weight 'A' and string values with weight 'B'. Punctuation, nested
+       key names and non-string values are no longer indexed.
+    2. Points the notes_tsvector_update trigger at it
+    3. Rebuilds content_tsv of existing structured notes in batches
+    """
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION notes_structured_tsvector(content jsonb)
+        RETURNS tsvector AS $$
+            SELECT CASE WHEN jsonb_typeof(content) = 'object' THEN
+                setweight(to_tsvector('english', coalesce(
+                    (SELECT string_agg(key, ' ') FROM jsonb_object_keys(content) AS key),
+                    ''
+                )), 'A')
+            ELSE
+                ''::tsvector
+            END
+            || setweight(jsonb_to_tsvector('english', content, '["string"]'), 'B');
+        $$ LANGUAGE sql IMMUTABLE;
+    """)
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION notes_tsvector_update_trigger()
+        RETURNS trigger AS $$
+        BEGIN
+            -- Update title tsvector with weight 'A' (highest)
+            NEW.title_tsv := setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A');
+
+            -- Update content tsvector
+            IF NEW.content_text IS NOT NULL THEN
+                NEW.content_tsv := setweight(to_tsvector('english', coalesce(NEW.content_text, '')), 'B');
+            ELSIF NEW.content_structured IS NOT NULL THEN
+                -- Section titles and string values only, no JSON syntax
+                NEW.content_tsv := notes_structured_tsvector(NEW.content_structured);
+            ELSE
+                NEW.content_tsv := to_tsvector('english', '');
+            END IF;
+
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+
+    _backfill_structured("notes_structured_tsvector(content_structured)")
+
+
+def downgrade() -> None:
+    """Restore indexing of content_structured::text."""
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION notes_tsvector_update_trigger()
+        RETURNS trigger AS $$
+        BEGIN
+            -- Update title tsvector with weight 'A' (highest)
+            NEW.title_tsv := setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A');
+
+            -- Update content tsvector with weight 'B'
+            -- Handle both text and JSONB content
+            IF NEW.content_text IS NOT NULL THEN
+                NEW.content_tsv := setweight(to_tsvector('english', coalesce(NEW.content_text, '')), 'B');
+            ELSIF NEW.content_structured IS NOT NULL THEN
+                -- Extract text from JSONB and index it
+                NEW.content_tsv := setweight(to_tsvector('english', coalesce(NEW.content_structured::text, '')), 'B');
+            ELSE
+                NEW.content_tsv := to_tsvector('english', '');
+            END IF;
+
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+
+    _backfill_structured(
+        "setweight(to_tsvector('english', coalesce(content_structured::text, '')), 'B')"
+    )
+
+    op.execute("DROP FUNCTION IF EXISTS notes_structured_tsvector(jsonb);")
+
+
+def _backfill_structured(tsvector_sql: str) -> None:
+    """Recompute content_tsv of structured notes in id-ordered batches."""
+    batch = sa.text(f"""
+        WITH batch AS (
+            SELECT id FROM notes
+            WHERE content_text IS NULL
+              AND content_structured IS NOT NULL
+              AND id > :last_id
+            ORDER BY id
+            LIMIT :batch_size
+        )
+        UPDATE notes
+        SET content_tsv = {tsvector_sql}
+        FROM batch
+        WHERE notes.id = batch.id
+        RETURNING notes.id
+    """)
+
+    # Commit every batch so a large table is never locked in one transaction
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        last_id = 0
+        while True:
+            ids = bind.execute(
+                batch, {"last_id": last_id, "batch_size": BATCH_SIZE}
+            ).scalars().all()
+            if not ids:
+                break
+            last_id = max(ids)
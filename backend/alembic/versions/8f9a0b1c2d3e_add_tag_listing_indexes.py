@@ -0,0 +1,49 @@
+"""Add indexes for paginated tag listings
+
+Revision ID: 8f9a0b1c2d3e
+Revises: 7e8f9a0b1c2d
+Create Date: 2025-11-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8f9a0b1c2d3e'
+down_revision = '7e8f9a0b1c2d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """
+    Index the keyset pages of GET /api/tags/.
+
+    Pages by name already walk the unique ix_tags_user_id_name index.
+
+    This migration:
+    1. Adds ix_tags_user_id_name_pattern (user_id, name text_pattern_ops) so
+       prefix filters (name LIKE 'abc%') use a btree whatever the collation
+    2. Adds ix_tags_user_id_note_count (user_id, note_count DESC, name) for
+       pages ordered by usage, most used first
+    """
+    op.create_index(
+        'ix_tags_user_id_name_pattern',
+        'tags',
+        ['user_id', 'name'],
+        unique=False,
+        postgresql_ops={'name': 'text_pattern_ops'}
+    )
+    op.create_index(
+        'ix_tags_user_id_note_count',
+        'tags',
+        ['user_id', sa.text('note_count DESC'), 'name'],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    """Drop the tag listing indexes."""
+    op.drop_index('ix_tags_user_id_note_count', table_name='tags')
+    op.drop_index('ix_tags_user_id_name_pattern', table_name='tags')
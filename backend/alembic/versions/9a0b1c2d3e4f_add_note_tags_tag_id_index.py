@@ -0,0 +1,33 @@
+"""Index note_tags by tag
+
+Revision ID: 9a0b1c2d3e4f
+Revises: 8f9a0b1c2d3e
+Create Date: 2025-11-19 10:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '9a0b1c2d3e4f'
+down_revision = '8f9a0b1c2d3e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """
+    Add ix_note_tags_tag_id_note_id (tag_id, note_id).
+
+    The primary key (note_id, tag_id) cannot find the notes of a tag, so tag
+    merges, tag deletes (ON DELETE CASCADE) and tag renames (label refresh)
+    scanned all of note_tags.
+    """
+    op.create_index(
+        'ix_note_tags_tag_id_note_id', 'note_tags', ['tag_id', 'note_id'], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Drop the note_tags tag index."""
+    op.drop_index('ix_note_tags_tag_id_note_id', table_name='note_tags')
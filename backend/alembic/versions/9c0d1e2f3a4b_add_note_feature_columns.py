@@ -0,0 +1,78 @@
+"""Add note feature columns for has: and todo: filters
+
+Revision ID: 9c0d1e2f3a4b
+Revises: 8b9c0d1e2f3a
+Create Date: 2025-11-05 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c0d1e2f3a4b'
+down_revision = '8b9c0d1e2f3a'
+branch_labels = None
+depends_on = None
+
+# Bits of notes.feature_flags (see app/utils/note_features.py)
+FEATURE_INDEXES = {
+    'ix_notes_has_links': 1,
+    'ix_notes_has_code': 2,
+    'ix_notes_has_tables': 4,
+    'ix_notes_has_images': 8,
+}
+
+
+def upgrade() -> None:
+    """
+    Store checkbox counts and content feature bits computed when notes are saved.
+
+    This migration:
+    1. Adds todo_done, todo_open and feature_flags smallint columns (default 0)
+    2. Adds partial indexes on user_id for todo:complete, todo:incomplete and
+       each has: feature
+
+    Existing notes keep the defaults until backfill_note_features.py is run.
+    """
+
+    op.add_column('notes', sa.Column('todo_done', sa.SmallInteger(), server_default='0', nullable=False))
+    op.add_column('notes', sa.Column('todo_open', sa.SmallInteger(), server_default='0', nullable=False))
+    op.add_column('notes', sa.Column('feature_flags', sa.SmallInteger(), server_default='0', nullable=False))
+
+    op.create_index(
+        'ix_notes_todo_incomplete',
+        'notes',
+        ['user_id'],
+        unique=False,
+        postgresql_where=sa.text('todo_open > 0')
+    )
+
+    op.create_index(
+        'ix_notes_todo_complete',
+        'notes',
+        ['user_id'],
+        unique=False,
+        postgresql_where=sa.text('todo_done > 0 AND todo_open = 0')
+    )
+
+    for index_name, flag in FEATURE_INDEXES.items():
+        op.create_index(
+            index_name,
+            'notes',
+            ['user_id'],
+            unique=False,
+            postgresql_where=sa.text(f'(feature_flags & {flag}) != 0')
+        )
+
+
+def downgrade() -> None:
+    """Drop the note feature indexes and columns."""
+    for index_name in reversed(list(FEATURE_INDEXES)):
+        op.drop_index(index_name, table_name='notes')
+    op.drop_index('ix_notes_todo_complete', table_name='notes')
+    op.drop_index('ix_notes_todo_incomplete', table_name='notes')
+
+    op.drop_column('notes', 'feature_flags')
+    op.drop_column('notes', 'todo_open')
+    op.drop_column('notes', 'todo_done')
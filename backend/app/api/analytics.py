@@ -24,6 +24,7 @@ from app.schemas import (
     SearchSuggestionResponse,
     TrendingSearchResponse,
 )
+from app.utils.text_search import LIKE_ESCAPE_CHAR, prefix_pattern
 
 router = APIRouter()
 
@@ -82,7 +83,10 @@ async def get_search_suggestions(
         db.query(SearchAnalytics)
         .filter(
             SearchAnalytics.user_id == current_user.id,
-            SearchAnalytics.query_text.ilike(f"{prefix}%"),
+            # Served by the trigram index on query_text
+            SearchAnalytics.query_text.ilike(
+                prefix_pattern(prefix), escape=LIKE_ESCAPE_CHAR
+            ),
         )
         .all()
     )
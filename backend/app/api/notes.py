@@ -1,39 +1,140 @@
+import json
 import time
+from datetime import datetime
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from fastapi.responses import Response
-from sqlalchemy import String, and_, cast, desc, not_, or_
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    status,
+)
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy import Text, and_, cast, desc, func, literal, not_, select, union
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
 from sqlalchemy.orm import Session, joinedload
 
 from app.api.auth import get_current_user
-from app.core.database import get_db
-from app.models import Note, SavedSearch, Tag, User
+from app.core.config import settings
+from app.core.database import SessionLocal, get_db
+from app.models import (
+    Note,
+    NoteSection,
+    SavedSearch,
+    SavedSearchMatch,
+    Tag,
+    User,
+    note_tags,
+)
 from app.schemas import (
     BulkTagOperation,
+    DuplicateGroup,
+    DuplicateListResponse,
+    DuplicateNoteItem,
+    DuplicateReportResponse,
+    ExplainedStatement,
+    InstantNoteHit,
+    InstantSearchResponse,
     NoteCreate,  # Search schemas
     NoteListResponse,
     NoteResponse,
+    NoteSectionListResponse,
+    NoteSectionResponse,
+    NoteSectionSummary,
     NoteType,
     NoteUpdate,
+    OmniboxResponse,
+    OmniboxResult,
+    RelatedNoteItem,
+    RelatedNotesResponse,
     SavedSearchCreate,
     SavedSearchListResponse,
+    SavedSearchMatchItem,
+    SavedSearchMatchListResponse,
     SavedSearchResponse,
+    SearchBatchItem,
+    SearchBatchRequest,
+    SearchBatchResponse,
+    SearchExplainRequest,
+    SearchExplainResponse,
     SearchRequest,
     SearchResponse,
     SearchResultItem,
+    SearchStreamRequest,
+    SlowSearchEntry,
+    SlowSearchListResponse,
     TagFilterMode,
 )
+from app.services.duplicates import DuplicateService
 from app.services.export import ExportService
+from app.services.instant_search import get_instant_search_index
+from app.services.materialized_search import MaterializedSearchService
+from app.services.omnibox import OmniboxService
+from app.services.percolator import percolate_note
+from app.services.related_notes import get_related_notes_engine
 from app.services.search import SearchService
+from app.services.search_cancellation import (
+    SearchCancellation,
+    SearchCancelled,
+    SearchTimedOut,
+    run_cancellable,
+    set_statement_timeout,
+)
+from app.services.search_backend import get_search_backend
+from app.services.search_profiler import (
+    SearchProfile,
+    compile_statement,
+    explain_statement,
+    slow_search_log,
+)
+from app.utils.text_search import LIKE_ESCAPE_CHAR, contains_pattern
 
 router = APIRouter()
 search_router = APIRouter()
 
 
+def _text_match_note_ids(db: Session, user_id: int, search: str, fuzzy: bool):
+    """
+    Build a UNION of note ids whose title, content or tag names match ``search``.
+
+    Each branch filters a single trigram-indexed column, so Postgres can use a
+    bitmap index scan per branch instead of scanning every note (an OR across
+    the notes/tags join would force a sequential scan). With ``fuzzy`` the
+    trigram word-similarity operator is used instead of substring matching.
+    """
+    if fuzzy:
+
+        def matches(column):
+            return literal(search).op("<%")(column)
+
+    else:
+        pattern = contains_pattern(search)
+
+        def matches(column):
+            return column.ilike(pattern, escape=LIKE_ESCAPE_CHAR)
+
+    # The structured cast must match the ix_notes_content_structured_trgm expression
+    note_columns = [Note.title, Note.content_text, cast(Note.content_structured, Text)]
+    branches = [
+        select(Note.id).where(Note.user_id == user_id, matches(column))
+        for column in note_columns
+    ]
+    branches.append(
+        select(note_tags.c.note_id)
+        .join(Tag, Tag.id == note_tags.c.tag_id)
+        .where(Tag.user_id == user_id, matches(Tag.name))
+    )
+
+    return union(*branches)
+
+
 @router.post("/", response_model=NoteResponse, status_code=status.HTTP_201_CREATED)
 async def create_note(
     note_data: NoteCreate,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
@@ -83,6 +184,12 @@ async def create_note(
     db.commit()
     db.refresh(db_note)
 
+    get_search_backend().index(db_note)
+    get_related_notes_engine().index(db_note)
+    get_instant_search_index().index(db_note)
+    MaterializedSearchService(db, current_user.id).apply_note_changes([db_note.id])
+    background_tasks.add_task(percolate_note, current_user.id, db_note.id)
+
     return NoteResponse.from_orm_with_tags(db_note)
 
 
@@ -91,6 +198,9 @@ async def get_notes(
     page: int = Query(1, ge=1, description="Page number"),
     per_page: int = Query(10, ge=1, le=100, description="Items per page"),
     search: Optional[str] = Query(None, description="Search in title and content"),
+    fuzzy: bool = Query(
+        False, description="Typo-tolerant trigram matching, ranked by similarity"
+    ),
     note_type: Optional[NoteType] = Query(None, description="Filter by note type"),
     tags: Optional[str] = Query(None, description="Filter by tags (comma-separated)"),
     tag_filter_mode: TagFilterMode = Query(
@@ -116,18 +226,8 @@ async def get_notes(
 
     # Apply text search
     if search:
-        search_filter = f"%{search}%"
-        search_conditions = [
-            Note.title.ilike(search_filter),
-            Note.content_text.ilike(search_filter),
-            cast(Note.content_structured, String).ilike(search_filter),
-        ]
-
-        # Also search in tag names
-        query = (
-            query.outerjoin(Note.tags)
-            .filter(or_(*search_conditions, Tag.name.ilike(search_filter)))
-            .distinct()
+        query = query.filter(
+            Note.id.in_(_text_match_note_ids(db, current_user.id, search, fuzzy))
         )
 
     # Apply tag filters
@@ -135,13 +235,15 @@ async def get_notes(
         tag_list = [tag.strip().lower() for tag in tags.split(",") if tag.strip()]
 
         if tag_list:
+            # EXISTS filters keep one row per note (no DISTINCT), so the
+            # fuzzy similarity ordering stays valid
             if tag_filter_mode == TagFilterMode.AND:
                 # Notes must have ALL specified tags
                 for tag_name in tag_list:
-                    query = query.join(Note.tags).filter(Tag.name == tag_name)
+                    query = query.filter(Note.tags.any(Tag.name == tag_name))
             elif tag_filter_mode == TagFilterMode.OR:
                 # Notes must have AT LEAST ONE of the specified tags
-                query = query.join(Note.tags).filter(Tag.name.in_(tag_list)).distinct()
+                query = query.filter(Note.tags.any(Tag.name.in_(tag_list)))
 
     # Apply exclude tags filter
     if exclude_tags:
@@ -164,6 +266,10 @@ async def get_notes(
     # Get total count
     total = query.count()
 
+    # Apply ordering: best trigram similarity first for fuzzy search
+    if search and fuzzy:
+        query = query.order_by(desc(func.word_similarity(search, Note.title)))
+
     # Apply pagination and ordering
     notes = (
         query.order_by(desc(Note.updated_at))
@@ -189,6 +295,50 @@ async def get_notes(
     )
 
 
+@router.get("/duplicates", response_model=DuplicateReportResponse)
+async def get_duplicate_report(
+    threshold: Optional[float] = Query(
+        None, ge=0.5, le=1.0, description="Minimum estimated similarity"
+    ),
+    limit: int = Query(50, ge=1, le=500, description="Maximum groups to return"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Group the user's near-duplicate notes, largest groups first."""
+    groups = DuplicateService(db, current_user.id, threshold).report()
+
+    shown = groups[:limit]
+    notes = {
+        note.id: note
+        for note in db.query(Note.id, Note.title, Note.note_type, Note.updated_at)
+        .filter(
+            Note.id.in_([note_id for group in shown for note_id, _ in group]),
+            Note.user_id == current_user.id,
+        )
+        .all()
+    }
+    return DuplicateReportResponse(
+        groups=[
+            DuplicateGroup(
+                notes=[
+                    DuplicateNoteItem(
+                        id=note_id,
+                        title=notes[note_id].title,
+                        note_type=notes[note_id].note_type,
+                        updated_at=notes[note_id].updated_at,
+                        similarity=similarity,
+                    )
+                    for note_id, similarity in group
+                    if note_id in notes
+                ]
+            )
+            for group in shown
+        ],
+        total_groups=len(groups),
+        duplicate_notes=sum(len(group) - 1 for group in groups),
+    )
+
+
 @router.get("/{note_id}", response_model=NoteResponse)
 async def get_note(
     note_id: int,
@@ -211,10 +361,143 @@ async def get_note(
     return NoteResponse.from_orm_with_tags(note)
 
 
+@router.get("/{note_id}/related", response_model=RelatedNotesResponse)
+async def get_related_notes(
+    note_id: int,
+    limit: int = Query(5, ge=1, le=50, description="Maximum related notes"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Get the notes most similar to a note by TF-IDF cosine similarity."""
+    exists = (
+        db.query(Note.id)
+        .filter(Note.id == note_id, Note.user_id == current_user.id)
+        .first()
+    )
+    if not exists:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Note not found"
+        )
+
+    scores = dict(
+        get_related_notes_engine().related(db, current_user.id, note_id, limit)
+    )
+    notes = (
+        db.query(Note.id, Note.title, Note.note_type, Note.updated_at)
+        .filter(Note.id.in_(scores), Note.user_id == current_user.id)
+        .all()
+    )
+    related = [
+        RelatedNoteItem(
+            id=note.id,
+            title=note.title,
+            note_type=note.note_type,
+            updated_at=note.updated_at,
+            score=scores[note.id],
+        )
+        for note in notes
+    ]
+    related.sort(key=lambda item: item.score, reverse=True)
+    return RelatedNotesResponse(related=related)
+
+
+@router.get("/{note_id}/sections", response_model=NoteSectionListResponse)
+async def get_note_sections(
+    note_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Get the outline of a structured note: its section paths and sizes."""
+    exists = (
+        db.query(Note.id)
+        .filter(Note.id == note_id, Note.user_id == current_user.id)
+        .first()
+    )
+    if not exists:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Note not found"
+        )
+
+    rows = (
+        db.query(NoteSection.path, func.length(NoteSection.body))
+        .filter(NoteSection.note_id == note_id)
+        .order_by(NoteSection.path)
+        .all()
+    )
+    return NoteSectionListResponse(
+        sections=[NoteSectionSummary(path=path, length=length) for path, length in rows]
+    )
+
+
+@router.get("/{note_id}/section", response_model=NoteSectionResponse)
+async def get_note_section(
+    note_id: int,
+    path: List[str] = Query(..., description="Key path, one parameter per key"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Get one section of a structured note, e.g. the section_path of a search hit."""
+    value = Note.content_structured.op("#>", return_type=JSONB)(cast(path, ARRAY(Text)))
+    row = (
+        db.query(value, func.jsonb_typeof(value))
+        .filter(Note.id == note_id, Note.user_id == current_user.id)
+        .first()
+    )
+    if not row:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Note not found"
+        )
+
+    content, value_type = row
+    # SQL NULL: no such key path (a JSON null has the type 'null')
+    if value_type is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Section not found"
+        )
+
+    return NoteSectionResponse(note_id=note_id, path=path, content=content)
+
+
+@router.get("/{note_id}/duplicates", response_model=DuplicateListResponse)
+async def get_note_duplicates(
+    note_id: int,
+    threshold: Optional[float] = Query(
+        None, ge=0.5, le=1.0, description="Minimum estimated similarity"
+    ),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Get the notes whose content is nearly identical to a note's."""
+    note = (
+        db.query(Note)
+        .filter(Note.id == note_id, Note.user_id == current_user.id)
+        .first()
+    )
+    if not note:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Note not found"
+        )
+
+    service = DuplicateService(db, current_user.id, threshold)
+    return DuplicateListResponse(
+        duplicates=[
+            DuplicateNoteItem(
+                id=duplicate.id,
+                title=duplicate.title,
+                note_type=duplicate.note_type,
+                updated_at=duplicate.updated_at,
+                similarity=similarity,
+            )
+            for duplicate, similarity in service.duplicates_of(note)
+        ]
+    )
+
+
 @router.put("/{note_id}", response_model=NoteResponse)
 async def update_note(
     note_id: int,
     note_update: NoteUpdate,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
@@ -287,6 +570,12 @@ async def update_note(
     db.commit()
     db.refresh(note)
 
+    get_search_backend().index(note)
+    get_related_notes_engine().index(note)
+    get_instant_search_index().index(note)
+    MaterializedSearchService(db, current_user.id).apply_note_changes([note.id])
+    background_tasks.add_task(percolate_note, current_user.id, note.id)
+
     return NoteResponse.from_orm_with_tags(note)
 
 
@@ -311,6 +600,10 @@ async def delete_note(
     db.delete(note)
     db.commit()
 
+    get_search_backend().delete(current_user.id, note_id)
+    get_related_notes_engine().delete(current_user.id, note_id)
+    get_instant_search_index().delete(current_user.id, note_id)
+
     return None
 
 
@@ -323,6 +616,9 @@ async def bulk_tag_operation(
     """
     Perform bulk tag operations on multiple notes.
     Operations: 'add', 'remove', or 'replace'
+
+    Notes are given by ``note_ids`` or selected by a ``search``, whose
+    matching ids are streamed without paging.
     """
     # Validate operation
     if operation_data.operation not in ["add", "remove", "replace"]:
@@ -331,14 +627,31 @@ async def bulk_tag_operation(
             detail="Operation must be 'add', 'remove', or 'replace'",
         )
 
+    note_ids = operation_data.note_ids
+    if operation_data.search is not None:
+        set_statement_timeout(db, settings.search_stream_statement_timeout_ms)
+        note_ids = [
+            note_id
+            for note_id, _ in SearchService(db, current_user.id).stream_ids(
+                operation_data.search
+            )
+        ]
+        if not note_ids:
+            return {
+                "message": "Bulk tag operation completed",
+                "operation": operation_data.operation,
+                "notes_affected": 0,
+                "changes_made": 0,
+            }
+
     # Get all notes
     notes = (
         db.query(Note)
-        .filter(Note.id.in_(operation_data.note_ids), Note.user_id == current_user.id)
+        .filter(Note.id.in_(note_ids), Note.user_id == current_user.id)
         .all()
     )
 
-    if len(notes) != len(operation_data.note_ids):
+    if len(notes) != len(note_ids):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Some notes were not found"
         )
@@ -392,6 +705,15 @@ async def bulk_tag_operation(
 
     db.commit()
 
+    search_backend = get_search_backend()
+    instant_index = get_instant_search_index()
+    for note in notes:
+        search_backend.index(note)
+        instant_index.index(note)
+    MaterializedSearchService(db, current_user.id).apply_note_changes(
+        note.id for note in notes
+    )
+
     return {
         "message": "Bulk tag operation completed",
         "operation": operation_data.operation,
@@ -403,34 +725,89 @@ async def bulk_tag_operation(
 # ---- Consolidated Search Endpoints ----
 
 
+@search_router.get("/search/instant", response_model=InstantSearchResponse)
+def instant_search(
+    q: str = Query("", max_length=200, description="Prefix typed so far"),
+    limit: int = Query(8, ge=1, le=50),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Match note titles and tag names by prefix as the user types.
+
+    Answered from an in-memory per-user index without touching full-text
+    search or recording analytics. A plain ``def`` so the threadpool runs
+    overlapping keystrokes side by side; they share the user's index build.
+    """
+    start_time = time.time()
+    notes, tags = get_instant_search_index().search(current_user.id, q, limit)
+
+    return InstantSearchResponse(
+        query=q,
+        notes=[InstantNoteHit(id=note_id, title=title) for note_id, title in notes],
+        tags=tags,
+        execution_time_ms=(time.time() - start_time) * 1000,
+    )
+
+
+@search_router.get("/search/omnibox", response_model=OmniboxResponse)
+def omnibox_search(
+    q: str = Query("", max_length=200),
+    per_type: int = Query(5, ge=1, le=20, description="Results per object type"),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Search notes, tags, folders and saved searches in one request.
+
+    The sources are queried concurrently and merged by match score, at most
+    ``per_type`` from each. Sources slower than ``OMNIBOX_BUDGET_MS`` are
+    dropped and listed in ``timed_out``. Not recorded in search analytics.
+    """
+    start_time = time.time()
+    hits, timed_out = OmniboxService(current_user.id).search(q, per_type)
+
+    return OmniboxResponse(
+        query=q,
+        results=[OmniboxResult.model_validate(hit) for hit in hits],
+        timed_out=timed_out,
+        execution_time_ms=(time.time() - start_time) * 1000,
+    )
+
+
 @search_router.post("/search", response_model=SearchResponse)
 async def advanced_search(
     search_request: SearchRequest,
+    http_request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    """Perform advanced search with full-text search and filters."""
+    """
+    Perform advanced search with full-text search and filters.
+
+    The search is cancelled in Postgres if the client disconnects first, e.g.
+    when search-as-you-type supersedes it with the next keystroke.
+    """
 
     start_time = time.time()
 
     try:
-        search_service = SearchService(db, current_user.id)
-        results, total = search_service.search(search_request)
+        set_statement_timeout(db, settings.search_statement_timeout_ms)
+        cancellation = SearchCancellation()
+        search_service = SearchService(db, current_user.id, cancellation=cancellation)
+        results, total, facets = await _run_search(
+            http_request, db, cancellation, search_service.search, search_request
+        )
+        suggestions = None
+        if total <= settings.search_suggestion_max_results:
+            suggestions = await _run_search(
+                http_request, db, cancellation, search_service.suggest, search_request
+            )
 
         execution_time_ms = (time.time() - start_time) * 1000
-        has_next = (search_request.page * search_request.per_page) < total
-        has_prev = search_request.page > 1
-
-        return SearchResponse(
-            results=results,
-            total=total,
-            page=search_request.page,
-            per_page=search_request.per_page,
-            has_next=has_next,
-            has_prev=has_prev,
-            query=search_request.query,
-            execution_time_ms=execution_time_ms,
+        return _search_response(
+            search_request, results, total, facets, execution_time_ms, suggestions
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -438,6 +815,231 @@ async def advanced_search(
         )
 
 
+@search_router.post("/search/batch", response_model=SearchBatchResponse)
+async def batch_search(
+    batch_request: SearchBatchRequest,
+    http_request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Run several searches with one authentication and session.
+
+    Results are returned in request order with per-search timings. With
+    ``parallel`` the searches are spread over a small pool of sessions.
+    """
+
+    start_time = time.time()
+
+    timeout_ms = settings.search_batch_statement_timeout_ms
+    set_statement_timeout(db, timeout_ms)
+
+    def batch_session() -> Session:
+        session = SessionLocal()
+        set_statement_timeout(session, timeout_ms)
+        return session
+
+    cancellation = SearchCancellation()
+    search_service = SearchService(db, current_user.id, cancellation=cancellation)
+    outcomes = await _run_search(
+        http_request,
+        db,
+        cancellation,
+        search_service.search_batch,
+        batch_request.searches,
+        batch_session if batch_request.parallel else None,
+        settings.search_batch_workers,
+    )
+
+    items = []
+    for search_request, outcome in zip(batch_request.searches, outcomes):
+        if outcome.error is not None:
+            items.append(
+                SearchBatchItem(
+                    error=f"Search failed: {outcome.error}",
+                    execution_time_ms=outcome.execution_time_ms,
+                )
+            )
+            continue
+
+        items.append(
+            SearchBatchItem(
+                response=_search_response(
+                    search_request,
+                    outcome.results,
+                    outcome.total,
+                    outcome.facets,
+                    outcome.execution_time_ms,
+                ),
+                execution_time_ms=outcome.execution_time_ms,
+            )
+        )
+
+    return SearchBatchResponse(
+        results=items, execution_time_ms=(time.time() - start_time) * 1000
+    )
+
+
+@search_router.post("/search/stream")
+async def stream_search(
+    stream_request: SearchStreamRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Stream every result of a search as NDJSON, in rank order.
+
+    One JSON object per line: a search result item, or ``{"id", "rank"}``
+    with ``ids_only``. Rows come from a server-side cursor and are hydrated
+    in batches, so exports and bulk actions need not page through offsets.
+    The stream stops when the client disconnects.
+    """
+    set_statement_timeout(db, settings.search_stream_statement_timeout_ms)
+    search_service = SearchService(db, current_user.id)
+
+    def lines():
+        if stream_request.ids_only:
+            for note_id, rank in search_service.stream_ids(
+                stream_request.search, stream_request.limit
+            ):
+                yield json.dumps({"id": note_id, "rank": rank}) + "\n"
+        else:
+            for result in search_service.stream(
+                stream_request.search, stream_request.limit
+            ):
+                yield result.model_dump_json() + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+async def _run_search(
+    http_request: Request, db: Session, cancellation: SearchCancellation, func, *args
+):
+    """Run a search off the event loop, mapping cancellation to HTTP errors."""
+    try:
+        return await run_cancellable(http_request, db, cancellation, func, *args)
+    except SearchCancelled:
+        # Nobody is listening; the status only shows up in access logs
+        raise HTTPException(status_code=499, detail="Search cancelled")
+    except SearchTimedOut:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Search timed out",
+        )
+
+
+def _search_response(
+    search_request: SearchRequest,
+    results,
+    total,
+    facets,
+    execution_time_ms,
+    suggestions=None,
+) -> SearchResponse:
+    """Build the paginated response for one executed search."""
+    return SearchResponse(
+        results=results,
+        total=total,
+        page=search_request.page,
+        per_page=search_request.per_page,
+        has_next=(search_request.page * search_request.per_page) < total,
+        has_prev=search_request.page > 1,
+        query=search_request.query,
+        execution_time_ms=execution_time_ms,
+        facets=facets,
+        suggestions=suggestions,
+    )
+
+
+def get_search_profiler_user(current_user: User = Depends(get_current_user)) -> User:
+    """Allow the search profiler in debug mode or for configured admins."""
+    if not settings.debug and current_user.username not in (
+        settings.search_profiler_admins
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Search profiling is restricted to administrators",
+        )
+    return current_user
+
+
+@search_router.post("/search/explain", response_model=SearchExplainResponse)
+async def explain_search(
+    explain_request: SearchExplainRequest,
+    http_request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_search_profiler_user),
+):
+    """
+    Profile a search: per-phase timings, compiled SQL and query plans.
+
+    The search runs through the normal search path, then each statement it
+    ran is explained. ``EXPLAIN ANALYZE`` executes the statements again, so
+    their plans reflect a warm cache.
+    """
+    user_id = explain_request.user_id or current_user.id
+    if db.get(User, user_id) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
+        )
+
+    set_statement_timeout(db, settings.search_statement_timeout_ms)
+    search_request = explain_request.search
+    cancellation = SearchCancellation()
+    profile = SearchProfile(capture_statements=True)
+    search_service = SearchService(
+        db, user_id, cancellation=cancellation, profile=profile
+    )
+
+    def profile_search():
+        _, total, _ = search_service.search(search_request)
+        statements = []
+        for name, statement in profile.statements.items():
+            sql, params = compile_statement(db, statement)
+            statements.append(
+                ExplainedStatement(
+                    name=name,
+                    sql=sql,
+                    params=params,
+                    plan=explain_statement(db, statement, explain_request.analyze),
+                )
+            )
+        return total, statements
+
+    total, statements = await _run_search(
+        http_request, db, cancellation, profile_search
+    )
+
+    return SearchExplainResponse(
+        query=search_request.query,
+        total=total,
+        execution_time_ms=profile.total_ms,
+        phases=profile.phases,
+        statements=statements,
+    )
+
+
+@search_router.get("/search/slow", response_model=SlowSearchListResponse)
+async def get_slow_searches(
+    limit: int = Query(50, ge=1, le=1000, description="Entries to return"),
+    current_user: User = Depends(get_search_profiler_user),
+):
+    """
+    List searches sampled into this process's slow search log, newest first.
+
+    Each entry carries the full request, so it can be replayed through
+    ``POST /api/search/explain`` with its ``user_id``.
+    """
+    return SlowSearchListResponse(
+        entries=[
+            SlowSearchEntry.model_validate(entry)
+            for entry in slow_search_log.entries(limit)
+        ],
+        threshold_ms=slow_search_log.threshold_ms,
+        capacity=slow_search_log.capacity,
+    )
+
+
 @search_router.get("/search/saved", response_model=SavedSearchListResponse)
 async def get_saved_searches(
     db: Session = Depends(get_db),
@@ -477,6 +1079,7 @@ async def create_saved_search(
         name=saved_search_data.name,
         search_query=search_query_dict,
         user_id=current_user.id,
+        materialized=saved_search_data.materialized,
     )
 
     db.add(saved_search)
@@ -517,6 +1120,7 @@ async def get_saved_search(
 )
 async def execute_saved_search(
     saved_search_id: int,
+    http_request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
@@ -535,31 +1139,78 @@ async def execute_saved_search(
             status_code=status.HTTP_404_NOT_FOUND, detail="Saved search not found"
         )
 
-    from datetime import datetime
+    search_request = SearchRequest(**saved_search.search_query)
+
+    start_time = time.time()
+    set_statement_timeout(db, settings.saved_search_statement_timeout_ms)
+    cancellation = SearchCancellation()
+    materialized = MaterializedSearchService(
+        db,
+        current_user.id,
+        search_service=SearchService(db, current_user.id, cancellation=cancellation),
+    )
+    results, total, facets = await _run_search(
+        http_request,
+        db,
+        cancellation,
+        materialized.execute,
+        saved_search,
+        search_request,
+    )
+    execution_time_ms = (time.time() - start_time) * 1000
 
+    # One commit for the usage statistics and any rebuilt result set
     saved_search.last_used_at = datetime.utcnow()
     saved_search.use_count += 1
     db.commit()
 
-    search_request = SearchRequest(**saved_search.search_query)
+    return _search_response(search_request, results, total, facets, execution_time_ms)
 
-    start_time = time.time()
-    search_service = SearchService(db, current_user.id)
-    results, total = search_service.search(search_request)
-    execution_time_ms = (time.time() - start_time) * 1000
 
-    has_next = (search_request.page * search_request.per_page) < total
-    has_prev = search_request.page > 1
+@search_router.get(
+    "/search/saved/{saved_search_id}/matches",
+    response_model=SavedSearchMatchListResponse,
+)
+async def get_saved_search_matches(
+    saved_search_id: int,
+    since: Optional[datetime] = Query(
+        None, description="Only matches recorded at or after this time"
+    ),
+    limit: int = Query(50, ge=1, le=200, description="Maximum matches to return"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """List notes that matched a saved search when they were written."""
 
-    return SearchResponse(
-        results=results,
-        total=total,
-        page=search_request.page,
-        per_page=search_request.per_page,
-        has_next=has_next,
-        has_prev=has_prev,
-        query=search_request.query,
-        execution_time_ms=execution_time_ms,
+    saved_search = (
+        db.query(SavedSearch.id)
+        .filter(
+            SavedSearch.id == saved_search_id, SavedSearch.user_id == current_user.id
+        )
+        .first()
+    )
+
+    if not saved_search:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Saved search not found"
+        )
+
+    query = (
+        db.query(SavedSearchMatch.note_id, Note.title, SavedSearchMatch.matched_at)
+        .join(Note, Note.id == SavedSearchMatch.note_id)
+        .filter(SavedSearchMatch.saved_search_id == saved_search_id)
+    )
+    if since is not None:
+        query = query.filter(SavedSearchMatch.matched_at >= since)
+    rows = query.order_by(desc(SavedSearchMatch.matched_at)).limit(limit).all()
+
+    return SavedSearchMatchListResponse(
+        matches=[
+            SavedSearchMatchItem(
+                note_id=row.note_id, title=row.title, matched_at=row.matched_at
+            )
+            for row in rows
+        ]
     )
 
 
@@ -616,8 +1267,21 @@ async def update_saved_search(
             status_code=status.HTTP_404_NOT_FOUND, detail="Saved search not found"
         )
 
+    search_query_dict = saved_search_data.search_query.model_dump()
+    materialized = MaterializedSearchService(db, current_user.id)
+    if not saved_search_data.materialized:
+        materialized.clear(saved_search)
+    elif search_query_dict != saved_search.search_query:
+        materialized.invalidate(saved_search)
+    if search_query_dict != saved_search.search_query:
+        # Matches recorded for the old definition no longer apply
+        db.query(SavedSearchMatch).filter(
+            SavedSearchMatch.saved_search_id == saved_search.id
+        ).delete(synchronize_session=False)
+
     saved_search.name = saved_search_data.name
-    saved_search.search_query = saved_search_data.search_query.model_dump()
+    saved_search.search_query = search_query_dict
+    saved_search.materialized = saved_search_data.materialized
 
     db.commit()
     db.refresh(saved_search)
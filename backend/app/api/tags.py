@@ -1,50 +1,110 @@
 """
 API endpoints for tag management.
 """
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import delete, func
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import and_, case, delete, desc, func, literal, or_, select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
 from app.api.auth import get_current_user
 from app.core.database import get_db
 from app.models import Note, Tag, User, note_tags
-from app.schemas import TagCreate, TagListResponse, TagMerge, TagResponse, TagUpdate
+from app.schemas import (
+    TagCreate,
+    TagListResponse,
+    TagMerge,
+    TagResponse,
+    TagSortBy,
+    TagUpdate,
+)
+from app.services.instant_search import get_instant_search_index
+from app.utils.pagination import decode_cursor, encode_cursor
+from app.utils.text_search import LIKE_ESCAPE_CHAR, contains_pattern, prefix_pattern
 
 router = APIRouter()
 
+# Largest page GET /api/tags/ serves
+MAX_TAG_PAGE_SIZE = 500
+
 
 @router.get("/", response_model=TagListResponse)
 async def get_tags(
-    db: Session = Depends(get_db), current_user: User = Depends(get_current_user)
+    sort: TagSortBy = Query(TagSortBy.NAME, description="name, or count (most used)"),
+    limit: Optional[int] = Query(
+        None, ge=1, le=MAX_TAG_PAGE_SIZE, description="Page size; all tags if unset"
+    ),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    prefix: str = Query("", max_length=100, description="Only names starting with"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
 ):
     """
-    Get all tags for the current user with note counts.
+    List the current user's tags with note counts.
+
+    Without ``limit`` every tag is returned. With it, tags come in keyset
+    pages: pass ``next_cursor`` back as ``cursor`` for the next one. Pages by
+    name walk ix_tags_user_id_name; ``sort=count`` orders by usage (most used
+    first, then name) through ix_tags_user_id_note_count, so its first page is
+    the top ``limit`` tags. ``prefix`` filters names through
+    ix_tags_user_id_name_pattern.
     """
-    # Query tags with note counts
-    tags_with_counts = (
-        db.query(Tag, func.count(note_tags.c.note_id).label("note_count"))
-        .outerjoin(note_tags, Tag.id == note_tags.c.tag_id)
-        .filter(Tag.user_id == current_user.id)
-        .group_by(Tag.id)
-        .order_by(Tag.name)
-        .all()
-    )
+    query = db.query(Tag).filter(Tag.user_id == current_user.id)
 
-    # Build response with note counts
-    tag_responses = []
-    for tag, count in tags_with_counts:
-        tag_data = TagResponse(
-            id=tag.id,
-            name=tag.name,
-            user_id=tag.user_id,
-            created_at=tag.created_at,
-            note_count=count,
+    # Tag names are stored lowercase, so a case-sensitive LIKE is enough
+    prefix = prefix.strip().lower()
+    if prefix:
+        query = query.filter(
+            Tag.name.like(prefix_pattern(prefix), escape=LIKE_ESCAPE_CHAR)
         )
-        tag_responses.append(tag_data)
 
-    return TagListResponse(tags=tag_responses, total=len(tag_responses))
+    total = None
+    if limit is not None:
+        total = query.with_entities(func.count(Tag.id)).scalar()
+
+    if sort == TagSortBy.COUNT:
+        order = (desc(Tag.note_count), Tag.name)
+        key_length = 2
+    else:
+        order = (Tag.name,)
+        key_length = 1
+
+    if cursor:
+        try:
+            after = decode_cursor(cursor, sort.value, key_length)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        if sort == TagSortBy.COUNT:
+            query = query.filter(
+                or_(
+                    Tag.note_count < after[0],
+                    and_(Tag.note_count == after[0], Tag.name > after[1]),
+                )
+            )
+        else:
+            query = query.filter(Tag.name > after[0])
+
+    query = query.order_by(*order)
+    if limit is not None:
+        # One extra row tells whether another page follows
+        query = query.limit(limit + 1)
+
+    tags = query.all()
+    next_cursor = None
+    if limit is not None and len(tags) > limit:
+        tags = tags[:limit]
+        last = tags[-1]
+        key = [last.note_count, last.name] if sort == TagSortBy.COUNT else [last.name]
+        next_cursor = encode_cursor(sort.value, key)
+
+    tag_responses = [TagResponse.model_validate(tag) for tag in tags]
+
+    return TagListResponse(
+        tags=tag_responses,
+        total=len(tag_responses) if total is None else total,
+        next_cursor=next_cursor,
+    )
 
 
 @router.post("/", response_model=TagResponse, status_code=status.HTTP_201_CREATED)
@@ -78,7 +138,7 @@ async def create_tag(
             name=existing_tag.name,
             user_id=existing_tag.user_id,
             created_at=existing_tag.created_at,
-            note_count=len(existing_tag.notes) if existing_tag.notes else 0,
+            note_count=existing_tag.note_count,
         )
 
     # Create new tag
@@ -87,6 +147,7 @@ async def create_tag(
     db.add(db_tag)
     db.commit()
     db.refresh(db_tag)
+    get_instant_search_index().add_tag(current_user.id, db_tag.name)
 
     return TagResponse(
         id=db_tag.id,
@@ -140,13 +201,14 @@ async def update_tag(
     tag.name = new_name
     db.commit()
     db.refresh(tag)
+    get_instant_search_index().invalidate(current_user.id)
 
     return TagResponse(
         id=tag.id,
         name=tag.name,
         user_id=tag.user_id,
         created_at=tag.created_at,
-        note_count=len(tag.notes) if tag.notes else 0,
+        note_count=tag.note_count,
     )
 
 
@@ -171,6 +233,7 @@ async def delete_tag(
     # Delete the tag (cascade will handle note_tags association)
     db.delete(tag)
     db.commit()
+    get_instant_search_index().invalidate(current_user.id)
 
     return None
 
@@ -182,15 +245,17 @@ async def merge_tags(
     current_user: User = Depends(get_current_user),
 ):
     """
-    Merge a source tag into a target tag.
-    All notes with the source tag will be updated to have the target tag instead.
-    The source tag will be deleted.
+    Merge one or more source tags into a target tag.
+    All notes with a source tag will be updated to have the target tag instead.
+    The source tags will be deleted.
     """
-    # Validate both tags exist and belong to user
-    source_tag = (
-        db.query(Tag)
-        .filter(Tag.id == merge_data.source_tag_id, Tag.user_id == current_user.id)
-        .first()
+    source_ids = merge_data.source_ids()
+
+    # Validate every tag exists and belongs to the user
+    found_sources = (
+        db.query(func.count(Tag.id))
+        .filter(Tag.id.in_(source_ids), Tag.user_id == current_user.id)
+        .scalar()
     )
 
     target_tag = (
@@ -199,7 +264,7 @@ async def merge_tags(
         .first()
     )
 
-    if not source_tag:
+    if found_sources != len(source_ids):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Source tag not found"
         )
@@ -209,31 +274,50 @@ async def merge_tags(
             status_code=status.HTTP_404_NOT_FOUND, detail="Target tag not found"
         )
 
-    if source_tag.id == target_tag.id:
+    if target_tag.id in source_ids:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Cannot merge a tag with itself",
         )
 
-    # Get all notes with source tag
-    notes_with_source = source_tag.notes
-
-    # Add target tag to all notes that have source tag (if not already present)
-    for note in notes_with_source:
-        if target_tag not in note.tags:
-            note.tags.append(target_tag)
-
-    # Delete source tag (this will also remove associations)
-    db.delete(source_tag)
+    _merge_tags(db, source_ids, target_tag.id)
     db.commit()
     db.refresh(target_tag)
+    get_instant_search_index().invalidate(current_user.id)
 
     return TagResponse(
         id=target_tag.id,
         name=target_tag.name,
         user_id=target_tag.user_id,
         created_at=target_tag.created_at,
-        note_count=len(target_tag.notes) if target_tag.notes else 0,
+        note_count=target_tag.note_count,
+    )
+
+
+def _merge_tags(db: Session, source_ids: List[int], target_id: int) -> None:
+    """
+    Move the notes of ``source_ids`` to ``target_id`` and delete the sources.
+
+    Three set-based statements whatever the number of notes, so the note_tags
+    triggers (labels, counts) also run once per statement rather than per note.
+    """
+    # Notes that already have the target tag keep their existing row
+    db.execute(
+        insert(note_tags)
+        .from_select(
+            ["note_id", "tag_id"],
+            select(note_tags.c.note_id, literal(target_id))
+            .where(note_tags.c.tag_id.in_(source_ids))
+            .distinct(),
+        )
+        .on_conflict_do_nothing(index_elements=["note_id", "tag_id"])
+    )
+    # Explicitly rather than by ON DELETE CASCADE, which runs per source tag
+    db.execute(delete(note_tags).where(note_tags.c.tag_id.in_(source_ids)))
+    db.execute(
+        delete(Tag)
+        .where(Tag.id.in_(source_ids))
+        .execution_options(synchronize_session=False)
     )
 
 
@@ -241,17 +325,31 @@ async def merge_tags(
 async def autocomplete_tags(
     q: str = "",
     limit: int = 10,
+    fuzzy: bool = False,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     """
     Get tag suggestions for autocomplete based on query string.
     Returns a list of tag names.
+
+    Substring matches are served by the trigram index on tag names, with
+    prefix matches listed first. With ``fuzzy=true`` misspelled queries
+    match by trigram similarity and are ranked by it.
     """
     query = db.query(Tag.name).filter(Tag.user_id == current_user.id)
 
-    if q:
-        query = query.filter(Tag.name.ilike(f"%{q}%"))
+    # Tag names are stored lowercase, so a case-sensitive LIKE is enough
+    q = q.strip().lower()
+
+    if q and fuzzy:
+        similarity = func.word_similarity(q, Tag.name)
+        query = query.filter(literal(q).op("<%")(Tag.name)).order_by(desc(similarity))
+    elif q:
+        is_prefix = Tag.name.like(prefix_pattern(q), escape=LIKE_ESCAPE_CHAR)
+        query = query.filter(
+            Tag.name.like(contains_pattern(q), escape=LIKE_ESCAPE_CHAR)
+        ).order_by(case((is_prefix, 0), else_=1))
 
     tags = query.order_by(Tag.name).limit(limit).all()
 
@@ -18,6 +18,44 @@ class Settings(BaseSettings):
     # CORS
     allowed_origins: List[str] = ["http://localhost:3000", "http://localhost:5173"]
 
+    # Search analytics write-behind buffer
+    analytics_flush_interval_seconds: float = 5.0
+    analytics_queue_size: int = 10000
+
+    # Full-text search backend: "postgres" (tsvector) or "bm25" (in-process)
+    search_backend: str = "postgres"
+    # Directory for bm25 index snapshots; empty disables snapshots
+    search_snapshot_dir: str = ""
+    # Directory for related notes TF-IDF snapshots; empty disables snapshots
+    related_notes_snapshot_dir: str = ""
+    # Sessions used by POST /api/search/batch when parallel=true
+    search_batch_workers: int = 4
+    # Age after which a materialized saved search is re-run live and rebuilt
+    saved_search_max_staleness_seconds: int = 3600
+    # Per-endpoint statement_timeout for search queries in milliseconds
+    # (0 disables); a timed-out search returns 503
+    search_statement_timeout_ms: int = 5000
+    search_batch_statement_timeout_ms: int = 15000
+    saved_search_statement_timeout_ms: int = 10000
+    search_stream_statement_timeout_ms: int = 60000
+    # Searches slower than this (ms) are sampled into the in-process slow
+    # search log, which keeps the latest search_slow_log_size; 0 disables
+    search_slow_log_threshold_ms: float = 0
+    search_slow_log_size: int = 100
+    # Usernames allowed to use the search profiler when debug is off
+    search_profiler_admins: List[str] = []
+    # Searches with at most this many results get "did you mean" suggestions
+    # (-1 disables)
+    search_suggestion_max_results: int = 3
+    # Estimated Jaccard similarity (MinHash) above which notes are duplicates
+    duplicate_similarity_threshold: float = 0.8
+    # Age after which an in-memory instant search index is rebuilt in the
+    # background (it keeps answering meanwhile)
+    instant_search_max_age_seconds: int = 300
+    # Latency budget of GET /api/search/omnibox in milliseconds; sources that
+    # have not answered by then are left out of the response
+    omnibox_budget_ms: int = 150
+
     # App
     environment: str = "development"
     debug: bool = True
@@ -13,6 +13,9 @@ from app.core.config import settings
 from app.core.database import get_db
 from app.core.security import verify_token
 from app.models import User
+from app.services.analytics import search_analytics_buffer
+from app.services.related_notes import get_related_notes_engine
+from app.services.search_backend import get_search_backend
 
 # Create FastAPI instance
 app = FastAPI(
@@ -69,6 +72,20 @@ async def get_current_user(
     return user
 
 
+@app.on_event("startup")
+async def start_background_services():
+    """Start the search analytics flush thread."""
+    search_analytics_buffer.start()
+
+
+@app.on_event("shutdown")
+async def stop_background_services():
+    """Flush pending search analytics and snapshot in-memory search indexes."""
+    search_analytics_buffer.stop()
+    get_search_backend().save()
+    get_related_notes_engine().save()
+
+
 @app.get("/")
 async def root():
     """Root endpoint with API information."""
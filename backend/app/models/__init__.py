@@ -2,13 +2,35 @@ from datetime import datetime
 
 from sqlalchemy import Boolean, Column, DateTime
 from sqlalchemy import Enum as SQLEnum
-from sqlalchemy import ForeignKey, Integer, String, Table, Text
+from sqlalchemy import (
+    BigInteger,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    LargeBinary,
+    SmallInteger,
+    String,
+    Table,
+    Text,
+    cast,
+    event,
+    inspect,
+)
 from sqlalchemy.dialects.postgresql import ARRAY, JSONB, TSVECTOR
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
 from app.core.database import Base
 from app.schemas import NoteType
+from app.utils.minhash import note_signature
+from app.utils.note_features import (
+    FEATURE_CODE,
+    FEATURE_IMAGES,
+    FEATURE_LINKS,
+    FEATURE_TABLES,
+    extract_note_features,
+)
 
 # Association table for many-to-many relationship between notes and tags
 note_tags = Table(
@@ -23,6 +45,9 @@ note_tags = Table(
     Column(
         "created_at", DateTime(timezone=True), server_default=func.now(), nullable=False
     ),
+    # Notes of a tag (tag filters, merges, cascades); the primary key leads
+    # with note_id
+    Index("ix_note_tags_tag_id_note_id", "tag_id", "note_id"),
 )
 
 
@@ -69,13 +94,34 @@ class Tag(Base):
     created_at = Column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
     )
+    # Maintained by triggers on note_tags (migration 7e8f9a0b1c2d); never set
+    # it from Python. Refresh the tag after a commit to read the new value.
+    note_count = Column(Integer, nullable=False, default=0, server_default="0")
 
     # Relationships
     owner = relationship("User", back_populates="tags")
     notes = relationship("Note", secondary=note_tags, back_populates="tags")
 
     # Unique constraint: user can't have duplicate tag names
-    __table_args__ = ({"schema": None},)
+    __table_args__ = (
+        # Trigram index for substring/fuzzy autocomplete (requires pg_trgm)
+        Index(
+            "ix_tags_name_trgm",
+            name,
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+        # Prefix filters of the tag listing (LIKE 'abc%' in any collation)
+        Index(
+            "ix_tags_user_id_name_pattern",
+            user_id,
+            name,
+            postgresql_ops={"name": "text_pattern_ops"},
+        ),
+        # Tag listing by usage, most used first
+        Index("ix_tags_user_id_note_count", user_id, note_count.desc(), name),
+        {"schema": None},
+    )
 
     def __repr__(self):
         return f"<Tag(id={self.id}, name='{self.name}', user_id={self.user_id})>"
@@ -133,10 +179,21 @@ class Note(Base):
         Integer, ForeignKey("folders.id", ondelete="SET NULL"), nullable=True
     )
 
-    # Full-text search tsvector columns (populated by DB trigger)
+    # Full-text search tsvector columns (populated by DB triggers); content_tsv
+    # also holds the tag names (weight C) and folder path (weight D)
     title_tsv = Column(TSVECTOR, nullable=True)
     content_tsv = Column(TSVECTOR, nullable=True)
 
+    # Content features for has:/todo: filters (computed on save, see below)
+    todo_done = Column(SmallInteger, nullable=False, default=0, server_default="0")
+    todo_open = Column(SmallInteger, nullable=False, default=0, server_default="0")
+    feature_flags = Column(SmallInteger, nullable=False, default=0, server_default="0")
+
+    # MinHash signature and LSH band keys for near-duplicate detection
+    # (computed on save; NULL for notes without words)
+    minhash = Column(LargeBinary, nullable=True)
+    lsh_bands = Column(ARRAY(BigInteger), nullable=True)
+
     # Timestamps
     created_at = Column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
@@ -153,6 +210,71 @@ class Note(Base):
     folder = relationship("Folder", back_populates="notes")
     tags = relationship("Tag", secondary=note_tags, back_populates="notes")
 
+    # Trigram indexes backing ILIKE '%q%' and similarity search (requires pg_trgm)
+    __table_args__ = (
+        Index(
+            "ix_notes_title_trgm",
+            title,
+            postgresql_using="gin",
+            postgresql_ops={"title": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_notes_content_text_trgm",
+            content_text,
+            postgresql_using="gin",
+            postgresql_ops={"content_text": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_notes_content_structured_trgm",
+            cast(content_structured, Text).label("content_structured_text"),
+            postgresql_using="gin",
+            postgresql_ops={"content_structured_text": "gin_trgm_ops"},
+        ),
+        # Partial indexes for todo: and has: filters; the predicates must
+        # match the ones built by SearchService exactly
+        Index(
+            "ix_notes_todo_incomplete",
+            user_id,
+            postgresql_where=todo_open > 0,
+        ),
+        Index(
+            "ix_notes_todo_complete",
+            user_id,
+            postgresql_where=(todo_done > 0) & (todo_open == 0),
+        ),
+        Index(
+            "ix_notes_has_links",
+            user_id,
+            postgresql_where=feature_flags.op("&")(FEATURE_LINKS) != 0,
+        ),
+        Index(
+            "ix_notes_has_code",
+            user_id,
+            postgresql_where=feature_flags.op("&")(FEATURE_CODE) != 0,
+        ),
+        Index(
+            "ix_notes_has_tables",
+            user_id,
+            postgresql_where=feature_flags.op("&")(FEATURE_TABLES) != 0,
+        ),
+        Index(
+            "ix_notes_has_images",
+            user_id,
+            postgresql_where=feature_flags.op("&")(FEATURE_IMAGES) != 0,
+        ),
+        # Duplicate candidates: notes sharing any LSH band key (&& overlap)
+        Index("ix_notes_lsh_bands", lsh_bands, postgresql_using="gin"),
+        # field: key-path search, user_id = ... AND content_structured @> ...
+        # in one index (requires btree_gin)
+        Index(
+            "ix_notes_user_content_structured_path",
+            user_id,
+            content_structured,
+            postgresql_using="gin",
+            postgresql_ops={"content_structured": "jsonb_path_ops"},
+        ),
+    )
+
     @property
     def content(self):
         """Property to get content based on note type."""
@@ -172,6 +294,28 @@ class Note(Base):
             self.content_text = None
 
 
+@event.listens_for(Note, "before_insert")
+@event.listens_for(Note, "before_update")
+def _update_note_features(mapper, connection, note):
+    """
+    Recompute feature columns and the MinHash signature whenever a note's
+    content is written.
+    """
+    state = inspect(note)
+    if state.persistent and not (
+        state.attrs.content_text.history.has_changes()
+        or state.attrs.content_structured.history.has_changes()
+    ):
+        return
+    for column, value in extract_note_features(
+        note.content_text, note.content_structured
+    ).items():
+        setattr(note, column, value)
+    note.minhash, note.lsh_bands = note_signature(
+        note.content_text, note.content_structured
+    )
+
+
 class SavedSearch(Base):
     """Saved search model for storing user's favorite search queries."""
 
@@ -187,6 +331,13 @@ class SavedSearch(Base):
     last_used_at = Column(DateTime(timezone=True), nullable=True)
     use_count = Column(Integer, default=0, nullable=False)
 
+    # Opt-in stored result set (see app/services/materialized_search.py);
+    # materialized_at is NULL until built and whenever it must be rebuilt
+    materialized = Column(
+        Boolean, default=False, server_default="false", nullable=False
+    )
+    materialized_at = Column(DateTime(timezone=True), nullable=True)
+
     # Relationships
     owner = relationship("User", back_populates="saved_searches")
 
@@ -196,6 +347,62 @@ class SavedSearch(Base):
         )
 
 
+class SavedSearchResult(Base):
+    """One note in the stored result set of a materialized saved search."""
+
+    __tablename__ = "saved_search_results"
+
+    saved_search_id = Column(
+        Integer,
+        ForeignKey("saved_searches.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    note_id = Column(
+        Integer, ForeignKey("notes.id", ondelete="CASCADE"), primary_key=True
+    )
+    rank = Column(Float, nullable=False, default=0.0)
+
+    # Supports ON DELETE CASCADE from notes
+    __table_args__ = (Index("ix_saved_search_results_note_id", note_id),)
+
+    def __repr__(self):
+        return (
+            f"<SavedSearchResult(saved_search_id={self.saved_search_id}, "
+            f"note_id={self.note_id})>"
+        )
+
+
+class SavedSearchMatch(Base):
+    """A note that matched a saved search when it was written (see percolator)."""
+
+    __tablename__ = "saved_search_matches"
+
+    saved_search_id = Column(
+        Integer,
+        ForeignKey("saved_searches.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    note_id = Column(
+        Integer, ForeignKey("notes.id", ondelete="CASCADE"), primary_key=True
+    )
+    matched_at = Column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+
+    __table_args__ = (
+        # Supports ON DELETE CASCADE from notes
+        Index("ix_saved_search_matches_note_id", note_id),
+        # Newest matches of a saved search first
+        Index("ix_saved_search_matches_recent", saved_search_id, matched_at.desc()),
+    )
+
+    def __repr__(self):
+        return (
+            f"<SavedSearchMatch(saved_search_id={self.saved_search_id}, "
+            f"note_id={self.note_id})>"
+        )
+
+
 class SearchAnalytics(Base):
     """Search analytics model for tracking search queries and usage patterns."""
 
@@ -219,5 +426,83 @@ class SearchAnalytics(Base):
     # Relationships
     owner = relationship("User")
 
+    __table_args__ = (
+        # Conflict target for the batched analytics upsert
+        Index("ix_search_analytics_user_query", user_id, query_text, unique=True),
+        Index(
+            "ix_search_analytics_query_text_trgm",
+            query_text,
+            postgresql_using="gin",
+            postgresql_ops={"query_text": "gin_trgm_ops"},
+        ),
+    )
+
     def __repr__(self):
         return f"<SearchAnalytics(id={self.id}, query='{self.query_text}', count={self.search_count})>"
+
+
+class UserLexeme(Base):
+    """
+    A lexeme of a user's notes and how many notes contain it.
+
+    Maintained by the notes_lexemes_* triggers from title_tsv and content_tsv;
+    read by search spelling suggestions.
+    """
+
+    __tablename__ = "user_lexemes"
+
+    user_id = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    lexeme = Column(Text, primary_key=True)
+    note_count = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        # Trigram lookups within one user (user_id through btree_gin)
+        Index(
+            "ix_user_lexemes_lexeme_trgm",
+            user_id,
+            lexeme,
+            postgresql_using="gin",
+            postgresql_ops={"lexeme": "gin_trgm_ops"},
+        ),
+    )
+
+    def __repr__(self):
+        return (
+            f"<UserLexeme(user_id={self.user_id}, lexeme='{self.lexeme}', "
+            f"note_count={self.note_count})>"
+        )
+
+
+class NoteSection(Base):
+    """
+    One section of a structured note, with its own search vector.
+
+    A section is a key path of content_structured whose value is not an object
+    (nested objects become deeper paths). Rows are rebuilt by the
+    notes_sections_update trigger whenever the note content changes; search
+    uses them to point at the best matching section of large notes.
+    """
+
+    __tablename__ = "note_sections"
+
+    id = Column(Integer, primary_key=True)
+    note_id = Column(
+        Integer, ForeignKey("notes.id", ondelete="CASCADE"), nullable=False
+    )
+    user_id = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    path = Column(ARRAY(Text), nullable=False)
+    # Plain text of the value: strings as is, list items one per line
+    body = Column(Text, nullable=False)
+    tsv = Column(TSVECTOR, nullable=False)
+
+    __table_args__ = (
+        Index("ix_note_sections_note_path", note_id, path, unique=True),
+        Index("ix_note_sections_tsv", tsv, postgresql_using="gin"),
+    )
+
+    def __repr__(self):
+        return f"<NoteSection(note_id={self.note_id}, path={self.path})>"
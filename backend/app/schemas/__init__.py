@@ -2,7 +2,7 @@ from datetime import datetime
 from enum import Enum
 from typing import Any, Dict, Optional, Union
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
 
 class NoteType(str, Enum):
@@ -138,6 +138,77 @@ class NoteListResponse(BaseModel):
     has_prev: bool
 
 
+class RelatedNoteItem(BaseModel):
+    """A note similar to another one by TF-IDF cosine similarity."""
+
+    id: int
+    title: str
+    note_type: NoteType
+    updated_at: datetime
+    score: float = Field(..., description="Cosine similarity between 0 and 1")
+
+
+class RelatedNotesResponse(BaseModel):
+    """Schema for the related notes of a note, most similar first."""
+
+    related: list[RelatedNoteItem]
+
+
+class DuplicateNoteItem(BaseModel):
+    """A note in a set of near-duplicates."""
+
+    id: int
+    title: str
+    note_type: NoteType
+    updated_at: datetime
+    similarity: float = Field(
+        ..., description="Estimated Jaccard similarity of the note contents (0-1)"
+    )
+
+
+class DuplicateListResponse(BaseModel):
+    """Schema for the near-duplicates of a note, most similar first."""
+
+    duplicates: list[DuplicateNoteItem]
+
+
+class DuplicateGroup(BaseModel):
+    """Notes with near-identical content; similarities are to the first note."""
+
+    notes: list[DuplicateNoteItem]
+
+
+class DuplicateReportResponse(BaseModel):
+    """Schema for the near-duplicate groups of an account, largest first."""
+
+    groups: list[DuplicateGroup]
+    total_groups: int
+    duplicate_notes: int = Field(
+        ..., description="Notes that could be removed, keeping one per group"
+    )
+
+
+class NoteSectionSummary(BaseModel):
+    """One section of a structured note, without its content."""
+
+    path: list[str] = Field(..., description="Key path of the section")
+    length: int = Field(..., description="Characters of text in the section")
+
+
+class NoteSectionListResponse(BaseModel):
+    """Schema for the outline of a structured note."""
+
+    sections: list[NoteSectionSummary]
+
+
+class NoteSectionResponse(BaseModel):
+    """Schema for the content of one section of a structured note."""
+
+    note_id: int
+    path: list[str]
+    content: Any = Field(..., description="The JSON value at the key path")
+
+
 # Tag Schemas
 class TagBase(BaseModel):
     """Base tag schema."""
@@ -170,26 +241,65 @@ class TagResponse(TagBase):
 
 
 class TagMerge(BaseModel):
-    """Schema for merging tags."""
+    """Schema for merging one or more tags into another."""
 
-    source_tag_id: int = Field(..., description="ID of the tag to merge from")
+    source_tag_id: Optional[int] = Field(
+        None, description="ID of the tag to merge from"
+    )
+    source_tag_ids: list[int] = Field(
+        default_factory=list,
+        max_length=1000,
+        description="IDs of several tags to merge from in one call",
+    )
     target_tag_id: int = Field(..., description="ID of the tag to merge into")
 
+    @model_validator(mode="after")
+    def check_sources(self):
+        if self.source_tag_id is None and not self.source_tag_ids:
+            raise ValueError("Provide source_tag_id or source_tag_ids")
+        return self
+
+    def source_ids(self) -> list[int]:
+        """Every source tag id, without duplicates, in request order."""
+        ids = [self.source_tag_id] if self.source_tag_id is not None else []
+        return list(dict.fromkeys(ids + self.source_tag_ids))
+
+
+class TagSortBy(str, Enum):
+    """Orders of the tag listing."""
+
+    NAME = "name"
+    COUNT = "count"
+
 
 class TagListResponse(BaseModel):
     """Schema for tag list response."""
 
     tags: list[TagResponse]
-    total: int
+    total: int = Field(..., description="Tags matching the filter, on all pages")
+    next_cursor: Optional[str] = Field(
+        None, description="Pass as cursor to fetch the next page; null on the last"
+    )
 
 
 class BulkTagOperation(BaseModel):
     """Schema for bulk tag operations on multiple notes."""
 
-    note_ids: list[int] = Field(..., min_items=1, description="List of note IDs")
+    note_ids: Optional[list[int]] = Field(
+        None, min_items=1, description="List of note IDs"
+    )
+    search: Optional["SearchRequest"] = Field(
+        None, description="Apply to every note matching this search instead"
+    )
     tag_names: list[str] = Field(..., min_items=1, description="List of tag names")
     operation: str = Field(..., description="Operation: 'add', 'remove', or 'replace'")
 
+    @model_validator(mode="after")
+    def check_target(self):
+        if (self.note_ids is None) == (self.search is None):
+            raise ValueError("Provide exactly one of note_ids or search")
+        return self
+
     class Config:
         schema_extra = {
             "example": {
@@ -221,6 +331,16 @@ class SearchSortBy(str, Enum):
     TITLE_DESC = "title_desc"
 
 
+class SearchFacet(str, Enum):
+    """Enumeration for facet counts that can be requested with a search."""
+
+    TAGS = "tags"
+    NOTE_TYPE = "note_type"
+    FOLDER = "folder"
+    CREATED = "created"  # Monthly buckets
+    UPDATED = "updated"  # Monthly buckets
+
+
 class SearchRequest(BaseModel):
     """Schema for advanced search request."""
 
@@ -264,6 +384,14 @@ class SearchRequest(BaseModel):
     page: int = Field(1, ge=1, description="Page number")
     per_page: int = Field(20, ge=1, le=100, description="Results per page")
 
+    # Facet counts over the whole matching set
+    facets: Optional[list[SearchFacet]] = Field(
+        None, description="Facet counts to compute for the matching notes"
+    )
+    facet_limit: int = Field(
+        10, ge=1, le=100, description="Maximum buckets returned per facet"
+    )
+
     model_config = {
         "json_schema_extra": {
             "example": {
@@ -294,10 +422,36 @@ class SearchResultItem(BaseModel):
         default_factory=list,
         description="Where matches were found: title, content, tags",
     )
+    section_path: Optional[list[str]] = Field(
+        None,
+        description=(
+            "Key path of the best matching section of a structured note; "
+            "the snippet is taken from it"
+        ),
+    )
 
     model_config = {"from_attributes": True}
 
 
+class FacetBucket(BaseModel):
+    """Schema for one facet value and its number of matching notes."""
+
+    value: Optional[str] = Field(
+        ..., description="Facet value (tag name, note type, folder id or YYYY-MM)"
+    )
+    label: Optional[str] = Field(None, description="Display name, for folders")
+    count: int
+
+
+class FacetCounts(BaseModel):
+    """Schema for the buckets of a single facet."""
+
+    buckets: list[FacetBucket]
+    truncated: bool = Field(
+        False, description="True when more buckets exist than facet_limit"
+    )
+
+
 class SearchResponse(BaseModel):
     """Schema for search results response."""
 
@@ -311,6 +465,154 @@ class SearchResponse(BaseModel):
     execution_time_ms: float = Field(
         ..., description="Search execution time in milliseconds"
     )
+    facets: Optional[dict[str, FacetCounts]] = Field(
+        None, description="Facet counts, when requested"
+    )
+    suggestions: Optional[list[str]] = Field(
+        None, description="Corrected queries when the search found few results"
+    )
+
+
+class SearchBatchRequest(BaseModel):
+    """Schema for running several searches in one request."""
+
+    searches: list[SearchRequest] = Field(..., min_length=1, max_length=20)
+    parallel: bool = Field(
+        False, description="Run searches concurrently on a small session pool"
+    )
+
+
+class SearchBatchItem(BaseModel):
+    """Schema for the outcome of one search in a batch."""
+
+    response: Optional[SearchResponse] = None
+    error: Optional[str] = None
+    execution_time_ms: float = Field(
+        ..., description="Execution time of this search in milliseconds"
+    )
+
+
+class SearchBatchResponse(BaseModel):
+    """Schema for batched search results, in request order."""
+
+    results: list[SearchBatchItem]
+    execution_time_ms: float = Field(
+        ..., description="Execution time of the whole batch in milliseconds"
+    )
+
+
+class SearchStreamRequest(BaseModel):
+    """Schema for streaming every result of a search as NDJSON."""
+
+    search: SearchRequest
+    ids_only: bool = Field(
+        False, description="Emit only note ids and ranks, without snippets"
+    )
+    limit: Optional[int] = Field(None, ge=1, description="Stop after this many results")
+
+
+class SearchExplainRequest(BaseModel):
+    """Schema for profiling one search."""
+
+    search: SearchRequest
+    user_id: Optional[int] = Field(
+        None, description="Run the search as this user instead of the caller"
+    )
+    analyze: bool = Field(
+        True, description="Execute the statements under EXPLAIN (ANALYZE, BUFFERS)"
+    )
+
+
+class ExplainedStatement(BaseModel):
+    """Schema for one statement run by a profiled search."""
+
+    name: str = Field(..., description="page, count or hydrate")
+    sql: str
+    params: dict[str, Any]
+    plan: list[str] = Field(..., description="EXPLAIN output, one line per row")
+
+
+class SearchExplainResponse(BaseModel):
+    """Schema for the profile of one search."""
+
+    query: str
+    total: int
+    execution_time_ms: float = Field(
+        ..., description="Search execution time in milliseconds, without EXPLAIN"
+    )
+    phases: dict[str, float] = Field(
+        ...,
+        description="Milliseconds in parse, rank, hydrate, snippets and analytics",
+    )
+    statements: list[ExplainedStatement]
+
+
+class SlowSearchEntry(BaseModel):
+    """Schema for a search sampled into the slow search log."""
+
+    user_id: int
+    request: dict[str, Any]
+    execution_time_ms: float
+    phases: dict[str, float]
+    searched_at: datetime
+
+    model_config = {"from_attributes": True}
+
+
+class SlowSearchListResponse(BaseModel):
+    """Schema for the slow search log, newest first."""
+
+    entries: list[SlowSearchEntry]
+    threshold_ms: float = Field(..., description="Sampling threshold, 0 when disabled")
+    capacity: int
+
+
+class InstantNoteHit(BaseModel):
+    """A note whose title matches an instant search prefix."""
+
+    id: int
+    title: str
+
+
+class InstantSearchResponse(BaseModel):
+    """Schema for title and tag prefix matches of the search bar."""
+
+    query: str
+    notes: list[InstantNoteHit]
+    tags: list[str]
+    execution_time_ms: float
+
+
+class OmniboxResultType(str, Enum):
+    """Kinds of objects returned by the omnibox."""
+
+    NOTE = "notes"
+    TAG = "tags"
+    FOLDER = "folders"
+    SAVED_SEARCH = "saved_searches"
+
+
+class OmniboxResult(BaseModel):
+    """A note, tag, folder or saved search matching an omnibox query."""
+
+    type: OmniboxResultType
+    id: int
+    title: str
+    score: float = Field(..., description="How well the title matches, 0 to 1")
+
+    model_config = {"from_attributes": True}
+
+
+class OmniboxResponse(BaseModel):
+    """Schema for merged omnibox results."""
+
+    query: str
+    results: list[OmniboxResult]
+    timed_out: list[OmniboxResultType] = Field(
+        default_factory=list,
+        description="Sources left out because they exceeded the latency budget",
+    )
+    execution_time_ms: float
 
 
 class FolderBase(BaseModel):
@@ -365,6 +667,10 @@ class SavedSearchCreate(BaseModel):
     search_query: SearchRequest = Field(
         ..., description="The search parameters to save"
     )
+    materialized: bool = Field(
+        False,
+        description="Keep a stored result set that note writes update incrementally",
+    )
 
     model_config = {
         "json_schema_extra": {
@@ -391,6 +697,10 @@ class SavedSearchResponse(BaseModel):
     use_count: int = Field(
         default=0, description="Number of times this search was executed"
     )
+    materialized: bool = False
+    materialized_at: Optional[datetime] = Field(
+        None, description="When the stored result set was last fully built"
+    )
 
     model_config = {"from_attributes": True}
 
@@ -402,6 +712,20 @@ class SavedSearchListResponse(BaseModel):
     total: int
 
 
+class SavedSearchMatchItem(BaseModel):
+    """A note that matched a saved search when it was written."""
+
+    note_id: int
+    title: str
+    matched_at: datetime
+
+
+class SavedSearchMatchListResponse(BaseModel):
+    """Schema for the recent matches of a saved search, newest first."""
+
+    matches: list[SavedSearchMatchItem]
+
+
 # ========================
 # Search Analytics Schemas
 # ========================
@@ -460,3 +784,6 @@ class SearchAnalyticsStatsResponse(BaseModel):
     most_searched_query: Optional[str] = None
     searches_today: int
     searches_this_week: int
+
+
+BulkTagOperation.model_rebuild()
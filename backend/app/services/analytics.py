@@ -0,0 +1,261 @@
+"""
+Write-behind buffer for search analytics.
+
+Searches record (user, query, result_count, timestamp) events into an
+in-process queue instead of updating ``search_analytics`` on the request
+path. A background thread drains the queue periodically, folds events for
+the same (user_id, query_text) together and upserts them with a single
+``INSERT ... ON CONFLICT (user_id, query_text) DO UPDATE`` statement.
+
+The queue is bounded: when it is full new events are dropped and counted
+rather than blocking the search request.
+"""
+
+import logging
+import queue
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import case, func, literal_column
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models import SearchAnalytics
+
+logger = logging.getLogger("notes2gogo.analytics")
+
+# Searches for the same query within this window count once (live search
+# followed by a manual submit, for example)
+DEBOUNCE_SECONDS = 5
+
+# Weight of the newest observation in the rolling average of result counts
+AVG_RESULT_WEIGHT = 0.2
+
+
+@dataclass
+class SearchEvent:
+    """A single search performed by a user."""
+
+    user_id: int
+    query_text: str
+    result_count: int
+    searched_at: datetime
+
+
+def aggregate_search_events(events: List[SearchEvent]) -> List[Dict]:
+    """
+    Fold search events into one upsert row per (user_id, query_text).
+
+    Events are applied in timestamp order with the same debounce and rolling
+    average rules the analytics table has always used. ``created_at`` carries
+    the first counted search of the batch so the upsert can debounce against
+    the row already stored in the database.
+    """
+    rows: Dict[Tuple[int, str], Dict] = {}
+
+    for event in sorted(events, key=lambda e: e.searched_at):
+        key = (event.user_id, event.query_text)
+        row = rows.get(key)
+
+        if row is None:
+            rows[key] = {
+                "user_id": event.user_id,
+                "query_text": event.query_text,
+                "search_count": 1,
+                "last_searched_at": event.searched_at,
+                "last_result_count": event.result_count,
+                "avg_result_count": float(event.result_count),
+                "created_at": event.searched_at,
+            }
+            continue
+
+        time_since_last = (event.searched_at - row["last_searched_at"]).total_seconds()
+        if time_since_last >= DEBOUNCE_SECONDS:
+            row["search_count"] += 1
+            row["avg_result_count"] = (
+                row["avg_result_count"] * (1 - AVG_RESULT_WEIGHT)
+                + event.result_count * AVG_RESULT_WEIGHT
+            )
+
+        row["last_searched_at"] = event.searched_at
+        row["last_result_count"] = event.result_count
+
+    return list(rows.values())
+
+
+def build_upsert_statement(rows: List[Dict]):
+    """Build the batched upsert for aggregated analytics rows."""
+    table = SearchAnalytics.__table__
+    stmt = insert(table).values(rows)
+    excluded = stmt.excluded
+
+    # The first search in the batch does not count if it lands inside the
+    # debounce window of the last stored search
+    debounced = case(
+        (
+            excluded.created_at - table.c.last_searched_at
+            < literal_column(f"interval '{DEBOUNCE_SECONDS} seconds'"),
+            1,
+        ),
+        else_=0,
+    )
+
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.user_id, table.c.query_text],
+        set_={
+            "search_count": table.c.search_count + excluded.search_count - debounced,
+            "last_searched_at": func.greatest(
+                table.c.last_searched_at, excluded.last_searched_at
+            ),
+            "last_result_count": excluded.last_result_count,
+            # The batch counts as a single observation of the rolling average
+            "avg_result_count": func.coalesce(
+                table.c.avg_result_count * (1 - AVG_RESULT_WEIGHT)
+                + excluded.avg_result_count * AVG_RESULT_WEIGHT,
+                excluded.avg_result_count,
+            ),
+        },
+    )
+
+
+class SearchAnalyticsBuffer:
+    """Bounded, periodically flushed queue of search analytics events."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        max_queue_size: int = settings.analytics_queue_size,
+        flush_interval_seconds: float = settings.analytics_flush_interval_seconds,
+    ):
+        self.session_factory = session_factory
+        self.flush_interval_seconds = flush_interval_seconds
+        self._queue: "queue.Queue[SearchEvent]" = queue.Queue(maxsize=max_queue_size)
+        self._flush_lock = threading.Lock()
+        self._counter_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        # Counters exposed through stats()
+        self.recorded = 0
+        self.dropped = 0
+        self.flushed = 0
+        self.failed = 0
+
+    def record(
+        self,
+        user_id: int,
+        query_text: str,
+        result_count: int,
+        searched_at: Optional[datetime] = None,
+    ) -> bool:
+        """
+        Queue a search event without blocking.
+
+        Returns False if the event was dropped because the queue is full.
+        """
+        query_text = query_text.strip()
+        if not query_text:
+            return False
+
+        event = SearchEvent(
+            user_id=user_id,
+            query_text=query_text,
+            result_count=result_count,
+            searched_at=searched_at or datetime.utcnow(),
+        )
+
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            with self._counter_lock:
+                self.dropped += 1
+            return False
+
+        with self._counter_lock:
+            self.recorded += 1
+        return True
+
+    def drain(self) -> List[SearchEvent]:
+        """Remove and return every event currently queued."""
+        events = []
+        while True:
+            try:
+                events.append(self._queue.get_nowait())
+            except queue.Empty:
+                return events
+
+    def flush(self) -> int:
+        """
+        Write all queued events to the database.
+
+        Returns the number of events flushed. Events from a failed flush are
+        counted in ``failed`` and discarded.
+        """
+        with self._flush_lock:
+            events = self.drain()
+            if not events:
+                return 0
+
+            rows = aggregate_search_events(events)
+            db = self.session_factory()
+            try:
+                db.execute(build_upsert_statement(rows))
+                db.commit()
+            except Exception:
+                db.rollback()
+                self.failed += len(events)
+                logger.exception(
+                    "Failed to flush %d search analytics events", len(events)
+                )
+                return 0
+            finally:
+                db.close()
+
+            self.flushed += len(events)
+            return len(events)
+
+    def start(self) -> None:
+        """Start the background flush thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="search-analytics-flush", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread and flush whatever is still queued."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval_seconds + 5)
+            self._thread = None
+        self.flush()
+
+        if self.dropped:
+            logger.warning(
+                "Search analytics buffer dropped %d events (queue full)", self.dropped
+            )
+
+    def stats(self) -> Dict[str, int]:
+        """Return buffer counters for monitoring."""
+        return {
+            "queued": self._queue.qsize(),
+            "recorded": self.recorded,
+            "dropped": self.dropped,
+            "flushed": self.flushed,
+            "failed": self.failed,
+        }
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.flush_interval_seconds):
+            self.flush()
+
+
+# Process-wide buffer used by SearchService; started and stopped with the app
+search_analytics_buffer = SearchAnalyticsBuffer()
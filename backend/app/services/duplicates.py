@@ -0,0 +1,164 @@
+"""
+Near-duplicate notes from MinHash signatures.
+
+Notes store a MinHash signature and LSH band keys computed when they are
+saved (see app.utils.minhash). The candidates for a note are the notes
+sharing any band key with it, found through the GIN index on
+``notes.lsh_bands``; only their signatures are compared, so note text is
+never read or compared pairwise.
+
+The account report groups the user's band keys in SQL, verifies the notes of
+every bucket holding more than one against each other by signature, and joins
+verified pairs into groups with union-find.
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import Integer, any_, func, literal, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session, load_only
+
+from app.core.config import settings
+from app.models import Note
+from app.utils.minhash import decode_signature, similarities
+
+
+def cluster_buckets(
+    buckets: Iterable[Sequence[int]],
+    signatures: Dict[int, np.ndarray],
+    threshold: float,
+) -> List[List[Tuple[int, float]]]:
+    """
+    Group the notes of LSH buckets whose signatures are similar enough.
+
+    Each bucket is compared against one anchor at a time: members similar to
+    the anchor join its group and the rest are compared against the next
+    anchor, so identical-content buckets cost one pass. Returns groups of
+    ``(note_id, similarity to the group's first note)``, lowest id first,
+    largest groups first.
+    """
+    parent: Dict[int, int] = {}
+
+    def find(note_id: int) -> int:
+        root = note_id
+        while parent.get(root, root) != root:
+            root = parent[root]
+        while note_id != root:
+            parent[note_id], note_id = root, parent[note_id]
+        return root
+
+    for bucket in buckets:
+        remaining = sorted(set(bucket))
+        while len(remaining) > 1:
+            anchor, rest = remaining[0], remaining[1:]
+            # Members already grouped with the anchor need no comparison
+            root = find(anchor)
+            rest = [note_id for note_id in rest if find(note_id) != root]
+            if not rest:
+                break
+            scores = similarities(
+                signatures[anchor], np.stack([signatures[n] for n in rest])
+            )
+            remaining = []
+            for note_id, score in zip(rest, scores):
+                if score >= threshold:
+                    parent.setdefault(root, root)
+                    parent[find(note_id)] = root
+                else:
+                    remaining.append(note_id)
+
+    members: Dict[int, List[int]] = {}
+    for note_id in parent:
+        members.setdefault(find(note_id), []).append(note_id)
+
+    groups = []
+    for group in members.values():
+        group.sort()
+        scores = similarities(
+            signatures[group[0]], np.stack([signatures[n] for n in group])
+        )
+        groups.append([(n, float(s)) for n, s in zip(group, scores)])
+    groups.sort(key=lambda group: (-len(group), group[0][0]))
+    return groups
+
+
+class DuplicateService:
+    """Find near-duplicate notes of one user."""
+
+    def __init__(
+        self,
+        db: Session,
+        user_id: int,
+        threshold: Optional[float] = None,
+    ):
+        self.db = db
+        self.user_id = user_id
+        self.threshold = (
+            threshold
+            if threshold is not None
+            else settings.duplicate_similarity_threshold
+        )
+
+    def duplicates_of(self, note: Note) -> List[Tuple[Note, float]]:
+        """Return the notes similar to ``note`` with their similarity, best first."""
+        if note.minhash is None or not note.lsh_bands:
+            return []
+
+        candidates = (
+            self.db.query(Note)
+            .options(
+                load_only(
+                    Note.id, Note.title, Note.note_type, Note.updated_at, Note.minhash
+                )
+            )
+            .filter(
+                Note.user_id == self.user_id,
+                Note.id != note.id,
+                Note.lsh_bands.overlap(note.lsh_bands),
+            )
+            .all()
+        )
+        if not candidates:
+            return []
+
+        scores = similarities(
+            decode_signature(note.minhash),
+            np.stack([decode_signature(c.minhash) for c in candidates]),
+        )
+        duplicates = [
+            (candidate, float(score))
+            for candidate, score in zip(candidates, scores)
+            if score >= self.threshold
+        ]
+        duplicates.sort(key=lambda item: (-item[1], item[0].id))
+        return duplicates
+
+    def report(self) -> List[List[Tuple[int, float]]]:
+        """Group all of the user's near-duplicate notes (see ``cluster_buckets``)."""
+        keys = (
+            select(Note.id, func.unnest(Note.lsh_bands).label("band"))
+            .where(Note.user_id == self.user_id, Note.lsh_bands.isnot(None))
+            .cte("keys")
+        )
+        buckets = (
+            self.db.execute(
+                select(func.array_agg(keys.c.id))
+                .group_by(keys.c.band)
+                .having(func.count() > 1)
+            )
+            .scalars()
+            .all()
+        )
+        if not buckets:
+            return []
+
+        note_ids = sorted({note_id for bucket in buckets for note_id in bucket})
+        rows = self.db.execute(
+            select(Note.id, Note.minhash).where(
+                Note.user_id == self.user_id,
+                Note.id == any_(literal(note_ids, ARRAY(Integer))),
+            )
+        )
+        signatures = {row.id: decode_signature(row.minhash) for row in rows}
+        return cluster_buckets(buckets, signatures, self.threshold)
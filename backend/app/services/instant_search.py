@@ -0,0 +1,297 @@
+"""
+Title and tag prefix lookups for the search bar.
+
+``GET /api/search/instant`` is called on every keystroke, so it answers from
+process memory instead of running a full-text search. Each user has a
+``TitlePrefixIndex``: the lowercase words of every note title in one sorted
+list and the tag names in another, both searched with ``bisect``. Every query
+token is a prefix; titles must have a word starting with each token.
+
+Overlapping keystrokes share work:
+
+- the first request for a user builds the index and concurrent requests wait
+  for that build instead of starting their own;
+- an index older than ``settings.instant_search_max_age_seconds`` keeps
+  answering while a single background thread rebuilds it.
+
+Note writes update loaded indexes in place (and are replayed onto a build in
+progress); tag renames, merges and deletes drop the user's index. Like the
+related notes engine, indexes are per process.
+"""
+
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+from typing import Callable, Dict, FrozenSet, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models import Note, Tag
+
+WORD_PATTERN = re.compile(r"\w+")
+
+# Title words scanned per query before ranking; keeps one-letter prefixes cheap
+MAX_CANDIDATES = 500
+
+
+def title_words(text: str) -> List[str]:
+    """Lowercase words of a title or query."""
+    return WORD_PATTERN.findall((text or "").lower())
+
+
+def _prefix_end(prefix: str) -> str:
+    """Smallest string greater than every string starting with ``prefix``."""
+    return prefix + "\U0010ffff"
+
+
+class TitlePrefixIndex:
+    """Sorted title words and tag names of one user's notes."""
+
+    def __init__(self):
+        # (word, note_id) for every distinct word of every title
+        self._words: List[Tuple[str, int]] = []
+        # note_id -> (title, updated timestamp, distinct title words)
+        self._notes: Dict[int, Tuple[str, float, FrozenSet[str]]] = {}
+        self._tags: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self._notes)
+
+    def add(self, note_id: int, title: str, updated: float = 0.0) -> None:
+        """Index ``note_id`` under the words of ``title``, replacing earlier ones."""
+        self.remove(note_id)
+        words = frozenset(title_words(title))
+        self._notes[note_id] = (title, updated, words)
+        for word in words:
+            insort(self._words, (word, note_id))
+
+    def remove(self, note_id: int) -> None:
+        entry = self._notes.pop(note_id, None)
+        if entry is None:
+            return
+        for word in entry[2]:
+            position = bisect_left(self._words, (word, note_id))
+            if position < len(self._words) and self._words[position] == (
+                word,
+                note_id,
+            ):
+                del self._words[position]
+
+    def add_tag(self, name: str) -> None:
+        position = bisect_left(self._tags, name)
+        if position == len(self._tags) or self._tags[position] != name:
+            self._tags.insert(position, name)
+
+    def load(self, rows, tags) -> None:
+        """Bulk-load ``(note_id, title, updated)`` rows and tag names."""
+        for note_id, title, updated in rows:
+            words = frozenset(title_words(title))
+            self._notes[note_id] = (title, updated, words)
+            self._words.extend((word, note_id) for word in words)
+        self._words.sort()
+        self._tags = sorted(set(tags))
+
+    def search_notes(self, query: str, limit: int = 10) -> List[Tuple[int, str]]:
+        """
+        Return ``(note_id, title)`` of notes with a title word starting with
+        every query token. Titles starting with the query rank first, then
+        the most recently updated.
+        """
+        tokens = title_words(query)
+        if not tokens or limit <= 0:
+            return []
+
+        # Scan the narrowest token's range and check the others per note
+        ranges = [self._range(token) for token in tokens]
+        start, end = min(ranges, key=lambda bounds: bounds[1] - bounds[0])
+        others = [
+            token for token, bounds in zip(tokens, ranges) if bounds != (start, end)
+        ]
+
+        candidates = []
+        seen = set()
+        for _, note_id in self._words[start:end]:
+            if note_id in seen:
+                continue
+            seen.add(note_id)
+            title, updated, words = self._notes[note_id]
+            if all(any(word.startswith(t) for word in words) for t in others):
+                candidates.append((note_id, title, updated))
+                if len(candidates) >= MAX_CANDIDATES:
+                    break
+
+        phrase = " ".join(tokens)
+        candidates.sort(
+            key=lambda c: (not " ".join(title_words(c[1])).startswith(phrase), -c[2])
+        )
+        return [(note_id, title) for note_id, title, _ in candidates[:limit]]
+
+    def search_tags(self, query: str, limit: int = 10) -> List[str]:
+        """Return tag names starting with ``query`` in name order."""
+        prefix = query.strip().lower()
+        if not prefix or limit <= 0:
+            return []
+        start = bisect_left(self._tags, prefix)
+        end = bisect_left(self._tags, _prefix_end(prefix), lo=start)
+        return self._tags[start : min(end, start + limit)]
+
+    def _range(self, prefix: str) -> Tuple[int, int]:
+        start = bisect_left(self._words, (prefix,))
+        end = bisect_left(self._words, (_prefix_end(prefix),), lo=start)
+        return start, end
+
+
+class InstantSearchIndex:
+    """Per-user ``TitlePrefixIndex`` instances with coalesced builds."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        max_age_seconds: float = settings.instant_search_max_age_seconds,
+    ):
+        self.session_factory = session_factory
+        self.max_age_seconds = max_age_seconds
+        self._indexes: Dict[int, TitlePrefixIndex] = {}
+        self._built_at: Dict[int, float] = {}
+        # Builds in progress, and the writes they have to replay
+        self._builds: Dict[int, threading.Event] = {}
+        self._pending: Dict[int, List[Tuple[str, tuple]]] = {}
+        self._lock = threading.RLock()
+
+    def search(
+        self, user_id: int, query: str, limit: int = 10
+    ) -> Tuple[List[Tuple[int, str]], List[str]]:
+        """Return matching ``(note_id, title)`` pairs and tag names."""
+        index = self._get_index(user_id)
+        with self._lock:
+            return index.search_notes(query, limit), index.search_tags(query, limit)
+
+    def index(self, note: Note) -> None:
+        updated = note.updated_at.timestamp() if note.updated_at else time.time()
+        tags = [tag.name for tag in note.tags]
+        self._apply(note.user_id, "add", (note.id, note.title, updated, tags))
+
+    def delete(self, user_id: int, note_id: int) -> None:
+        self._apply(user_id, "remove", (note_id,))
+
+    def add_tag(self, user_id: int, name: str) -> None:
+        self._apply(user_id, "tag", (name,))
+
+    def invalidate(self, user_id: int) -> None:
+        """Drop the user's index; the next search rebuilds it."""
+        with self._lock:
+            self._indexes.pop(user_id, None)
+            self._built_at.pop(user_id, None)
+            if user_id in self._pending:
+                # The build in progress may predate the change
+                self._pending[user_id].append(("invalidate", ()))
+
+    def _apply(self, user_id: int, operation: str, args: tuple) -> None:
+        with self._lock:
+            if user_id in self._pending:
+                self._pending[user_id].append((operation, args))
+            index = self._indexes.get(user_id)
+            # Users not loaded yet are built from the database on first search
+            if index is not None:
+                self._replay(index, operation, args)
+
+    @staticmethod
+    def _replay(index: TitlePrefixIndex, operation: str, args: tuple) -> None:
+        if operation == "add":
+            note_id, title, updated, tags = args
+            index.add(note_id, title, updated)
+            for name in tags:
+                index.add_tag(name)
+        elif operation == "remove":
+            index.remove(*args)
+        elif operation == "tag":
+            index.add_tag(*args)
+
+    def _get_index(self, user_id: int) -> TitlePrefixIndex:
+        while True:
+            with self._lock:
+                index = self._indexes.get(user_id)
+                build = self._builds.get(user_id)
+                if index is not None:
+                    age = time.monotonic() - self._built_at[user_id]
+                    if build is None and age > self.max_age_seconds:
+                        self._start_build(user_id, background=True)
+                    return index
+                owner = build is None
+                if owner:
+                    build = self._start_build(user_id)
+
+            if owner:
+                self._build(user_id)
+            else:
+                build.wait()
+
+            with self._lock:
+                index = self._indexes.get(user_id)
+            if index is not None:
+                return index
+            # The build failed or was invalidated: the next pass starts another
+
+    def _start_build(self, user_id: int, background: bool = False) -> threading.Event:
+        build = threading.Event()
+        self._builds[user_id] = build
+        self._pending[user_id] = []
+        if background:
+            threading.Thread(
+                target=self._build,
+                args=(user_id,),
+                name=f"instant-search-build-{user_id}",
+                daemon=True,
+            ).start()
+        return build
+
+    def _build(self, user_id: int) -> None:
+        index: Optional[TitlePrefixIndex] = None
+        try:
+            index = self._load(user_id)
+        except Exception as e:
+            print(f"Error building instant search index for user {user_id}: {e}")
+        finally:
+            with self._lock:
+                pending = self._pending.pop(user_id, [])
+                invalidated = any(op == "invalidate" for op, _ in pending)
+                if index is not None and not invalidated:
+                    for operation, args in pending:
+                        self._replay(index, operation, args)
+                    self._indexes[user_id] = index
+                    self._built_at[user_id] = time.monotonic()
+                self._builds.pop(user_id).set()
+
+    def _load(self, user_id: int) -> TitlePrefixIndex:
+        db = self.session_factory()
+        try:
+            rows = (
+                (note_id, title, updated.timestamp() if updated else 0.0)
+                for note_id, title, updated in db.query(
+                    Note.id, Note.title, Note.updated_at
+                )
+                .filter(Note.user_id == user_id)
+                .yield_per(1000)
+            )
+            index = TitlePrefixIndex()
+            tags = [
+                name for (name,) in db.query(Tag.name).filter(Tag.user_id == user_id)
+            ]
+            index.load(rows, tags)
+            return index
+        finally:
+            db.close()
+
+
+_index: Optional[InstantSearchIndex] = None
+
+
+def get_instant_search_index() -> InstantSearchIndex:
+    """Return the process-wide instant search index."""
+    global _index
+    if _index is None:
+        _index = InstantSearchIndex()
+    return _index
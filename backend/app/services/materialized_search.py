@@ -0,0 +1,217 @@
+"""
+Materialized saved searches.
+
+A saved search with ``materialized`` set keeps the ids and ranks of its
+matching notes in ``saved_search_results``. Note writes re-test only the
+changed notes against each materialized search (``apply_note_changes``)
+instead of re-running it, so executing the search is an index lookup plus
+hydration of one page.
+
+Result sets that were never built, or were built longer ago than
+``settings.saved_search_max_staleness_seconds`` (relative dates such as
+``created:last-week`` drift over time), are served by a live search, which
+also rebuilds them.
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import desc, func, literal, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models import Note, SavedSearch, SavedSearchResult
+from app.schemas import FacetCounts, SearchRequest, SearchResultItem, SearchSortBy
+from app.services.search import SearchService
+
+
+class MaterializedSearchService:
+    """Build, maintain and read the stored result sets of saved searches."""
+
+    def __init__(
+        self,
+        db: Session,
+        user_id: int,
+        search_service: Optional[SearchService] = None,
+    ):
+        self.db = db
+        self.user_id = user_id
+        self.search = search_service or SearchService(db, user_id)
+
+    def execute(
+        self, saved_search: SavedSearch, request: SearchRequest
+    ) -> Tuple[List[SearchResultItem], int, Optional[Dict[str, FacetCounts]]]:
+        """
+        Run a saved search from its stored results when possible.
+
+        Falls back to a live search when the search is not materialized, the
+        stored results are stale, or facets are requested; a stale
+        materialized search is rebuilt on the way. The caller commits.
+        """
+        if not saved_search.materialized or request.facets:
+            return self.search.search(request)
+
+        if not self.is_fresh(saved_search):
+            outcome = self.search.search(request)
+            self.rebuild(saved_search)
+            return outcome
+
+        parsed = self.search.parse_query(request.query)
+        query = (
+            self.db.query(
+                SavedSearchResult.note_id.label("id"),
+                SavedSearchResult.rank,
+                func.count().over().label("total"),
+            )
+            .join(Note, Note.id == SavedSearchResult.note_id)
+            .filter(SavedSearchResult.saved_search_id == saved_search.id)
+        )
+        if request.sort_by == SearchSortBy.RELEVANCE:
+            # Equal ranks (filter-only searches) fall back to recency, as the
+            # live search does
+            query = query.order_by(
+                desc(SavedSearchResult.rank), desc(Note.updated_at), Note.id
+            )
+        else:
+            query = self.search._apply_sorting(
+                query, request.sort_by, SavedSearchResult.rank
+            )
+
+        offset = (request.page - 1) * request.per_page
+        rows = query.offset(offset).limit(request.per_page).all()
+        if rows:
+            total = rows[0].total
+        else:
+            total = (
+                self.db.query(func.count())
+                .select_from(SavedSearchResult)
+                .filter(SavedSearchResult.saved_search_id == saved_search.id)
+                .scalar()
+            )
+
+        notes = self.search._hydrate_notes([row.id for row in rows])
+        ranks = {row.id: row.rank for row in rows}
+        sections = self.search._best_sections(notes, parsed, request.title_only)
+        results = [
+            self.search._create_search_result(
+                note, parsed, ranks[note.id], request.query, sections.get(note.id)
+            )
+            for note in notes
+        ]
+
+        try:
+            self.search._track_search_analytics(request.query, total)
+        except Exception as e:
+            print(f"Error tracking search analytics: {e}")
+
+        return results, total, None
+
+    def is_fresh(self, saved_search: SavedSearch) -> bool:
+        """Return True when the stored results may be served as they are."""
+        if saved_search.materialized_at is None:
+            return False
+        age = datetime.now(timezone.utc) - saved_search.materialized_at
+        return age <= timedelta(seconds=settings.saved_search_max_staleness_seconds)
+
+    def rebuild(self, saved_search: SavedSearch) -> None:
+        """Replace the stored results with a full evaluation of the search."""
+        request = SearchRequest(**saved_search.search_query)
+        matches = self._match_query(request).subquery()
+
+        self.db.query(SavedSearchResult).filter(
+            SavedSearchResult.saved_search_id == saved_search.id
+        ).delete(synchronize_session=False)
+        self.db.execute(
+            insert(SavedSearchResult).from_select(
+                ["saved_search_id", "note_id", "rank"],
+                select(literal(saved_search.id), matches.c.id, matches.c.rank),
+            )
+        )
+        saved_search.materialized_at = func.now()
+
+    def invalidate(self, saved_search: SavedSearch) -> None:
+        """Mark the stored results stale so the next execution rebuilds them."""
+        saved_search.materialized_at = None
+
+    def clear(self, saved_search: SavedSearch) -> None:
+        """Drop the stored results, e.g. when materialization is turned off."""
+        self.db.query(SavedSearchResult).filter(
+            SavedSearchResult.saved_search_id == saved_search.id
+        ).delete(synchronize_session=False)
+        saved_search.materialized_at = None
+
+    def apply_note_changes(self, note_ids: Iterable[int]) -> None:
+        """
+        Update every fresh materialized search of the user for changed notes.
+
+        Each search is evaluated against the changed ids only, then their
+        stored rows are upserted or removed. Deleted notes need no call: their
+        rows go with ON DELETE CASCADE. Commits; on failure the user's
+        materialized searches are marked stale instead of raising.
+        """
+        note_ids = list(note_ids)
+        if not note_ids:
+            return
+
+        saved_searches = (
+            self.db.query(SavedSearch)
+            .filter(
+                SavedSearch.user_id == self.user_id,
+                SavedSearch.materialized.is_(True),
+                SavedSearch.materialized_at.isnot(None),
+            )
+            .all()
+        )
+        if not saved_searches:
+            return
+
+        try:
+            for saved_search in saved_searches:
+                self._apply_to_search(saved_search, note_ids)
+            self.db.commit()
+        except Exception as e:
+            print(f"Error maintaining materialized saved searches: {e}")
+            self.db.rollback()
+            self.db.query(SavedSearch).filter(
+                SavedSearch.user_id == self.user_id,
+                SavedSearch.materialized.is_(True),
+            ).update({"materialized_at": None}, synchronize_session=False)
+            self.db.commit()
+
+    def _apply_to_search(self, saved_search: SavedSearch, note_ids: List[int]):
+        request = SearchRequest(**saved_search.search_query)
+        matched = dict(self._match_query(request).filter(Note.id.in_(note_ids)).all())
+
+        unmatched = [note_id for note_id in note_ids if note_id not in matched]
+        if unmatched:
+            self.db.query(SavedSearchResult).filter(
+                SavedSearchResult.saved_search_id == saved_search.id,
+                SavedSearchResult.note_id.in_(unmatched),
+            ).delete(synchronize_session=False)
+
+        if matched:
+            stmt = insert(SavedSearchResult).values(
+                [
+                    {
+                        "saved_search_id": saved_search.id,
+                        "note_id": note_id,
+                        "rank": rank,
+                    }
+                    for note_id, rank in matched.items()
+                ]
+            )
+            self.db.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=["saved_search_id", "note_id"],
+                    set_={"rank": stmt.excluded.rank},
+                )
+            )
+
+    def _match_query(self, request: SearchRequest):
+        """The search's filtered ``(id, rank)`` query, unsorted and unpaged."""
+        parsed = self.search.parse_query(request.query)
+        query, rank_score = self.search._build_ranked_query(
+            request.model_copy(update={"facets": None}), parsed
+        )
+        return query.with_entities(Note.id, rank_score.label("rank")).order_by(None)
@@ -0,0 +1,215 @@
+"""
+One search box over notes, tags, folders and saved searches.
+
+The command palette used to call four endpoints per keystroke. ``OmniboxService``
+queries the four sources concurrently instead, each on its own worker thread:
+note titles come from the in-memory instant search index, the others from one
+short query each on a pooled session whose ``statement_timeout`` is the
+latency budget.
+
+Whatever has not finished when the budget runs out is dropped from the
+response (and reported in ``timed_out``); its running statement is cancelled
+so the connection goes back to the pool. Each source contributes at most
+``per_type`` hits, ranked by how the name matches the query, and the merged
+list is ordered by that score.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Tuple
+
+from sqlalchemy import case, or_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models import Folder, SavedSearch, Tag
+from app.services.instant_search import get_instant_search_index, title_words
+from app.services.search_cancellation import (
+    SearchCancellation,
+    is_query_canceled,
+    set_statement_timeout,
+)
+from app.utils.text_search import LIKE_ESCAPE_CHAR, contains_pattern, prefix_pattern
+
+NOTES = "notes"
+TAGS = "tags"
+FOLDERS = "folders"
+SAVED_SEARCHES = "saved_searches"
+
+# Merge order between hits with the same score
+SOURCES = (NOTES, SAVED_SEARCHES, TAGS, FOLDERS)
+
+
+@dataclass
+class OmniboxHit:
+    """A ranked result from one omnibox source."""
+
+    type: str
+    id: int
+    title: str
+    score: float
+
+
+def match_score(name: str, query: str) -> float:
+    """
+    Rank how ``name`` matches ``query``: exact (1.0), prefix (0.8), a word
+    prefix for every query word (0.6), substring (0.4), anything else (0.2).
+    """
+    name, query = name.lower(), query.strip().lower()
+    if name == query:
+        return 1.0
+    if name.startswith(query):
+        return 0.8
+    words = title_words(name)
+    if all(any(word.startswith(t) for word in words) for t in title_words(query)):
+        return 0.6
+    if query in name:
+        return 0.4
+    return 0.2
+
+
+def merge_hits(
+    hits_by_source: Dict[str, List[OmniboxHit]], per_type: int
+) -> List[OmniboxHit]:
+    """Cap every source at ``per_type`` hits and merge them by score."""
+    merged = []
+    for source in SOURCES:
+        ranked = sorted(hits_by_source.get(source, []), key=lambda h: -h.score)
+        merged.extend(ranked[:per_type])
+    order = {source: position for position, source in enumerate(SOURCES)}
+    return sorted(merged, key=lambda hit: (-hit.score, order[hit.type]))
+
+
+class OmniboxService:
+    """Concurrent, time-boxed lookups across a user's searchable objects."""
+
+    def __init__(
+        self,
+        user_id: int,
+        session_factory: Callable[[], Session] = SessionLocal,
+        budget_ms: int = settings.omnibox_budget_ms,
+    ):
+        self.user_id = user_id
+        self.session_factory = session_factory
+        self.budget_ms = budget_ms
+
+    def search(
+        self, query: str, per_type: int = 5
+    ) -> Tuple[List[OmniboxHit], List[str]]:
+        """
+        Return merged hits and the sources dropped for exceeding the budget.
+        """
+        query = query.strip()
+        if not query:
+            return [], []
+
+        deadline = time.monotonic() + self.budget_ms / 1000
+        cancellation = SearchCancellation()
+        lookups = {
+            NOTES: lambda: self._notes(query, per_type),
+            TAGS: lambda: self._in_session(cancellation, self._tags, query, per_type),
+            FOLDERS: lambda: self._in_session(
+                cancellation, self._folders, query, per_type
+            ),
+            SAVED_SEARCHES: lambda: self._in_session(
+                cancellation, self._saved_searches, query, per_type
+            ),
+        }
+
+        executor = ThreadPoolExecutor(max_workers=len(lookups))
+        futures = {executor.submit(lookup): name for name, lookup in lookups.items()}
+        done, _ = wait(futures, timeout=max(0.0, deadline - time.monotonic()))
+        # Stop statements still running; late workers close their own sessions
+        cancellation.cancel()
+        executor.shutdown(wait=False)
+
+        hits_by_source = {}
+        timed_out = []
+        for future, name in futures.items():
+            if future not in done:
+                timed_out.append(name)
+                continue
+            try:
+                hits_by_source[name] = future.result()
+            except Exception as e:
+                if is_query_canceled(e):
+                    # Hit statement_timeout, i.e. the budget
+                    timed_out.append(name)
+                else:
+                    print(f"Error in omnibox {name} lookup: {e}")
+
+        return merge_hits(hits_by_source, per_type), sorted(timed_out)
+
+    def _in_session(self, cancellation: SearchCancellation, lookup, *args):
+        db = self.session_factory()
+        try:
+            set_statement_timeout(db, self.budget_ms)
+            with cancellation.track(db):
+                return lookup(db, *args)
+        finally:
+            db.close()
+
+    def _notes(self, query: str, limit: int) -> List[OmniboxHit]:
+        notes, _ = get_instant_search_index().search(self.user_id, query, limit)
+        return [
+            OmniboxHit(NOTES, note_id, title, match_score(title, query))
+            for note_id, title in notes
+        ]
+
+    def _tags(self, db: Session, query: str, limit: int) -> List[OmniboxHit]:
+        # Tag names are stored lowercase; same matching as tag autocomplete
+        q = query.lower()
+        is_prefix = Tag.name.like(prefix_pattern(q), escape=LIKE_ESCAPE_CHAR)
+        rows = (
+            db.query(Tag.id, Tag.name)
+            .filter(
+                Tag.user_id == self.user_id,
+                Tag.name.like(contains_pattern(q), escape=LIKE_ESCAPE_CHAR),
+            )
+            .order_by(case((is_prefix, 0), else_=1), Tag.name)
+            .limit(limit)
+            .all()
+        )
+        return [
+            OmniboxHit(TAGS, id, name, match_score(name, query)) for id, name in rows
+        ]
+
+    def _folders(self, db: Session, query: str, limit: int) -> List[OmniboxHit]:
+        is_prefix = Folder.name.ilike(prefix_pattern(query), escape=LIKE_ESCAPE_CHAR)
+        rows = (
+            db.query(Folder.id, Folder.name)
+            .filter(
+                Folder.user_id == self.user_id,
+                Folder.name.ilike(contains_pattern(query), escape=LIKE_ESCAPE_CHAR),
+            )
+            .order_by(case((is_prefix, 0), else_=1), Folder.name)
+            .limit(limit)
+            .all()
+        )
+        return [
+            OmniboxHit(FOLDERS, id, name, match_score(name, query)) for id, name in rows
+        ]
+
+    def _saved_searches(self, db: Session, query: str, limit: int) -> List[OmniboxHit]:
+        pattern = contains_pattern(query)
+        rows = (
+            db.query(SavedSearch.id, SavedSearch.name)
+            .filter(
+                SavedSearch.user_id == self.user_id,
+                or_(
+                    SavedSearch.name.ilike(pattern, escape=LIKE_ESCAPE_CHAR),
+                    SavedSearch.search_query["query"].astext.ilike(
+                        pattern, escape=LIKE_ESCAPE_CHAR
+                    ),
+                ),
+            )
+            .order_by(SavedSearch.use_count.desc(), SavedSearch.name)
+            .limit(limit)
+            .all()
+        )
+        return [
+            OmniboxHit(SAVED_SEARCHES, id, name, match_score(name, query))
+            for id, name in rows
+        ]
@@ -0,0 +1,462 @@
+"""
+Saved search percolator.
+
+Instead of re-running every saved search after a note is written, the user's
+saved searches are compiled once into plain Python predicates over a single
+note: the lexemes of its title and content tsvectors, its tag names, type,
+dates, feature columns and structured content (for ``field:`` filters). Matching a note is then one query to load that
+note plus set operations in memory.
+
+Compiled searches are indexed by an anchor that every matching note must
+contain (a title or content lexeme, or a required tag), so a note is only
+verified against searches whose anchor it has. Searches with no anchor, e.g.
+``has:code`` alone, are verified against every note.
+
+Text conditions mirror SearchService._apply_fulltext_search on the postgres
+backend: ``plainto_tsquery`` requires every lexeme of the query string, and the
+title and content conditions are ORed. Relative dates (``created:last-week``)
+are resolved when a matcher is compiled, so matchers are recompiled daily.
+
+Matches are recorded in ``saved_search_matches`` (one row per saved search and
+note, refreshed on every re-match) for notification delivery.
+"""
+
+import threading
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from sqlalchemy import Text, cast, func, select, text
+from sqlalchemy.dialects.postgresql import aggregate_order_by, insert
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+from app.models import Note, SavedSearch, SavedSearchMatch, Tag, note_tags
+from app.schemas import SearchRequest, TagFilterMode
+from app.services.search import HAS_FEATURE_ALIASES, SearchQueryParser
+from app.utils.field_filters import FieldFilter
+from app.utils.note_features import FEATURE_FLAGS
+
+# Users whose compiled matchers are kept in memory
+MATCHER_CACHE_SIZE = 256
+
+# has: values that test the checkbox counts rather than feature_flags
+TODO_FEATURES = ("todo", "todos", "checkboxes")
+
+LEXEMES_SQL = text(
+    "SELECT s, tsvector_to_array(to_tsvector('english', s)) "
+    "FROM unnest(CAST(:strings AS text[])) AS s"
+)
+
+
+@dataclass(frozen=True)
+class NoteDocument:
+    """The parts of one note that saved searches can test."""
+
+    id: int
+    note_type: str
+    title_lexemes: FrozenSet[str]
+    content_lexemes: FrozenSet[str]
+    tags: FrozenSet[str]
+    created_at: datetime
+    updated_at: datetime
+    todo_done: int = 0
+    todo_open: int = 0
+    feature_flags: int = 0
+    content_structured: Any = None
+
+
+@dataclass
+class CompiledSearch:
+    """A saved search reduced to predicates over a NoteDocument."""
+
+    saved_search_id: int
+    # None means the branch is absent; an empty set (only stop words) never
+    # matches, like an empty tsquery
+    title_lexemes: Optional[FrozenSet[str]] = None
+    content_lexemes: Optional[FrozenSet[str]] = None
+    all_tags: FrozenSet[str] = frozenset()
+    any_tags: FrozenSet[str] = frozenset()
+    exclude_tags: FrozenSet[str] = frozenset()
+    note_type: Optional[str] = None
+    # (attribute, operator, bound) with operator ">=" or "<="
+    date_bounds: List[Tuple[str, str, datetime]] = field(default_factory=list)
+    required_flags: int = 0
+    require_todos: bool = False
+    todo_status: Optional[str] = None
+    field_filters: List[FieldFilter] = field(default_factory=list)
+
+    @property
+    def has_text(self) -> bool:
+        return self.title_lexemes is not None or self.content_lexemes is not None
+
+    def anchors(self) -> List[Tuple[str, str]]:
+        """
+        Index keys of which every matching note contains at least one.
+
+        With text conditions there is one key per ORed branch (its longest
+        lexeme, a cheap proxy for the rarest); otherwise a required tag. An
+        empty list means the search must be verified against every note.
+        """
+        if self.has_text:
+            keys = []
+            for kind, lexemes in (
+                ("title", self.title_lexemes),
+                ("content", self.content_lexemes),
+            ):
+                if lexemes:
+                    keys.append((kind, max(sorted(lexemes), key=len)))
+            return keys
+        if self.all_tags:
+            return [("tag", min(self.all_tags))]
+        return []
+
+    def matches(self, note: NoteDocument) -> bool:
+        """Return True when the note satisfies every condition of the search."""
+        if self.has_text:
+            title_hit = bool(self.title_lexemes) and self.title_lexemes.issubset(
+                note.title_lexemes
+            )
+            content_hit = bool(self.content_lexemes) and self.content_lexemes.issubset(
+                note.content_lexemes
+            )
+            if not (title_hit or content_hit):
+                return False
+
+        if self.note_type is not None and note.note_type != self.note_type:
+            return False
+        if not self.all_tags.issubset(note.tags):
+            return False
+        if self.any_tags and self.any_tags.isdisjoint(note.tags):
+            return False
+        if not self.exclude_tags.isdisjoint(note.tags):
+            return False
+
+        for attribute, operator, bound in self.date_bounds:
+            value = _aware(getattr(note, attribute))
+            if operator == ">=" and value < bound:
+                return False
+            if operator == "<=" and value > bound:
+                return False
+
+        if note.feature_flags & self.required_flags != self.required_flags:
+            return False
+        has_todos = note.todo_open > 0 or note.todo_done > 0
+        if self.require_todos and not has_todos:
+            return False
+        if self.todo_status == "complete" and not (
+            note.todo_done > 0 and note.todo_open == 0
+        ):
+            return False
+        if self.todo_status == "incomplete" and note.todo_open == 0:
+            return False
+
+        for field_filter in self.field_filters:
+            if not field_filter.matches(note.content_structured):
+                return False
+
+        return True
+
+
+def _aware(value: datetime) -> datetime:
+    """Treat naive datetimes as UTC so they compare with timestamptz values."""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def search_text_strings(request: SearchRequest, parsed: Dict) -> Dict[str, str]:
+    """The strings the live search passes to plainto_tsquery, by branch."""
+    strings = {}
+    if parsed["title_terms"]:
+        strings["title"] = " & ".join(parsed["title_terms"])
+    if not request.title_only:
+        content_parts = parsed["content_terms"] + parsed["quoted_phrases"]
+        if content_parts:
+            strings["content"] = " & ".join(content_parts)
+    return strings
+
+
+def compile_saved_search(
+    saved_search_id: int,
+    request: SearchRequest,
+    parsed: Dict,
+    lexemes: Dict[str, FrozenSet[str]],
+) -> CompiledSearch:
+    """
+    Compile one saved search.
+
+    ``lexemes`` maps each string from search_text_strings() to the lexemes
+    Postgres derives from it (see lexemes_for()).
+    """
+    strings = search_text_strings(request, parsed)
+    compiled = CompiledSearch(saved_search_id=saved_search_id)
+    if "title" in strings:
+        compiled.title_lexemes = lexemes[strings["title"]]
+    if "content" in strings:
+        compiled.content_lexemes = lexemes[strings["content"]]
+
+    all_tags = set(parsed["tags"])
+    exclude_tags = set(parsed["exclude_tags"])
+    if request.tags:
+        request_tags = {tag.lower() for tag in request.tags}
+        if request.tag_mode == TagFilterMode.AND:
+            all_tags |= request_tags
+        elif request.tag_mode == TagFilterMode.OR:
+            compiled.any_tags = frozenset(request_tags)
+    if request.exclude_tags:
+        exclude_tags |= {tag.lower() for tag in request.exclude_tags}
+    compiled.all_tags = frozenset(all_tags)
+    compiled.exclude_tags = frozenset(exclude_tags)
+
+    if request.note_type:
+        compiled.note_type = request.note_type.value
+
+    for attribute, filters in (
+        ("created_at", parsed["created_filters"]),
+        ("updated_at", parsed["updated_filters"]),
+    ):
+        if "after" in filters:
+            compiled.date_bounds.append((attribute, ">=", _aware(filters["after"])))
+        if "before" in filters:
+            compiled.date_bounds.append((attribute, "<=", _aware(filters["before"])))
+    for attribute, operator, bound in (
+        ("created_at", ">=", request.created_after),
+        ("created_at", "<=", request.created_before),
+        ("updated_at", ">=", request.updated_after),
+        ("updated_at", "<=", request.updated_before),
+    ):
+        if bound is not None:
+            compiled.date_bounds.append((attribute, operator, _aware(bound)))
+
+    # Unknown has: values are ignored, as in the live search
+    for feature in parsed["has_filters"]:
+        if feature in TODO_FEATURES:
+            compiled.require_todos = True
+            continue
+        flag = FEATURE_FLAGS.get(HAS_FEATURE_ALIASES.get(feature, feature))
+        if flag is not None:
+            compiled.required_flags |= flag
+    compiled.todo_status = parsed["todo_status"]
+    compiled.field_filters = list(parsed["field_filters"])
+
+    return compiled
+
+
+class Percolator:
+    """A user's compiled saved searches, indexed by anchor."""
+
+    def __init__(self, searches: Iterable[CompiledSearch]):
+        self.searches = list(searches)
+        # kind -> anchor value -> searches
+        self.anchored: Dict[str, Dict[str, List[CompiledSearch]]] = {
+            "title": defaultdict(list),
+            "content": defaultdict(list),
+            "tag": defaultdict(list),
+        }
+        self.unanchored: List[CompiledSearch] = []
+        for search in self.searches:
+            anchors = search.anchors()
+            if not anchors:
+                self.unanchored.append(search)
+            for kind, value in anchors:
+                self.anchored[kind][value].append(search)
+
+    def candidates(self, note: NoteDocument) -> List[CompiledSearch]:
+        """Searches worth verifying against the note, each listed once."""
+        found = {id(search): search for search in self.unanchored}
+        for kind, values in (
+            ("title", note.title_lexemes),
+            ("content", note.content_lexemes),
+            ("tag", note.tags),
+        ):
+            index = self.anchored[kind]
+            # Probe from whichever side is smaller
+            if len(values) <= len(index):
+                hits = (index[value] for value in values if value in index)
+            else:
+                hits = (searches for key, searches in index.items() if key in values)
+            for searches in hits:
+                for search in searches:
+                    found[id(search)] = search
+        return list(found.values())
+
+    def match(self, note: NoteDocument) -> List[int]:
+        """Ids of the saved searches the note matches, ascending."""
+        return sorted(
+            search.saved_search_id
+            for search in self.candidates(note)
+            if search.matches(note)
+        )
+
+
+def lexemes_for(db: Session, strings: Iterable[str]) -> Dict[str, FrozenSet[str]]:
+    """Map query strings to their english lexemes in one round trip."""
+    strings = sorted(set(strings))
+    if not strings:
+        return {}
+    rows = db.execute(LEXEMES_SQL, {"strings": strings}).all()
+    return {row[0]: frozenset(row[1] or ()) for row in rows}
+
+
+class PercolatorService:
+    """Match single notes against all of a user's saved searches."""
+
+    # user_id -> (signature, compiled on, Percolator)
+    _cache: "OrderedDict[int, Tuple[str, date, Percolator]]" = OrderedDict()
+    _cache_lock = threading.Lock()
+
+    def __init__(self, db: Session, user_id: int):
+        self.db = db
+        self.user_id = user_id
+
+    def percolate(self, note_id: int) -> List[int]:
+        """
+        Record and return the saved searches that the note now matches.
+
+        Re-matches refresh ``matched_at``; a note that stops matching keeps
+        its earlier rows. Commits.
+        """
+        percolator = self.get_percolator()
+        if not percolator.searches:
+            return []
+        note = self.load_note(note_id)
+        if note is None:
+            return []
+
+        matched = percolator.match(note)
+        if matched:
+            stmt = insert(SavedSearchMatch).values(
+                [
+                    {"saved_search_id": saved_search_id, "note_id": note_id}
+                    for saved_search_id in matched
+                ]
+            )
+            self.db.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=["saved_search_id", "note_id"],
+                    set_={"matched_at": func.now()},
+                )
+            )
+            self.db.commit()
+        return matched
+
+    def get_percolator(self) -> Percolator:
+        """The user's compiled matcher, recompiled when a saved search changed."""
+        signature = self._signature()
+        today = date.today()
+        with self._cache_lock:
+            cached = self._cache.get(self.user_id)
+            if cached and cached[0] == signature and cached[1] == today:
+                self._cache.move_to_end(self.user_id)
+                return cached[2]
+
+        percolator = self.compile()
+        with self._cache_lock:
+            self._cache[self.user_id] = (signature, today, percolator)
+            self._cache.move_to_end(self.user_id)
+            while len(self._cache) > MATCHER_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return percolator
+
+    def compile(self) -> Percolator:
+        """Compile every saved search of the user."""
+        saved_searches = (
+            self.db.query(SavedSearch.id, SavedSearch.search_query)
+            .filter(SavedSearch.user_id == self.user_id)
+            .order_by(SavedSearch.id)
+            .all()
+        )
+
+        parsed_searches = []
+        parse_cache: Dict[str, Dict] = {}
+        for saved_search_id, search_query in saved_searches:
+            request = SearchRequest(**search_query)
+            parsed = parse_cache.get(request.query)
+            if parsed is None:
+                parsed = parse_cache[request.query] = SearchQueryParser(
+                    request.query
+                ).parse()
+            parsed_searches.append((saved_search_id, request, parsed))
+
+        lexemes = lexemes_for(
+            self.db,
+            (
+                string
+                for _, request, parsed in parsed_searches
+                for string in search_text_strings(request, parsed).values()
+            ),
+        )
+        return Percolator(
+            compile_saved_search(saved_search_id, request, parsed, lexemes)
+            for saved_search_id, request, parsed in parsed_searches
+        )
+
+    def load_note(self, note_id: int) -> Optional[NoteDocument]:
+        """Load the matchable parts of a note, or None if it is gone."""
+        tag_names = (
+            select(Tag.name)
+            .join(note_tags, note_tags.c.tag_id == Tag.id)
+            .where(note_tags.c.note_id == Note.id)
+            .scalar_subquery()
+        )
+        row = (
+            self.db.query(
+                Note.note_type,
+                Note.created_at,
+                Note.updated_at,
+                Note.todo_done,
+                Note.todo_open,
+                Note.feature_flags,
+                func.tsvector_to_array(Note.title_tsv),
+                func.tsvector_to_array(Note.content_tsv),
+                func.array(tag_names),
+                Note.content_structured,
+            )
+            .filter(Note.id == note_id, Note.user_id == self.user_id)
+            .first()
+        )
+        if row is None:
+            return None
+        return NoteDocument(
+            id=note_id,
+            note_type=row[0].value,
+            created_at=row[1],
+            updated_at=row[2] or row[1],
+            todo_done=row[3],
+            todo_open=row[4],
+            feature_flags=row[5],
+            title_lexemes=frozenset(row[6] or ()),
+            content_lexemes=frozenset(row[7] or ()),
+            tags=frozenset(row[8] or ()),
+            content_structured=row[9],
+        )
+
+    def _signature(self) -> str:
+        """Digest of the user's saved search definitions, computed in SQL."""
+        entry = func.concat(SavedSearch.id, ":", cast(SavedSearch.search_query, Text))
+        return (
+            self.db.query(
+                func.coalesce(
+                    func.md5(
+                        func.string_agg(entry, aggregate_order_by(",", SavedSearch.id))
+                    ),
+                    "",
+                )
+            )
+            .filter(SavedSearch.user_id == self.user_id)
+            .scalar()
+        )
+
+
+def percolate_note(user_id: int, note_id: int) -> None:
+    """Background task: match a saved note against the user's saved searches."""
+    db = SessionLocal()
+    try:
+        PercolatorService(db, user_id).percolate(note_id)
+    except Exception as e:
+        print(f"Error percolating note {note_id}: {e}")
+        db.rollback()
+    finally:
+        db.close()
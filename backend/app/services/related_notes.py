@@ -0,0 +1,397 @@
+"""
+Related notes from TF-IDF cosine similarity.
+
+Each user's notes are kept in process memory as sparse TF-IDF vectors over the
+text that feeds ``title_tsv``/``content_tsv``: the title (counted twice) and
+the body, tokenized as by the BM25 backend. ``related()`` scores every other
+note against one note's vector with NumPy and returns the top-k cosine
+neighbours, so no similarity is computed in SQL.
+
+Rows live in two parts:
+
+- a compacted matrix stored by term (CSC layout: ``indptr``, ``rows``,
+  ``weights``), of which only the query note's term columns are read;
+- a delta of rows written since the last compaction, scored by looking their
+  terms up in a dense copy of the query vector.
+
+A write appends a delta row and marks the note's old row dead. Compaction
+folds the delta in, drops dead rows and recomputes row norms with the current
+document frequencies; until then, older rows keep the norms of their last
+compaction.
+
+Matrices are snapshotted with ``numpy.savez`` to ``settings.related_notes_snapshot_dir``
+on shutdown and reloaded on first use when no note changed since. Like the
+BM25 backend, the engine is per process.
+"""
+
+import json
+import math
+import os
+import threading
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session, load_only
+
+from app.core.config import settings
+from app.models import Note
+from app.services.search_backend import note_body_text, tokenize
+
+# Title terms count this many times a body occurrence
+TITLE_BOOST = 2
+
+SNAPSHOT_FORMAT = 1
+
+
+def _ensure_capacity(values: np.ndarray, size: int) -> np.ndarray:
+    """Return ``values``, or a zero-padded copy with room for ``size`` items."""
+    if size <= len(values):
+        return values
+    grown = np.zeros(max(size, 2 * len(values), 1024), dtype=values.dtype)
+    grown[: len(values)] = values
+    return grown
+
+
+class TfidfMatrix:
+    """Sparse TF-IDF vectors of one user's notes with cosine top-k queries."""
+
+    # Compact once this many rows were written since the last compaction...
+    MAX_DELTA_ROWS = 1000
+    # ...or this share of the rows is dead
+    MAX_DEAD_RATIO = 0.25
+
+    def __init__(self):
+        self.vocabulary: Dict[str, int] = {}
+        self.df = np.zeros(0, dtype=np.int32)
+
+        # Per row, live or dead, in insertion order
+        self.row_note_ids = np.zeros(0, dtype=np.int64)
+        self.row_live = np.zeros(0, dtype=bool)
+        self.norms = np.zeros(0, dtype=np.float32)
+        self.row_terms: List[np.ndarray] = []
+        self.row_weights: List[np.ndarray] = []
+        self.note_to_row: Dict[int, int] = {}
+        self.live_count = 0
+
+        # Rows [0, compacted_rows) are also stored by term
+        self.compacted_rows = 0
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.rows = np.zeros(0, dtype=np.int32)
+        self.weights = np.zeros(0, dtype=np.float32)
+
+    def __len__(self) -> int:
+        return self.live_count
+
+    @property
+    def row_count(self) -> int:
+        return len(self.row_terms)
+
+    def add(self, note_id: int, title: str, body: str) -> None:
+        """Add or replace a note's vector."""
+        self.remove(note_id)
+
+        counts = Counter(tokenize(body or ""))
+        for term, tf in Counter(tokenize(title or "")).items():
+            counts[term] += TITLE_BOOST * tf
+
+        term_ids = np.fromiter(
+            (self._term_id(term) for term in counts), dtype=np.int32, count=len(counts)
+        )
+        weights = 1 + np.log(
+            np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+        )
+        order = np.argsort(term_ids)
+        term_ids, weights = term_ids[order], weights[order]
+
+        self.df[term_ids] += 1
+        self.live_count += 1
+
+        row = self.row_count
+        self.row_note_ids = _ensure_capacity(self.row_note_ids, row + 1)
+        self.row_live = _ensure_capacity(self.row_live, row + 1)
+        self.norms = _ensure_capacity(self.norms, row + 1)
+        self.row_note_ids[row] = note_id
+        self.row_live[row] = True
+        self.norms[row] = np.linalg.norm(weights * self._idf(term_ids))
+        self.row_terms.append(term_ids)
+        self.row_weights.append(weights)
+        self.note_to_row[note_id] = row
+
+    def remove(self, note_id: int) -> None:
+        """Mark a note's row dead; it is dropped on compaction."""
+        row = self.note_to_row.pop(note_id, None)
+        if row is None:
+            return
+        self.row_live[row] = False
+        self.df[self.row_terms[row]] -= 1
+        self.live_count -= 1
+
+    def needs_compaction(self) -> bool:
+        dead = self.row_count - self.live_count
+        return (
+            self.row_count - self.compacted_rows >= self.MAX_DELTA_ROWS
+            or dead > self.MAX_DEAD_RATIO * self.row_count
+        )
+
+    def compact(self) -> None:
+        """Rebuild the by-term matrix from the live rows and refresh norms."""
+        live_rows = np.flatnonzero(self.row_live[: self.row_count])
+        self.row_terms = [self.row_terms[row] for row in live_rows]
+        self.row_weights = [self.row_weights[row] for row in live_rows]
+        self.row_note_ids = self.row_note_ids[live_rows]
+        self.row_live = np.ones(len(live_rows), dtype=bool)
+        self.note_to_row = {
+            int(note_id): row for row, note_id in enumerate(self.row_note_ids)
+        }
+
+        n_rows, n_terms = len(live_rows), len(self.vocabulary)
+        lengths = np.fromiter(
+            (len(terms) for terms in self.row_terms), dtype=np.int64, count=n_rows
+        )
+        cols = self._concat(self.row_terms, np.int32)
+        weights = self._concat(self.row_weights, np.float32)
+        row_ids = np.repeat(np.arange(n_rows, dtype=np.int32), lengths)
+
+        order = np.argsort(cols, kind="stable")
+        self.rows = row_ids[order]
+        self.weights = weights[order]
+        self.indptr = np.zeros(n_terms + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cols, minlength=n_terms), out=self.indptr[1:])
+
+        idf = self._idf()
+        self.norms = np.sqrt(
+            np.bincount(row_ids, weights=(weights * idf[cols]) ** 2, minlength=n_rows)
+        ).astype(np.float32)
+        self.compacted_rows = n_rows
+
+    def related(self, note_id: int, limit: int = 5) -> List[Tuple[int, float]]:
+        """Return up to ``limit`` ``(note_id, cosine)`` neighbours, best first."""
+        row = self.note_to_row.get(note_id)
+        if row is None:
+            return []
+
+        idf = self._idf()
+        q_terms = self.row_terms[row]
+        q_weights = self.row_weights[row] * idf[q_terms]
+        q_norm = np.linalg.norm(q_weights)
+        if not q_norm:
+            return []
+        # Both sides carry idf, so each matching term contributes w_q * w_d * idf^2
+        q_scaled = q_weights * idf[q_terms]
+
+        n_rows = self.row_count
+        scores = np.zeros(n_rows)
+        if self.compacted_rows:
+            scores[: self.compacted_rows] = self._score_compacted(q_terms, q_scaled)
+        if n_rows > self.compacted_rows:
+            scores[self.compacted_rows :] = self._score_delta(q_terms, q_scaled)
+
+        norms = self.norms[:n_rows]
+        np.divide(scores, norms * q_norm, out=scores, where=norms > 0)
+        scores[~self.row_live[:n_rows]] = 0
+        scores[row] = 0
+
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > limit:
+            top = np.argpartition(scores[candidates], -limit)[-limit:]
+            candidates = candidates[top]
+        best = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(int(self.row_note_ids[r]), float(min(scores[r], 1.0))) for r in best]
+
+    def _score_compacted(self, q_terms: np.ndarray, q_scaled: np.ndarray):
+        """Dot products with the compacted rows, reading only the query's columns."""
+        known = q_terms < len(self.indptr) - 1
+        terms, values = q_terms[known], q_scaled[known]
+        starts, ends = self.indptr[terms], self.indptr[terms + 1]
+        lengths = ends - starts
+        total = int(lengths.sum())
+        if not total:
+            return 0
+
+        # Positions of every entry in the selected columns, without a Python loop
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        positions = offsets + np.arange(total)
+        contributions = self.weights[positions] * np.repeat(values, lengths)
+        return np.bincount(
+            self.rows[positions], weights=contributions, minlength=self.compacted_rows
+        )
+
+    def _score_delta(self, q_terms: np.ndarray, q_scaled: np.ndarray):
+        """Dot products with the rows written since the last compaction."""
+        dense = np.zeros(len(self.vocabulary))
+        dense[q_terms] = q_scaled
+        delta_terms = self.row_terms[self.compacted_rows :]
+        lengths = [len(terms) for terms in delta_terms]
+        row_ids = np.repeat(np.arange(len(delta_terms)), lengths)
+        terms = self._concat(delta_terms, np.int32)
+        weights = self._concat(self.row_weights[self.compacted_rows :], np.float32)
+        return np.bincount(
+            row_ids, weights=weights * dense[terms], minlength=len(delta_terms)
+        )
+
+    def _idf(self, term_ids: Optional[np.ndarray] = None) -> np.ndarray:
+        """Smoothed inverse document frequency of the given or of every term."""
+        df = self.df[: len(self.vocabulary)] if term_ids is None else self.df[term_ids]
+        return np.log((1 + self.live_count) / (1 + df.astype(np.float64))) + 1
+
+    def _term_id(self, term: str) -> int:
+        term_id = self.vocabulary.get(term)
+        if term_id is None:
+            term_id = self.vocabulary[term] = len(self.vocabulary)
+            self.df = _ensure_capacity(self.df, term_id + 1)
+        return term_id
+
+    @staticmethod
+    def _concat(arrays: List[np.ndarray], dtype) -> np.ndarray:
+        return np.concatenate(arrays) if arrays else np.zeros(0, dtype=dtype)
+
+    def save(self, path: str) -> None:
+        """Write a compacted snapshot of the matrix to ``path``."""
+        if self.row_count != self.compacted_rows or self.live_count != self.row_count:
+            self.compact()
+
+        terms = sorted(self.vocabulary, key=self.vocabulary.get)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as fh:
+            np.savez(
+                fh,
+                format=np.array(SNAPSHOT_FORMAT),
+                vocabulary=np.frombuffer(json.dumps(terms).encode("utf-8"), np.uint8),
+                df=self.df[: len(terms)],
+                note_ids=self.row_note_ids,
+                indptr=self.indptr,
+                rows=self.rows,
+                weights=self.weights,
+                norms=self.norms,
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "TfidfMatrix":
+        """Read a snapshot written by ``save``."""
+        matrix = cls()
+        with np.load(path) as data:
+            if int(data["format"]) != SNAPSHOT_FORMAT:
+                raise ValueError(f"Unsupported related notes snapshot: {path}")
+            terms = json.loads(data["vocabulary"].tobytes().decode("utf-8"))
+            matrix.vocabulary = {term: i for i, term in enumerate(terms)}
+            matrix.df = data["df"].astype(np.int32)
+            matrix.row_note_ids = data["note_ids"].astype(np.int64)
+            matrix.indptr = data["indptr"]
+            matrix.rows = data["rows"]
+            matrix.weights = data["weights"]
+            matrix.norms = data["norms"]
+
+        n_rows = len(matrix.row_note_ids)
+        # Recover the per-row vectors; a stable sort keeps terms ascending
+        cols = np.repeat(np.arange(len(terms), dtype=np.int32), np.diff(matrix.indptr))
+        order = np.argsort(matrix.rows, kind="stable")
+        bounds = np.cumsum(np.bincount(matrix.rows, minlength=n_rows))[:-1]
+        matrix.row_terms = np.split(cols[order], bounds)
+        matrix.row_weights = np.split(matrix.weights[order], bounds)
+
+        matrix.row_live = np.ones(n_rows, dtype=bool)
+        matrix.note_to_row = {
+            int(note_id): row for row, note_id in enumerate(matrix.row_note_ids)
+        }
+        matrix.live_count = matrix.compacted_rows = n_rows
+        return matrix
+
+
+class RelatedNotesEngine:
+    """Per-user ``TfidfMatrix`` instances, built lazily and kept current."""
+
+    def __init__(self, snapshot_dir: Optional[str] = None):
+        self.snapshot_dir = snapshot_dir
+        self._matrices: Dict[int, TfidfMatrix] = {}
+        self._lock = threading.RLock()
+
+    def index(self, note: Note) -> None:
+        with self._lock:
+            matrix = self._matrices.get(note.user_id)
+            # Users not loaded yet are built from the database on first query
+            if matrix is not None:
+                matrix.add(note.id, note.title, note_body_text(note))
+                if matrix.needs_compaction():
+                    matrix.compact()
+
+    def delete(self, user_id: int, note_id: int) -> None:
+        with self._lock:
+            matrix = self._matrices.get(user_id)
+            if matrix is not None:
+                matrix.remove(note_id)
+
+    def related(
+        self, db: Session, user_id: int, note_id: int, limit: int = 5
+    ) -> List[Tuple[int, float]]:
+        """Return the ``limit`` notes most similar to ``note_id``, best first."""
+        matrix = self._get_matrix(db, user_id)
+        with self._lock:
+            return matrix.related(note_id, limit)
+
+    def save(self) -> None:
+        """Snapshot every loaded user matrix to ``snapshot_dir``."""
+        if not self.snapshot_dir:
+            return
+
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        with self._lock:
+            for user_id, matrix in self._matrices.items():
+                matrix.save(self._snapshot_path(user_id))
+
+    def _snapshot_path(self, user_id: int) -> str:
+        return os.path.join(self.snapshot_dir, f"user_{user_id}.related.npz")
+
+    def _get_matrix(self, db: Session, user_id: int) -> TfidfMatrix:
+        with self._lock:
+            matrix = self._matrices.get(user_id)
+            if matrix is None:
+                matrix = self._load_or_build(db, user_id)
+                self._matrices[user_id] = matrix
+            return matrix
+
+    def _load_or_build(self, db: Session, user_id: int) -> TfidfMatrix:
+        note_count, latest = (
+            db.query(func.count(Note.id), func.max(Note.updated_at))
+            .filter(Note.user_id == user_id)
+            .one()
+        )
+
+        if self.snapshot_dir:
+            path = self._snapshot_path(user_id)
+            if os.path.exists(path):
+                snapshot = TfidfMatrix.load(path)
+                # Notes written while the process was down invalidate the snapshot
+                if len(snapshot) == note_count and (
+                    latest is None or latest.timestamp() <= os.path.getmtime(path)
+                ):
+                    return snapshot
+
+        matrix = TfidfMatrix()
+        notes = (
+            db.query(Note)
+            .options(
+                load_only(
+                    Note.id, Note.title, Note.content_text, Note.content_structured
+                )
+            )
+            .filter(Note.user_id == user_id)
+            .yield_per(1000)
+        )
+        for note in notes:
+            matrix.add(note.id, note.title, note_body_text(note))
+        matrix.compact()
+        return matrix
+
+
+_engine: Optional[RelatedNotesEngine] = None
+
+
+def get_related_notes_engine() -> RelatedNotesEngine:
+    """Return the process-wide related notes engine."""
+    global _engine
+    if _engine is None:
+        _engine = RelatedNotesEngine(settings.related_notes_snapshot_dir or None)
+    return _engine
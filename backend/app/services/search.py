@@ -11,27 +11,76 @@ This module provides comprehensive search functionality including:
 """
 
 import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Tuple
-
-from sqlalchemy import and_, case, desc, func, literal_column, not_, or_, text
-from sqlalchemy.orm import Session, joinedload
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import (
+    String,
+    and_,
+    case,
+    cast,
+    desc,
+    false,
+    func,
+    literal_column,
+    not_,
+    null,
+    or_,
+    select,
+    text,
+)
+from sqlalchemy.dialects.postgresql import JSONB, JSONPATH, aggregate_order_by
+from sqlalchemy.orm import Session, load_only, selectinload
 
-from app.models import Note, SearchAnalytics, Tag
+from app.models import Folder, Note, NoteSection, Tag, note_tags
 from app.schemas import (
+    FacetBucket,
+    FacetCounts,
     NoteType,
+    SearchFacet,
     SearchRequest,
     SearchResultItem,
     SearchSortBy,
     TagFilterMode,
 )
+from app.services.analytics import search_analytics_buffer
+from app.services.search_backend import (
+    SearchBackend,
+    get_search_backend,
+    snippet_window,
+)
+from app.services.search_cancellation import SearchCancellation
+from app.services.search_profiler import SearchProfile, slow_search_log
+from app.services.spelling import SpellingService
 from app.utils.date_parser import NaturalDateParser
+from app.utils.field_filters import EQUALS, FieldFilter
+from app.utils.note_features import FEATURE_FLAGS
+
+# Rank used when the query has no text terms (filters only)
+CONSTANT_RANK = literal_column("1.0")
+
+# has: spellings accepted in addition to the FEATURE_FLAGS names
+HAS_FEATURE_ALIASES = {
+    "link": "links",
+    "image": "images",
+    # Notes have no separate attachments; embedded images are the only files
+    "attachments": "images",
+    "table": "tables",
+}
 
 
 class SearchQueryParser:
     """Parse search queries with advanced operators."""
 
     # Regex patterns for search operators
+    FIELD_PATTERN = (
+        r'(?:^|\s)(field:((?:"[^"]+"|\w+)(?:\.(?:"[^"]+"|\w+))*)'
+        r'(?:([=~])("[^"]*"|[^\s"]+))?)'
+    )
     INTITLE_PATTERN = r'intitle:(\w+|"[^"]+")'
     TAG_PATTERN = r"(?:^|\s)(tag:(\w+))"
     EXCLUDE_TAG_PATTERN = r"(?:^|\s)(-tag:(\w+))"
@@ -54,11 +103,19 @@ class SearchQueryParser:
         self.todo_status: Optional[str] = None
         self.quoted_phrases: List[str] = []
         self.near_queries: List[Tuple[str, int, str]] = []
+        self.field_filters: List[FieldFilter] = []
         self.remaining_query = query
 
     def parse(self) -> Dict[str, Any]:
         """Parse the search query and extract all operators."""
 
+        # Extract field: filters first, their values may look like other operators
+        for match in re.finditer(self.FIELD_PATTERN, self.remaining_query):
+            self.field_filters.append(
+                FieldFilter.parse(match.group(2), match.group(3), match.group(4))
+            )
+            self.remaining_query = self.remaining_query.replace(match.group(0), " ", 1)
+
         # Extract intitle: terms
         for match in re.finditer(
             self.INTITLE_PATTERN, self.remaining_query, re.IGNORECASE
@@ -176,33 +233,298 @@ class SearchQueryParser:
             "todo_status": self.todo_status,
             "quoted_phrases": self.quoted_phrases,
             "near_queries": self.near_queries,
+            "field_filters": self.field_filters,
         }
 
 
+@dataclass
+class BatchSearchOutcome:
+    """Result of one search in SearchService.search_batch()."""
+
+    results: List[SearchResultItem]
+    total: int
+    facets: Optional[Dict[str, FacetCounts]]
+    execution_time_ms: float
+    error: Optional[str] = None
+
+
+@dataclass
+class SectionHit:
+    """The best matching section of a structured note in a search result."""
+
+    path: List[str]
+    body: str
+
+
+# Most hits taken from an in-process backend before SQL filters are applied
+MAX_BACKEND_CANDIDATES = 1000
+
+# Rows fetched per round trip, and hydrated together, when streaming a search
+STREAM_BATCH_SIZE = 500
+
+
 class SearchService:
     """Service for performing advanced searches on notes."""
 
-    def __init__(self, db: Session, user_id: int):
+    def __init__(
+        self,
+        db: Session,
+        user_id: int,
+        backend: Optional[SearchBackend] = None,
+        parse_cache: Optional[Dict[str, Dict]] = None,
+        cancellation: Optional[SearchCancellation] = None,
+        profile: Optional[SearchProfile] = None,
+    ):
         self.db = db
         self.user_id = user_id
-
-    def search(self, request: SearchRequest) -> Tuple[List[SearchResultItem], int]:
+        self.backend = backend or get_search_backend()
+        # Parsed queries by query string; shared by the services of a batch
+        self.parse_cache = parse_cache if parse_cache is not None else {}
+        # Set by search endpoints that cancel abandoned searches
+        self.cancellation = cancellation
+        # Set by the profiler endpoint to capture phases and statements
+        self.profile = profile
+
+    def parse_query(self, query: str) -> Dict:
+        """Parse a search query, reusing an earlier parse of the same string."""
+        parsed = self.parse_cache.get(query)
+        if parsed is None:
+            parsed = self.parse_cache[query] = SearchQueryParser(query).parse()
+        return parsed
+
+    def search(
+        self, request: SearchRequest
+    ) -> Tuple[List[SearchResultItem], int, Optional[Dict[str, FacetCounts]]]:
         """
         Perform advanced search with filters and ranking.
 
-        Returns: (results, total_count)
+        Returns: (results, total_count, facets); facets is None unless
+        ``request.facets`` asks for them
+
+        Phase timings go to ``self.profile`` when set; slow searches are
+        sampled into the slow search log either way.
         """
+        profile = self.profile if self.profile is not None else SearchProfile()
+
         # Parse the search query
-        parser = SearchQueryParser(request.query)
-        parsed = parser.parse()
+        with profile.phase("parse"):
+            parsed = self.parse_query(request.query)
+
+        # Phase 1: rank matching ids only, with the total folded in
+        with profile.phase("rank"):
+            query, rank_score = self._build_ranked_query(request, parsed)
+
+            # Apply pagination
+            offset = (request.page - 1) * request.per_page
+            page_query = query.offset(offset).limit(request.per_page)
+            profile.capture("page", page_query)
+            rows = page_query.all()
+
+            if not rows and offset > 0:
+                # Page past the end: re-read the window columns from the first row
+                count_query = query.limit(1)
+                profile.capture("count", count_query)
+                first = count_query.first()
+                summary = first if first is not None else None
+            else:
+                summary = rows[0] if rows else None
 
-        # Start with base query
-        query = (
-            self.db.query(Note)
-            .options(joinedload(Note.tags))
-            .filter(Note.user_id == self.user_id)
+            total = summary.total if summary is not None else 0
+            facets = None
+            if request.facets:
+                facets = self._parse_facets(
+                    summary.facets if summary is not None else None, request
+                )
+
+        # Phase 2: hydrate only the ids on this page
+        with profile.phase("hydrate"):
+            notes = self._hydrate_notes([row.id for row in rows])
+
+        # Convert to search result items with snippets
+        with profile.phase("snippets"):
+            sections = self._best_sections(notes, parsed, request.title_only)
+            results = []
+            for note in notes:
+                result = self._create_search_result(
+                    note, parsed, rank_score, request.query, sections.get(note.id)
+                )
+                results.append(result)
+
+        # Track search analytics (async-style, don't block on errors)
+        with profile.phase("analytics"):
+            try:
+                self._track_search_analytics(request.query, total)
+            except Exception as e:
+                # Log error but don't fail the search
+                print(f"Error tracking search analytics: {e}")
+
+        if self.cancellation is None or not self.cancellation.cancelled:
+            slow_search_log.record(self.user_id, request, profile)
+
+        return results, total, facets
+
+    def search_batch(
+        self,
+        requests: List[SearchRequest],
+        session_factory: Optional[Callable[[], Session]] = None,
+        max_workers: int = 1,
+    ) -> List[BatchSearchOutcome]:
+        """
+        Run several searches, returning outcomes in request order.
+
+        Searches run one after another on this service's session unless a
+        ``session_factory`` is given, in which case they are spread over up to
+        ``max_workers`` threads, each with its own session. Parsed queries are
+        shared either way. A failing search is reported in its outcome rather
+        than aborting the batch. Once the batch is cancelled, the remaining
+        searches are skipped and worker sessions have their statements
+        cancelled too.
+        """
+        if session_factory is None or max_workers <= 1 or len(requests) <= 1:
+            return [self._timed_search(request) for request in requests]
+
+        workers = min(max_workers, len(requests))
+        outcomes: List[Optional[BatchSearchOutcome]] = [None] * len(requests)
+
+        def run_slice(worker: int) -> None:
+            db = session_factory()
+            try:
+                service = type(self)(
+                    db,
+                    self.user_id,
+                    self.backend,
+                    parse_cache=self.parse_cache,
+                    cancellation=self.cancellation,
+                )
+                tracked = self.cancellation.track(db) if self.cancellation else None
+                with tracked or nullcontext():
+                    for index in range(worker, len(requests), workers):
+                        outcomes[index] = service._timed_search(requests[index])
+            finally:
+                db.close()
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # list() re-raises anything that escaped a worker
+            list(executor.map(run_slice, range(workers)))
+
+        return outcomes
+
+    def stream(
+        self,
+        request: SearchRequest,
+        limit: Optional[int] = None,
+        batch_size: int = STREAM_BATCH_SIZE,
+    ) -> Iterator[SearchResultItem]:
+        """
+        Yield every matching note as a result item, in rank order.
+
+        Paging and facets are ignored. Each batch of ids from the server-side
+        cursor is hydrated on its own, so memory stays flat however many
+        notes match. Streams are not recorded in search analytics.
+        """
+        parsed = self.parse_query(request.query)
+        batches = self._stream_batches(request, parsed, limit, batch_size)
+        for rows, rank_score in batches:
+            notes = self._hydrate_notes([row.id for row in rows])
+            sections = self._best_sections(notes, parsed, request.title_only)
+            for note in notes:
+                yield self._create_search_result(
+                    note, parsed, rank_score, request.query, sections.get(note.id)
+                )
+
+    def stream_ids(
+        self,
+        request: SearchRequest,
+        limit: Optional[int] = None,
+        batch_size: int = STREAM_BATCH_SIZE,
+    ) -> Iterator[Tuple[int, float]]:
+        """Yield ``(note_id, rank)`` for every matching note, in rank order."""
+        parsed = self.parse_query(request.query)
+        for rows, _ in self._stream_batches(request, parsed, limit, batch_size):
+            for row in rows:
+                yield row.id, float(row.rank)
+
+    def suggest(self, request: SearchRequest) -> List[str]:
+        """
+        Return "did you mean" rewrites of the query's misspelled words.
+
+        Callers ask only when a search found few results (see
+        ``settings.search_suggestion_max_results``).
+        """
+        return SpellingService(self.db, self.user_id).suggest(
+            request.query, self.parse_query(request.query)
+        )
+
+    def _stream_batches(
+        self,
+        request: SearchRequest,
+        parsed: Dict,
+        limit: Optional[int],
+        batch_size: int,
+    ):
+        """Yield ``(rows, rank_score)`` batches read through a server-side cursor."""
+        query, rank_score = self._build_stream_query(request, parsed, limit)
+        result = self.db.execute(
+            query.statement.execution_options(yield_per=batch_size)
+        )
+        try:
+            for rows in result.partitions():
+                yield rows, rank_score
+        finally:
+            result.close()
+
+    def _build_stream_query(
+        self, request: SearchRequest, parsed: Dict, limit: Optional[int]
+    ):
+        """
+        Build the ranked ``(id, rank)`` query of a stream.
+
+        Unlike a page query it carries no windowed total, so Postgres can hand
+        out rows as soon as the sort is done.
+        """
+        query, rank_score = self._build_ranked_query(
+            request.model_copy(update={"facets": None}), parsed
+        )
+        query = query.with_entities(Note.id, rank_score.label("rank"))
+        if limit is not None:
+            query = query.limit(limit)
+        return query, rank_score
+
+    def _timed_search(self, request: SearchRequest) -> BatchSearchOutcome:
+        """Run one search of a batch, capturing its timing and any error."""
+        start = time.perf_counter()
+        if self.cancellation is not None and self.cancellation.cancelled:
+            return BatchSearchOutcome(
+                results=[],
+                total=0,
+                facets=None,
+                execution_time_ms=0.0,
+                error="Search cancelled",
+            )
+        try:
+            results, total, facets = self.search(request)
+            error = None
+        except Exception as e:
+            self.db.rollback()
+            results, total, facets, error = [], 0, None, str(e)
+        return BatchSearchOutcome(
+            results=results,
+            total=total,
+            facets=facets,
+            execution_time_ms=(time.perf_counter() - start) * 1000,
+            error=error,
         )
 
+    def _build_ranked_query(self, request: SearchRequest, parsed: Dict):
+        """
+        Build the phase-one query selecting ``(id, rank, total)`` rows.
+
+        Tags are not joined here so Postgres never materializes tag rows for
+        notes that fall outside the requested page. When facets are requested
+        the rows also carry a ``facets`` column (see _build_faceted_query).
+        """
+        query = self.db.query(Note.id).filter(Note.user_id == self.user_id)
+
         # Apply full-text search
         query, rank_score = self._apply_fulltext_search(
             query, parsed, request.title_only
@@ -214,36 +536,183 @@ class SearchService:
         # Apply filters from request object
         query = self._apply_request_filters(query, request)
 
-        # Get total count before pagination
-        total = query.count()
+        if request.facets:
+            return self._build_faceted_query(query, rank_score, request)
+
+        # Fold the total into the ranked query instead of a separate count()
+        query = query.add_columns(
+            rank_score.label("rank"), func.count().over().label("total")
+        )
 
         # Apply sorting
         query = self._apply_sorting(query, request.sort_by, rank_score)
 
-        # Apply pagination
-        offset = (request.page - 1) * request.per_page
-        notes = query.offset(offset).limit(request.per_page).all()
+        return query, rank_score
 
-        # Convert to search result items with snippets
-        results = []
-        for note in notes:
-            result = self._create_search_result(note, parsed, rank_score, request.query)
-            results.append(result)
+    def _build_faceted_query(self, query, rank_score, request: SearchRequest):
+        """
+        Rank and facet the matching set in one statement.
 
-        # Track search analytics (async-style, don't block on errors)
-        try:
-            self._track_search_analytics(request.query, total)
-        except Exception as e:
-            # Log error but don't fail the search
-            print(f"Error tracking search analytics: {e}")
+        The filtered notes become a ``matches`` CTE. The page is read from it
+        and each facet is an uncorrelated scalar subquery over it, which
+        Postgres evaluates once per statement rather than once per row.
+        """
+        matches = query.add_columns(
+            rank_score.label("rank"),
+            Note.title,
+            Note.note_type,
+            Note.folder_id,
+            Note.created_at,
+            Note.updated_at,
+        ).cte("matches")
+
+        facets = func.jsonb_build_object(
+            *(
+                part
+                for facet in dict.fromkeys(request.facets)
+                for part in (
+                    facet.value,
+                    self._facet_buckets(matches, facet, request.facet_limit + 1),
+                )
+            )
+        )
+
+        page = self.db.query(
+            matches.c.id,
+            matches.c.rank,
+            func.count().over().label("total"),
+            facets.label("facets"),
+        )
+        page_rank = rank_score if rank_score is CONSTANT_RANK else matches.c.rank
+        page = self._apply_sorting(
+            page, request.sort_by, page_rank, sort_columns=matches.c
+        )
+
+        return page, page_rank
+
+    @staticmethod
+    def _facet_buckets(matches, facet: SearchFacet, limit: int):
+        """Return a scalar subquery aggregating one facet to a jsonb array."""
+        label = cast(null(), String)
+        source = matches
+
+        if facet == SearchFacet.TAGS:
+            # Count by tag id; names are joined for the kept buckets only
+            value = note_tags.c.tag_id
+            source = matches.join(note_tags, note_tags.c.note_id == matches.c.id)
+        elif facet == SearchFacet.FOLDER:
+            value = cast(matches.c.folder_id, String)
+            label = Folder.name
+            source = matches.outerjoin(Folder, Folder.id == matches.c.folder_id)
+        elif facet == SearchFacet.NOTE_TYPE:
+            value = func.lower(cast(matches.c.note_type, String))
+        else:
+            column = (
+                matches.c.created_at
+                if facet == SearchFacet.CREATED
+                else matches.c.updated_at
+            )
+            value = func.to_char(func.date_trunc("month", column), "YYYY-MM")
+
+        buckets = (
+            select(
+                value.label("value"),
+                func.count().label("count"),
+                label.label("label"),
+            )
+            .select_from(source)
+            .group_by(value, label)
+        )
+
+        # Date buckets keep the most recent months, others the largest counts
+        if facet in (SearchFacet.CREATED, SearchFacet.UPDATED):
+            buckets = buckets.order_by(desc("value"))
+        else:
+            buckets = buckets.order_by(desc("count"), "value")
+        buckets = buckets.limit(limit).subquery()
+
+        bucket_value = buckets.c.value
+        source = buckets
+        if facet == SearchFacet.TAGS:
+            bucket_value = Tag.name
+            source = buckets.join(Tag, Tag.id == buckets.c.value)
+
+        if facet in (SearchFacet.CREATED, SearchFacet.UPDATED):
+            order = (bucket_value.desc(),)
+        else:
+            order = (buckets.c.count.desc(), bucket_value)
+        row = func.jsonb_build_array(bucket_value, buckets.c.count, buckets.c.label)
+
+        return (
+            select(
+                func.coalesce(
+                    func.jsonb_agg(aggregate_order_by(row, *order)),
+                    text("'[]'::jsonb"),
+                )
+            )
+            .select_from(source)
+            .scalar_subquery()
+        )
+
+    @staticmethod
+    def _parse_facets(
+        raw: Optional[Dict[str, list]], request: SearchRequest
+    ) -> Dict[str, FacetCounts]:
+        """Convert the jsonb facet column into response models, applying the cap."""
+        facets = {}
+        for facet in request.facets:
+            rows = (raw or {}).get(facet.value) or []
+            facets[facet.value] = FacetCounts(
+                buckets=[
+                    FacetBucket(value=value, count=count, label=label)
+                    for value, count, label in rows[: request.facet_limit]
+                ],
+                truncated=len(rows) > request.facet_limit,
+            )
+        return facets
+
+    def _hydrate_notes(self, note_ids: List[int]) -> List[Note]:
+        """
+        Load the notes for one result page, preserving the ranked order.
+
+        Only the columns needed for result items are fetched (the tsvector
+        columns are skipped) and tags are loaded with a single IN query.
+        """
+        if not note_ids:
+            return []
+
+        query = (
+            self.db.query(Note)
+            .options(
+                load_only(
+                    Note.id,
+                    Note.title,
+                    Note.note_type,
+                    Note.content_text,
+                    Note.content_structured,
+                    Note.user_id,
+                    Note.created_at,
+                    Note.updated_at,
+                ),
+                selectinload(Note.tags).load_only(Tag.id, Tag.name),
+            )
+            .filter(Note.id.in_(note_ids))
+        )
+        if self.profile is not None:
+            self.profile.capture("hydrate", query)
+        notes = query.all()
 
-        return results, total
+        notes_by_id = {note.id: note for note in notes}
+        return [notes_by_id[note_id] for note_id in note_ids if note_id in notes_by_id]
 
     def _apply_fulltext_search(
         self, query, parsed: Dict, title_only: bool
     ) -> Tuple[Any, Any]:
         """Apply PostgreSQL full-text search with ranking."""
 
+        if not self.backend.ranks_in_database:
+            return self._apply_backend_search(query, parsed, title_only)
+
         search_conditions = []
         rank_components = []
 
@@ -280,7 +749,8 @@ class SearchService:
                 tsquery_content = func.plainto_tsquery("english", content_query_str)
                 search_conditions.append(Note.content_tsv.op("@@")(tsquery_content))
 
-                # Rank content matches (weight B = 0.4)
+                # Rank content matches (weight B = 0.4); tag names (C) and the
+                # folder path (D) in content_tsv match with lower weights
                 rank_components.append(func.ts_rank(Note.content_tsv, tsquery_content))
 
         # Apply search conditions
@@ -291,30 +761,65 @@ class SearchService:
         if rank_components:
             rank_score = sum(rank_components)
         else:
-            rank_score = literal_column("1.0")
+            rank_score = CONSTANT_RANK
 
         return query, rank_score
 
+    def _apply_backend_search(
+        self, query, parsed: Dict, title_only: bool
+    ) -> Tuple[Any, Any]:
+        """
+        Match and rank through an in-process search backend.
+
+        The backend's top hits become an id filter and their scores a CASE
+        expression, so the SQL filters, sorting and paging apply unchanged.
+        """
+        content_terms = parsed["content_terms"] + parsed["quoted_phrases"]
+        scores: Dict[int, float] = {}
+
+        if parsed["title_terms"]:
+            hits = self.backend.query(
+                self.db,
+                self.user_id,
+                " ".join(parsed["title_terms"]),
+                fields=("title",),
+                limit=MAX_BACKEND_CANDIDATES,
+            )
+            for note_id, score in hits:
+                scores[note_id] = scores.get(note_id, 0.0) + score
+
+        if content_terms and not title_only:
+            hits = self.backend.query(
+                self.db,
+                self.user_id,
+                " ".join(content_terms),
+                limit=MAX_BACKEND_CANDIDATES,
+            )
+            for note_id, score in hits:
+                scores[note_id] = scores.get(note_id, 0.0) + score
+
+        if not parsed["title_terms"] and (title_only or not content_terms):
+            return query, CONSTANT_RANK
+
+        if not scores:
+            return query.filter(false()), CONSTANT_RANK
+
+        rank_score = case(scores, value=Note.id, else_=0.0)
+        return query.filter(Note.id.in_(list(scores))), rank_score
+
     def _apply_parsed_filters(self, query, parsed: Dict):
         """Apply filters extracted from the search query parser."""
 
         # Tag filters
         if parsed["tags"]:
             for tag_name in parsed["tags"]:
-                query = query.join(Note.tags).filter(Tag.name == tag_name)
+                query = query.filter(Note.tags.any(Tag.name == tag_name))
 
         # Exclude tags
         if parsed["exclude_tags"]:
-            excluded_note_ids = (
-                self.db.query(Note.id)
-                .join(Note.tags)
-                .filter(
-                    Note.user_id == self.user_id, Tag.name.in_(parsed["exclude_tags"])
-                )
-                .distinct()
-                .subquery()
+            query = query.filter(
+                not_(Note.tags.any(Tag.name.in_(parsed["exclude_tags"])))
             )
-            query = query.filter(not_(Note.id.in_(excluded_note_ids)))
 
         # Created date filters
         if "after" in parsed["created_filters"]:
@@ -328,13 +833,54 @@ class SearchService:
         if "before" in parsed["updated_filters"]:
             query = query.filter(Note.updated_at <= parsed["updated_filters"]["before"])
 
-        # Has filters
-        if "attachments" in parsed["has_filters"]:
-            # For future implementation when attachments are added
-            pass
+        # Has filters (predicates match the partial indexes on notes)
+        for feature in parsed["has_filters"]:
+            predicate = self._has_feature_predicate(feature)
+            if predicate is not None:
+                query = query.filter(predicate)
+
+        # Todo status
+        if parsed["todo_status"] == "complete":
+            query = query.filter(Note.todo_done > 0, Note.todo_open == 0)
+        elif parsed["todo_status"] == "incomplete":
+            query = query.filter(Note.todo_open > 0)
+
+        # Structured note key paths
+        for field_filter in parsed["field_filters"]:
+            query = query.filter(self._field_predicate(field_filter))
 
         return query
 
+    @staticmethod
+    def _field_predicate(field_filter: FieldFilter):
+        """Return the filter for a field: operator over content_structured."""
+        if field_filter.operator == EQUALS:
+            # @> is served by the jsonb_path_ops index, one bitmap scan per branch
+            return or_(
+                *(
+                    Note.content_structured.op("@>")(cast(document, JSONB))
+                    for document in field_filter.containment_documents()
+                )
+            )
+        return func.jsonb_path_exists(
+            Note.content_structured, cast(field_filter.jsonpath(), JSONPATH)
+        )
+
+    @staticmethod
+    def _has_feature_predicate(feature: str):
+        """Return the filter for a has: value, or None for unknown features."""
+        if feature in ("todo", "todos", "checkboxes"):
+            # Split so each branch can use its own partial index
+            return or_(
+                Note.todo_open > 0, and_(Note.todo_done > 0, Note.todo_open == 0)
+            )
+
+        feature = HAS_FEATURE_ALIASES.get(feature, feature)
+        flag = FEATURE_FLAGS.get(feature)
+        if flag is None:
+            return None
+        return Note.feature_flags.op("&")(flag) != 0
+
     def _apply_request_filters(self, query, request: SearchRequest):
         """Apply filters from the SearchRequest object."""
 
@@ -344,29 +890,25 @@ class SearchService:
 
         # Tag filters from request
         if request.tags:
+            # EXISTS subqueries keep one row per note, which the windowed
+            # total in search() relies on
             if request.tag_mode == TagFilterMode.AND:
                 for tag_name in request.tags:
-                    query = query.join(Note.tags).filter(Tag.name == tag_name.lower())
+                    query = query.filter(Note.tags.any(Tag.name == tag_name.lower()))
             elif request.tag_mode == TagFilterMode.OR:
-                query = (
-                    query.join(Note.tags)
-                    .filter(Tag.name.in_([t.lower() for t in request.tags]))
-                    .distinct()
+                query = query.filter(
+                    Note.tags.any(Tag.name.in_([t.lower() for t in request.tags]))
                 )
 
         # Exclude tags from request
         if request.exclude_tags:
-            excluded_note_ids = (
-                self.db.query(Note.id)
-                .join(Note.tags)
-                .filter(
-                    Note.user_id == self.user_id,
-                    Tag.name.in_([t.lower() for t in request.exclude_tags]),
+            query = query.filter(
+                not_(
+                    Note.tags.any(
+                        Tag.name.in_([t.lower() for t in request.exclude_tags])
+                    )
                 )
-                .distinct()
-                .subquery()
             )
-            query = query.filter(not_(Note.id.in_(excluded_note_ids)))
 
         # Date filters from request
         if request.created_after:
@@ -380,34 +922,89 @@ class SearchService:
 
         return query
 
-    def _apply_sorting(self, query, sort_by: SearchSortBy, rank_score):
-        """Apply sorting to the query."""
+    def _apply_sorting(
+        self, query, sort_by: SearchSortBy, rank_score, sort_columns=None
+    ):
+        """
+        Apply sorting to the query.
+
+        ``sort_columns`` provides the id/date/title columns to sort on when
+        the query reads from a CTE instead of the notes table.
+        """
+        columns = sort_columns if sort_columns is not None else Note
 
         if sort_by == SearchSortBy.RELEVANCE:
-            # Sort by relevance score (highest first)
-            query = query.order_by(desc(rank_score))
+            if rank_score is CONSTANT_RANK:
+                # Nothing to rank (and ORDER BY 1.0 is invalid): newest first
+                query = query.order_by(desc(columns.updated_at))
+            else:
+                # Sort by relevance score (highest first)
+                query = query.order_by(desc(rank_score))
         elif sort_by == SearchSortBy.CREATED_DESC:
-            query = query.order_by(desc(Note.created_at))
+            query = query.order_by(desc(columns.created_at))
         elif sort_by == SearchSortBy.CREATED_ASC:
-            query = query.order_by(Note.created_at)
+            query = query.order_by(columns.created_at)
         elif sort_by == SearchSortBy.UPDATED_DESC:
-            query = query.order_by(desc(Note.updated_at))
+            query = query.order_by(desc(columns.updated_at))
         elif sort_by == SearchSortBy.UPDATED_ASC:
-            query = query.order_by(Note.updated_at)
+            query = query.order_by(columns.updated_at)
         elif sort_by == SearchSortBy.TITLE_ASC:
-            query = query.order_by(Note.title)
+            query = query.order_by(columns.title)
         elif sort_by == SearchSortBy.TITLE_DESC:
-            query = query.order_by(desc(Note.title))
+            query = query.order_by(desc(columns.title))
 
-        return query
+        # Tie-break on id so pages are stable across requests
+        return query.order_by(columns.id)
+
+    def _best_sections(
+        self, notes: List[Note], parsed: Dict, title_only: bool = False
+    ) -> Dict[int, SectionHit]:
+        """
+        Find the best matching section of each structured note on a page.
+
+        Sections are ranked by their own tsvector (note_sections) against the
+        content terms, in one query for the whole page. Notes without a
+        matching section are left out.
+        """
+        note_ids = [
+            note.id
+            for note in notes
+            if note.content_text is None and note.content_structured is not None
+        ]
+        content_terms = parsed["content_terms"] + parsed["quoted_phrases"]
+        if not note_ids or title_only or not content_terms:
+            return {}
+
+        tsquery = func.plainto_tsquery("english", " & ".join(content_terms))
+        rows = (
+            self.db.query(NoteSection.note_id, NoteSection.path, NoteSection.body)
+            .filter(
+                NoteSection.note_id.in_(note_ids),
+                NoteSection.user_id == self.user_id,
+                NoteSection.tsv.op("@@")(tsquery),
+            )
+            .order_by(
+                NoteSection.note_id,
+                desc(func.ts_rank(NoteSection.tsv, tsquery)),
+                NoteSection.path,
+            )
+            .distinct(NoteSection.note_id)
+            .all()
+        )
+        return {row.note_id: SectionHit(path=row.path, body=row.body) for row in rows}
 
     def _create_search_result(
-        self, note: Note, parsed: Dict, rank_score, original_query: str
+        self,
+        note: Note,
+        parsed: Dict,
+        rank_score,
+        original_query: str,
+        section: Optional[SectionHit] = None,
     ) -> SearchResultItem:
         """Create a SearchResultItem with snippet and metadata."""
 
-        # Generate snippet with context
-        snippet = self._generate_snippet(note, parsed, original_query)
+        # Generate snippet with context, from the best section when known
+        snippet = self._generate_snippet(note, parsed, original_query, section)
 
         # Determine where matches were found
         match_locations = []
@@ -448,51 +1045,25 @@ class SearchService:
             updated_at=note.updated_at,
             relevance_score=relevance,
             match_locations=match_locations,
+            section_path=section.path if section is not None else None,
         )
 
     def _generate_snippet(
-        self, note: Note, parsed: Dict, original_query: str, max_length: int = 200
+        self,
+        note: Note,
+        parsed: Dict,
+        original_query: str,
+        section: Optional[SectionHit] = None,
+        max_length: int = 200,
     ) -> str:
         """Generate a snippet showing context around search terms."""
 
-        content = note.content_text or str(note.content_structured or "")
         search_terms = (
             parsed["title_terms"] + parsed["content_terms"] + parsed["quoted_phrases"]
         )
-
-        if not search_terms or not content:
-            # Return beginning of content
-            return content[:max_length] + ("..." if len(content) > max_length else "")
-
-        # Find first occurrence of any search term
-        content_lower = content.lower()
-        earliest_pos = len(content)
-        found_term = None
-
-        for term in search_terms:
-            pos = content_lower.find(term.lower())
-            if pos != -1 and pos < earliest_pos:
-                earliest_pos = pos
-                found_term = term
-
-        if found_term is None:
-            # No term found, return beginning
-            return content[:max_length] + ("..." if len(content) > max_length else "")
-
-        # Extract context around the term
-        context_chars = max_length // 2
-        start = max(0, earliest_pos - context_chars)
-        end = min(len(content), earliest_pos + len(found_term) + context_chars)
-
-        snippet = content[start:end]
-
-        # Add ellipsis if truncated
-        if start > 0:
-            snippet = "..." + snippet
-        if end < len(content):
-            snippet = snippet + "..."
-
-        return snippet.strip()
+        if section is not None:
+            return snippet_window(section.body, search_terms, max_length)
+        return self.backend.snippet(note, search_terms, max_length)
 
     def _calculate_relevance_score(
         self, note: Note, parsed: Dict, match_locations: List[str]
@@ -530,61 +1101,11 @@ class SearchService:
         """
         Track search analytics for this query.
 
-        Creates or updates a SearchAnalytics record for this user's query.
-        Only increments count if last search was more than 5 seconds ago to prevent double-counting.
+        The event is queued on the write-behind analytics buffer, which
+        aggregates and upserts it in the background, so the search request
+        never waits on an analytics commit. Cancelled searches are not
+        recorded.
         """
-        # Normalize query text
-        query_text = query_text.strip()
-        if not query_text:
+        if self.cancellation is not None and self.cancellation.cancelled:
             return
-
-        # Find existing analytics record
-        analytics = (
-            self.db.query(SearchAnalytics)
-            .filter(
-                SearchAnalytics.user_id == self.user_id,
-                SearchAnalytics.query_text == query_text,
-            )
-            .first()
-        )
-
-        now = datetime.utcnow()
-
-        if analytics:
-            # Check if this is a duplicate search within 5 seconds (debounce protection)
-            time_since_last = (
-                now - analytics.last_searched_at.replace(tzinfo=None)
-            ).total_seconds()
-
-            if time_since_last < 5:
-                # Too soon - this is likely a duplicate from live search + manual submit
-                # Just update the timestamp and result count without incrementing
-                analytics.last_searched_at = now
-                analytics.last_result_count = result_count
-            else:
-                # Legitimate new search - increment count
-                analytics.search_count += 1
-                analytics.last_searched_at = now
-                analytics.last_result_count = result_count
-
-                # Update rolling average of result counts
-                if analytics.avg_result_count is None:
-                    analytics.avg_result_count = result_count
-                else:
-                    # Weighted average (give more weight to recent searches)
-                    analytics.avg_result_count = (analytics.avg_result_count * 0.8) + (
-                        result_count * 0.2
-                    )
-        else:
-            # Create new record
-            analytics = SearchAnalytics(
-                user_id=self.user_id,
-                query_text=query_text,
-                search_count=1,
-                last_searched_at=now,
-                last_result_count=result_count,
-                avg_result_count=result_count,
-            )
-            self.db.add(analytics)
-
-        self.db.commit()
+        search_analytics_buffer.record(self.user_id, query_text, result_count)
@@ -0,0 +1,663 @@
+"""
+Pluggable full-text search backends.
+
+``SearchService`` delegates term matching and ranking to a ``SearchBackend``:
+
+- ``PostgresSearchBackend`` (default) ranks inside the database using the
+  ``title_tsv``/``content_tsv`` columns maintained by triggers, so the ranking
+  can be composed with every other SQL filter in one query.
+- ``BM25SearchBackend`` keeps a per-user inverted index in process memory with
+  BM25 scoring. Postings are compact ``array`` buffers, updated incrementally
+  from note writes, and each user's index can be snapshotted to disk so a
+  restart does not have to rebuild it from the database.
+
+The in-memory backend is per process. It suits single-worker, embedded and
+test deployments; with several workers each one keeps its own copy and only
+sees the writes it handled itself.
+"""
+
+import heapq
+import json
+import math
+import os
+import re
+import struct
+import threading
+from abc import ABC, abstractmethod
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import desc, func, or_
+from sqlalchemy.orm import Session, selectinload
+
+from app.core.config import settings
+from app.models import Note, Tag, note_tags
+
+SEARCH_FIELDS = ("title", "content")
+FACET_FIELDS = ("tags", "note_type")
+
+# Small English stop-word list, close to what the 'english' text search
+# configuration drops
+STOP_WORDS = frozenset(
+    """
+    a an and are as at be but by for from has have he her his i if in into is it
+    its me my no not of on or our she so such that the their them then there
+    these they this to was we were what when which who will with you your
+    """.split()
+)
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase ``text`` and split it into indexable terms."""
+    return [
+        token
+        for token in TOKEN_PATTERN.findall(text.lower())
+        if token not in STOP_WORDS and len(token) < 64
+    ]
+
+
+def structured_text(value: Any) -> str:
+    """Flatten the string values of a structured note (keys are skipped)."""
+    if isinstance(value, dict):
+        return " ".join(structured_text(v) for v in value.values())
+    if isinstance(value, list):
+        return " ".join(structured_text(v) for v in value)
+    if isinstance(value, str):
+        return value
+    return ""
+
+
+def note_body_text(note: Note) -> str:
+    """Return the searchable body text of a note of either type."""
+    if note.content_text is not None:
+        return note.content_text
+    content = note.content_structured or {}
+    # Section titles are searchable too, matching notes_structured_tsvector()
+    titles = " ".join(content) if isinstance(content, dict) else ""
+    return f"{titles} {structured_text(content)}".strip()
+
+
+def snippet_window(content: str, terms: Sequence[str], max_length: int = 200) -> str:
+    """Return a window of ``content`` around the first matching term."""
+    if not terms or not content:
+        return content[:max_length] + ("..." if len(content) > max_length else "")
+
+    content_lower = content.lower()
+    earliest_pos = len(content)
+    found_term = None
+
+    for term in terms:
+        pos = content_lower.find(term.lower())
+        if pos != -1 and pos < earliest_pos:
+            earliest_pos = pos
+            found_term = term
+
+    if found_term is None:
+        return content[:max_length] + ("..." if len(content) > max_length else "")
+
+    context_chars = max_length // 2
+    start = max(0, earliest_pos - context_chars)
+    end = min(len(content), earliest_pos + len(found_term) + context_chars)
+
+    snippet = content[start:end]
+    if start > 0:
+        snippet = "..." + snippet
+    if end < len(content):
+        snippet = snippet + "..."
+
+    return snippet.strip()
+
+
+class SearchBackend(ABC):
+    """Interface implemented by every full-text search backend."""
+
+    name: str = ""
+
+    # True when ranking happens inside the SQL query built by SearchService
+    ranks_in_database: bool = False
+
+    @abstractmethod
+    def index(self, note: Note) -> None:
+        """Add or replace a note in the index."""
+
+    @abstractmethod
+    def delete(self, user_id: int, note_id: int) -> None:
+        """Remove a note from the index."""
+
+    @abstractmethod
+    def query(
+        self,
+        db: Session,
+        user_id: int,
+        text: str,
+        fields: Sequence[str] = SEARCH_FIELDS,
+        limit: Optional[int] = None,
+    ) -> List[Tuple[int, float]]:
+        """
+        Return ``(note_id, score)`` pairs matching every term, best first.
+
+        Args:
+            db: Session used to load or rank notes when the backend needs it
+            user_id: Owner of the notes to search
+            text: Plain search text (operators already removed)
+            fields: Which of ``title``/``content`` to match against
+            limit: Maximum number of hits, or None for all of them
+        """
+
+    @abstractmethod
+    def facets(
+        self,
+        db: Session,
+        user_id: int,
+        note_ids: Sequence[int],
+        fields: Sequence[str] = FACET_FIELDS,
+    ) -> Dict[str, Dict[str, int]]:
+        """Count ``tags``/``note_type`` values over the given notes."""
+
+    def snippet(self, note: Note, terms: Sequence[str], max_length: int = 200) -> str:
+        """Return a window of the note body around the first matching term."""
+        content = note.content_text or str(note.content_structured or "")
+        return snippet_window(content, terms, max_length)
+
+    def save(self) -> None:
+        """Persist any in-memory state (no-op for database backends)."""
+
+
+class PostgresSearchBackend(SearchBackend):
+    """Postgres ``tsvector`` full-text search; the index is kept by triggers."""
+
+    name = "postgres"
+    ranks_in_database = True
+
+    def index(self, note: Note) -> None:
+        # notes_tsvector_update trigger maintains title_tsv/content_tsv
+        pass
+
+    def delete(self, user_id: int, note_id: int) -> None:
+        pass
+
+    def query(
+        self,
+        db: Session,
+        user_id: int,
+        text: str,
+        fields: Sequence[str] = SEARCH_FIELDS,
+        limit: Optional[int] = None,
+    ) -> List[Tuple[int, float]]:
+        tsquery = func.plainto_tsquery("english", text)
+        conditions = []
+        rank = 0
+        if "title" in fields:
+            conditions.append(Note.title_tsv.op("@@")(tsquery))
+            rank = rank + func.ts_rank(Note.title_tsv, tsquery) * 2.0
+        if "content" in fields:
+            conditions.append(Note.content_tsv.op("@@")(tsquery))
+            rank = rank + func.ts_rank(Note.content_tsv, tsquery)
+
+        query = (
+            db.query(Note.id, rank.label("rank"))
+            .filter(Note.user_id == user_id, or_(*conditions))
+            .order_by(desc("rank"), Note.id)
+        )
+        if limit is not None:
+            query = query.limit(limit)
+
+        return [(row.id, float(row.rank)) for row in query.all()]
+
+    def facets(
+        self,
+        db: Session,
+        user_id: int,
+        note_ids: Sequence[int],
+        fields: Sequence[str] = FACET_FIELDS,
+    ) -> Dict[str, Dict[str, int]]:
+        result: Dict[str, Dict[str, int]] = {}
+        if not note_ids:
+            return {field: {} for field in fields}
+
+        if "tags" in fields:
+            rows = (
+                db.query(Tag.name, func.count(note_tags.c.note_id))
+                .join(note_tags, Tag.id == note_tags.c.tag_id)
+                .filter(Tag.user_id == user_id, note_tags.c.note_id.in_(note_ids))
+                .group_by(Tag.name)
+                .all()
+            )
+            result["tags"] = {name: count for name, count in rows}
+
+        if "note_type" in fields:
+            rows = (
+                db.query(Note.note_type, func.count(Note.id))
+                .filter(Note.user_id == user_id, Note.id.in_(note_ids))
+                .group_by(Note.note_type)
+                .all()
+            )
+            result["note_type"] = {note_type.value: count for note_type, count in rows}
+
+        return result
+
+
+class InvertedIndex:
+    """
+    Inverted index over one user's notes with BM25 scoring.
+
+    Documents get dense internal numbers. Each field keeps, per term, two
+    parallel arrays: document numbers (``array('I')``) and term frequencies
+    (``array('H')``). Updates append a new document and mark the old number
+    dead; ``compact()`` rewrites the postings once too many are dead.
+    """
+
+    K1 = 1.2
+    B = 0.75
+    TITLE_BOOST = 2.0
+    SNAPSHOT_MAGIC = b"N2GBM25\x01"
+
+    def __init__(self):
+        self.doc_note_ids = array("q")
+        self.doc_live = bytearray()
+        self.doc_types = bytearray()
+        self.doc_tags: List[Tuple[str, ...]] = []
+        self.doc_lengths = {field: array("I") for field in SEARCH_FIELDS}
+        self.total_lengths = {field: 0 for field in SEARCH_FIELDS}
+        self.postings: Dict[str, Dict[str, Tuple[array, array]]] = {
+            field: {} for field in SEARCH_FIELDS
+        }
+        self.note_to_doc: Dict[int, int] = {}
+        self.live_count = 0
+        self._norms: Dict[str, array] = {}
+
+    def __len__(self) -> int:
+        return self.live_count
+
+    def add(
+        self,
+        note_id: int,
+        title: str,
+        body: str,
+        note_type: str = "text",
+        tags: Iterable[str] = (),
+    ) -> None:
+        """Index a note, replacing any previous version of it."""
+        self.remove(note_id)
+
+        self._norms.clear()
+        doc = len(self.doc_note_ids)
+        self.doc_note_ids.append(note_id)
+        self.doc_live.append(1)
+        self.doc_types.append(1 if note_type == "structured" else 0)
+        self.doc_tags.append(tuple(sorted(tags)))
+        self.note_to_doc[note_id] = doc
+        self.live_count += 1
+
+        for field, text in (("title", title), ("content", body)):
+            terms = tokenize(text or "")
+            self.doc_lengths[field].append(len(terms))
+            self.total_lengths[field] += len(terms)
+            field_postings = self.postings[field]
+            for term, tf in Counter(terms).items():
+                entry = field_postings.get(term)
+                if entry is None:
+                    entry = field_postings[term] = (array("I"), array("H"))
+                entry[0].append(doc)
+                entry[1].append(min(tf, 0xFFFF))
+
+    def remove(self, note_id: int) -> None:
+        """Mark a note's document dead; postings are dropped on compaction."""
+        doc = self.note_to_doc.pop(note_id, None)
+        if doc is None:
+            return
+
+        self._norms.clear()
+        self.doc_live[doc] = 0
+        self.live_count -= 1
+        for field in SEARCH_FIELDS:
+            self.total_lengths[field] -= self.doc_lengths[field][doc]
+
+        if self.dead_ratio() > 0.25:
+            self.compact()
+
+    def dead_ratio(self) -> float:
+        total = len(self.doc_note_ids)
+        return (total - self.live_count) / total if total else 0.0
+
+    def compact(self) -> None:
+        """Drop dead documents and renumber the survivors."""
+        self._norms.clear()
+        remap = array("i", [-1]) * len(self.doc_note_ids)
+        new_doc = 0
+        for doc, live in enumerate(self.doc_live):
+            if live:
+                remap[doc] = new_doc
+                new_doc += 1
+
+        def keep(values, index_of):
+            return [values[i] for i in index_of]
+
+        live_docs = [doc for doc, live in enumerate(self.doc_live) if live]
+        self.doc_note_ids = array("q", keep(self.doc_note_ids, live_docs))
+        self.doc_types = bytearray(keep(self.doc_types, live_docs))
+        self.doc_tags = keep(self.doc_tags, live_docs)
+        self.doc_live = bytearray([1]) * len(live_docs)
+        for field in SEARCH_FIELDS:
+            self.doc_lengths[field] = array(
+                "I", keep(self.doc_lengths[field], live_docs)
+            )
+
+        for field in SEARCH_FIELDS:
+            compacted = {}
+            for term, (docs, tfs) in self.postings[field].items():
+                new_docs, new_tfs = array("I"), array("H")
+                for doc, tf in zip(docs, tfs):
+                    if remap[doc] >= 0:
+                        new_docs.append(remap[doc])
+                        new_tfs.append(tf)
+                if new_docs:
+                    compacted[term] = (new_docs, new_tfs)
+            self.postings[field] = compacted
+
+        self.note_to_doc = {
+            note_id: doc for doc, note_id in enumerate(self.doc_note_ids)
+        }
+
+    def search(
+        self,
+        terms: Sequence[str],
+        fields: Sequence[str] = SEARCH_FIELDS,
+        limit: Optional[int] = None,
+    ) -> List[Tuple[int, float]]:
+        """
+        Score documents containing every term (in any of ``fields``).
+
+        Terms are processed rarest first: the first term's postings are
+        scanned, later terms are only probed (by binary search on the sorted
+        document numbers) for documents that are still candidates.
+        """
+        if not terms or not self.live_count:
+            return []
+
+        n_docs = self.live_count
+        live = self.doc_live
+        term_entries = []
+
+        for term in dict.fromkeys(terms):
+            entries = []
+            for field in fields:
+                entry = self.postings[field].get(term)
+                if entry is None:
+                    continue
+                docs, tfs = entry
+                df = len(docs)
+                idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+                boost = self.TITLE_BOOST if field == "title" else 1.0
+                coef = boost * idf * (self.K1 + 1)
+                entries.append((docs, tfs, coef, self._field_norms(field)))
+
+            if not entries:
+                return []
+            term_entries.append((sum(len(e[0]) for e in entries), term, entries))
+
+        scores: Optional[Dict[int, float]] = None
+        for _, _, entries in sorted(term_entries):
+            term_scores: Dict[int, float] = {}
+            for docs, tfs, coef, norms in entries:
+                size = len(docs)
+                if scores is None:
+                    pairs = ((doc, tf) for doc, tf in zip(docs, tfs) if live[doc])
+                elif len(scores) * size.bit_length() > size:
+                    # Scanning is cheaper than probing when candidates are dense
+                    pairs = ((doc, tf) for doc, tf in zip(docs, tfs) if doc in scores)
+                else:
+                    pairs = self._probe(docs, tfs, scores)
+
+                for doc, tf in pairs:
+                    term_scores[doc] = term_scores.get(doc, 0.0) + (
+                        coef * tf / (tf + norms[doc])
+                    )
+
+            if scores is not None:
+                for doc in term_scores:
+                    term_scores[doc] += scores[doc]
+            scores = term_scores
+            if not scores:
+                return []
+
+        hits = ((self.doc_note_ids[doc], score) for doc, score in scores.items())
+        order = lambda hit: (-hit[1], hit[0])  # noqa: E731
+        if limit is not None:
+            return heapq.nsmallest(limit, hits, key=order)
+        return sorted(hits, key=order)
+
+    @staticmethod
+    def _probe(docs: array, tfs: array, candidates: Iterable[int]):
+        """Yield ``(doc, tf)`` for candidates present in sorted postings."""
+        size = len(docs)
+        for doc in candidates:
+            i = bisect_left(docs, doc)
+            if i < size and docs[i] == doc:
+                yield doc, tfs[i]
+
+    def _field_norms(self, field: str) -> array:
+        """Per-document BM25 length normalisation, cached until the next write."""
+        norms = self._norms.get(field)
+        if norms is None:
+            lengths = self.doc_lengths[field]
+            avg_length = self.total_lengths[field] / (self.live_count or 1) or 1.0
+            base = self.K1 * (1 - self.B)
+            scale = self.K1 * self.B / avg_length
+            norms = array("d", (base + scale * length for length in lengths))
+            self._norms[field] = norms
+        return norms
+
+    def facet_counts(
+        self, note_ids: Sequence[int], fields: Sequence[str] = FACET_FIELDS
+    ) -> Dict[str, Dict[str, int]]:
+        tag_counts: Counter = Counter()
+        type_counts: Counter = Counter()
+        for note_id in note_ids:
+            doc = self.note_to_doc.get(note_id)
+            if doc is None:
+                continue
+            tag_counts.update(self.doc_tags[doc])
+            type_counts["structured" if self.doc_types[doc] else "text"] += 1
+
+        result = {}
+        if "tags" in fields:
+            result["tags"] = dict(tag_counts)
+        if "note_type" in fields:
+            result["note_type"] = dict(type_counts)
+        return result
+
+    def save(self, path: str) -> None:
+        """Write a compacted snapshot of the index to ``path``."""
+        if self.dead_ratio():
+            self.compact()
+
+        header = {
+            "docs": len(self.doc_note_ids),
+            "tags": self.doc_tags,
+            "total_lengths": self.total_lengths,
+            "terms": {
+                field: [[term, len(docs)] for term, (docs, _) in postings.items()]
+                for field, postings in self.postings.items()
+            },
+        }
+        header_bytes = json.dumps(header).encode("utf-8")
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as fh:
+            fh.write(self.SNAPSHOT_MAGIC)
+            fh.write(struct.pack("<I", len(header_bytes)))
+            fh.write(header_bytes)
+            self.doc_note_ids.tofile(fh)
+            fh.write(bytes(self.doc_types))
+            for field in SEARCH_FIELDS:
+                self.doc_lengths[field].tofile(fh)
+            for field in SEARCH_FIELDS:
+                for docs, tfs in self.postings[field].values():
+                    docs.tofile(fh)
+                    tfs.tofile(fh)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "InvertedIndex":
+        """Read a snapshot written by ``save``."""
+        index = cls()
+        with open(path, "rb") as fh:
+            if fh.read(len(cls.SNAPSHOT_MAGIC)) != cls.SNAPSHOT_MAGIC:
+                raise ValueError(f"Not a search index snapshot: {path}")
+            (header_length,) = struct.unpack("<I", fh.read(4))
+            header = json.loads(fh.read(header_length))
+            n_docs = header["docs"]
+
+            index.doc_note_ids.fromfile(fh, n_docs)
+            index.doc_types = bytearray(fh.read(n_docs))
+            for field in SEARCH_FIELDS:
+                index.doc_lengths[field].fromfile(fh, n_docs)
+            for field in SEARCH_FIELDS:
+                postings = index.postings[field]
+                for term, df in header["terms"][field]:
+                    docs, tfs = array("I"), array("H")
+                    docs.fromfile(fh, df)
+                    tfs.fromfile(fh, df)
+                    postings[term] = (docs, tfs)
+
+        index.doc_tags = [tuple(tags) for tags in header["tags"]]
+        index.total_lengths = header["total_lengths"]
+        index.doc_live = bytearray([1]) * n_docs
+        index.note_to_doc = {
+            note_id: doc for doc, note_id in enumerate(index.doc_note_ids)
+        }
+        index.live_count = n_docs
+        return index
+
+
+class BM25SearchBackend(SearchBackend):
+    """In-process BM25 search with one ``InvertedIndex`` per user."""
+
+    name = "bm25"
+
+    def __init__(self, snapshot_dir: Optional[str] = None):
+        self.snapshot_dir = snapshot_dir
+        self._indexes: Dict[int, InvertedIndex] = {}
+        self._lock = threading.RLock()
+
+    def index(self, note: Note) -> None:
+        with self._lock:
+            user_index = self._indexes.get(note.user_id)
+            # Users not loaded yet are built from the database on first query
+            if user_index is not None:
+                self._add_note(user_index, note)
+
+    def delete(self, user_id: int, note_id: int) -> None:
+        with self._lock:
+            user_index = self._indexes.get(user_id)
+            if user_index is not None:
+                user_index.remove(note_id)
+
+    def query(
+        self,
+        db: Session,
+        user_id: int,
+        text: str,
+        fields: Sequence[str] = SEARCH_FIELDS,
+        limit: Optional[int] = None,
+    ) -> List[Tuple[int, float]]:
+        user_index = self._get_index(db, user_id)
+        with self._lock:
+            return user_index.search(tokenize(text), fields, limit)
+
+    def facets(
+        self,
+        db: Session,
+        user_id: int,
+        note_ids: Sequence[int],
+        fields: Sequence[str] = FACET_FIELDS,
+    ) -> Dict[str, Dict[str, int]]:
+        user_index = self._get_index(db, user_id)
+        with self._lock:
+            return user_index.facet_counts(note_ids, fields)
+
+    def save(self) -> None:
+        """Snapshot every loaded user index to ``snapshot_dir``."""
+        if not self.snapshot_dir:
+            return
+
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        with self._lock:
+            for user_id, user_index in self._indexes.items():
+                user_index.save(self._snapshot_path(user_id))
+
+    def _snapshot_path(self, user_id: int) -> str:
+        return os.path.join(self.snapshot_dir, f"user_{user_id}.bm25")
+
+    def _get_index(self, db: Session, user_id: int) -> InvertedIndex:
+        with self._lock:
+            user_index = self._indexes.get(user_id)
+            if user_index is None:
+                user_index = self._load_or_build(db, user_id)
+                self._indexes[user_id] = user_index
+            return user_index
+
+    def _load_or_build(self, db: Session, user_id: int) -> InvertedIndex:
+        note_count = (
+            db.query(func.count(Note.id)).filter(Note.user_id == user_id).scalar()
+        )
+
+        if self.snapshot_dir:
+            path = self._snapshot_path(user_id)
+            if os.path.exists(path):
+                snapshot = InvertedIndex.load(path)
+                # Notes written while the process was down invalidate the snapshot
+                if len(snapshot) == note_count and not self._changed_since(
+                    db, user_id, os.path.getmtime(path)
+                ):
+                    return snapshot
+
+        user_index = InvertedIndex()
+        notes = (
+            db.query(Note)
+            .options(selectinload(Note.tags))
+            .filter(Note.user_id == user_id)
+            .yield_per(1000)
+        )
+        for note in notes:
+            self._add_note(user_index, note)
+        return user_index
+
+    @staticmethod
+    def _changed_since(db: Session, user_id: int, timestamp: float) -> bool:
+        latest = (
+            db.query(func.max(Note.updated_at)).filter(Note.user_id == user_id).scalar()
+        )
+        return latest is not None and latest.timestamp() > timestamp
+
+    @staticmethod
+    def _add_note(user_index: InvertedIndex, note: Note) -> None:
+        note_type = getattr(note.note_type, "value", note.note_type) or "text"
+        user_index.add(
+            note.id,
+            note.title,
+            note_body_text(note),
+            note_type=note_type,
+            tags=[tag.name for tag in note.tags],
+        )
+
+
+_backend: Optional[SearchBackend] = None
+
+
+def get_search_backend() -> SearchBackend:
+    """Return the process-wide backend selected by ``settings.search_backend``."""
+    global _backend
+    if _backend is None:
+        if settings.search_backend == BM25SearchBackend.name:
+            _backend = BM25SearchBackend(settings.search_snapshot_dir or None)
+        elif settings.search_backend == PostgresSearchBackend.name:
+            _backend = PostgresSearchBackend()
+        else:
+            raise ValueError(f"Unknown search backend: {settings.search_backend}")
+    return _backend
@@ -0,0 +1,150 @@
+"""
+Statement timeouts and client-disconnect cancellation for searches.
+
+Search endpoints run the search in a worker thread while the event loop polls
+the client connection. When the client goes away (typically a search-as-you-
+type request superseded by the next keystroke), the statements still running
+on the search's connections are cancelled with libpq's cancel request, the
+same mechanism as ``pg_cancel_backend``, so Postgres stops working on them.
+
+Every statement is also bounded by a per-endpoint ``statement_timeout`` (see
+the ``*_statement_timeout_ms`` settings).
+"""
+
+import asyncio
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, List
+
+from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import event
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+# SQLSTATE for statements stopped by a cancel request or statement_timeout
+QUERY_CANCELED = "57014"
+
+# How often a running search checks whether its client is still connected
+DISCONNECT_POLL_SECONDS = 0.05
+
+
+class SearchCancelled(Exception):
+    """The client disconnected and the search was cancelled."""
+
+
+class SearchTimedOut(Exception):
+    """A search statement exceeded the endpoint's statement_timeout."""
+
+
+def set_statement_timeout(db: Session, timeout_ms: int) -> None:
+    """
+    Bound every statement the session runs by ``timeout_ms`` (0 = no limit).
+
+    The limit is applied with ``SET LOCAL`` to the current transaction and to
+    every transaction the session begins later, so it survives rollbacks and
+    never leaks onto pooled connections.
+    """
+    statement = f"SET LOCAL statement_timeout = {int(timeout_ms)}"
+
+    @event.listens_for(db, "after_begin")
+    def apply_timeout(session, transaction, connection):
+        connection.exec_driver_sql(statement)
+
+    if db.in_transaction():
+        db.connection().exec_driver_sql(statement)
+
+
+def is_query_canceled(error: BaseException) -> bool:
+    """Return True for errors raised by a cancelled or timed-out statement."""
+    orig = getattr(error, "orig", None)
+    return getattr(orig, "pgcode", None) == QUERY_CANCELED
+
+
+class SearchCancellation:
+    """
+    Cancellation state shared by the sessions of one search request.
+
+    Sessions registered with track() have their running statement cancelled
+    by cancel(). SearchService skips analytics once ``cancelled`` is set.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._connections: List[Any] = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    @contextmanager
+    def track(self, db: Session) -> Iterator[None]:
+        """
+        Make the session's statements cancellable while the block runs.
+
+        Begins the session's transaction so its connection is known up front.
+        Connections are released before they can return to the pool, so a
+        late cancel never hits another request's statement.
+        """
+        dbapi_connection = db.connection().connection.dbapi_connection
+        with self._lock:
+            self._connections.append(dbapi_connection)
+            if self.cancelled:
+                dbapi_connection.cancel()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._connections.remove(dbapi_connection)
+
+    def cancel(self) -> None:
+        """Mark the search cancelled and stop its running statements."""
+        with self._lock:
+            self._event.set()
+            for dbapi_connection in self._connections:
+                try:
+                    dbapi_connection.cancel()
+                except Exception as e:
+                    print(f"Error cancelling search statement: {e}")
+
+
+async def run_cancellable(
+    request: Request,
+    db: Session,
+    cancellation: SearchCancellation,
+    func: Callable[..., Any],
+    *args: Any,
+) -> Any:
+    """
+    Run ``func(*args)`` in a worker thread, cancelling it if the client leaves.
+
+    Raises:
+        SearchCancelled: the client disconnected before the search finished.
+        SearchTimedOut: a statement hit statement_timeout.
+    """
+
+    def run() -> Any:
+        with cancellation.track(db):
+            return func(*args)
+
+    work = asyncio.ensure_future(run_in_threadpool(run))
+    while not work.done():
+        await asyncio.wait({work}, timeout=DISCONNECT_POLL_SECONDS)
+        if not work.done() and await request.is_disconnected():
+            cancellation.cancel()
+            break
+
+    try:
+        # The worker owns the session until it returns, cancelled or not
+        result = await work
+    except DBAPIError as e:
+        if cancellation.cancelled:
+            raise SearchCancelled() from e
+        if is_query_canceled(e):
+            raise SearchTimedOut() from e
+        raise
+
+    if cancellation.cancelled:
+        raise SearchCancelled()
+    return result
@@ -0,0 +1,157 @@
+"""
+Search profiling: per-phase timings, EXPLAIN capture and a slow search log.
+
+SearchService.search times its phases (parse, rank, hydrate, snippets,
+analytics) into a SearchProfile. The profiler endpoint additionally asks the
+profile to capture the statements the search ran, which are then compiled for
+display and re-run under ``EXPLAIN (ANALYZE, BUFFERS)``.
+
+Searches slower than ``settings.search_slow_log_threshold_ms`` are sampled
+into an in-process ring buffer with their request and phase timings, so
+indexes can be tuned from real queries. The log is per process and is lost on
+restart.
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from app.core.config import settings
+
+
+class SearchProfile:
+    """Phase timings, and optionally the statements, of one search."""
+
+    def __init__(self, capture_statements: bool = False):
+        self.capture_statements = capture_statements
+        # Milliseconds per phase, in the order the phases first ran
+        self.phases: Dict[str, float] = {}
+        self.statements: Dict[str, Any] = {}
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time the block, adding to any earlier time spent in the phase."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            self.phases[name] = self.phases.get(name, 0.0) + elapsed
+
+    def capture(self, name: str, query) -> None:
+        """Keep the statement of an ORM query when capturing is enabled."""
+        if self.capture_statements:
+            self.statements[name] = query.statement
+
+    @property
+    def total_ms(self) -> float:
+        return sum(self.phases.values())
+
+
+class Explain(Executable, ClauseElement):
+    """
+    ``EXPLAIN (ANALYZE, BUFFERS)`` wrapped around a select statement.
+
+    With ``json`` the plan is returned as a single ``FORMAT JSON`` row.
+    """
+
+    inherit_cache = False
+
+    def __init__(self, statement, analyze: bool = True, json: bool = False):
+        self.statement = statement
+        self.analyze = analyze
+        self.json = json
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element: Explain, compiler, **kw) -> str:
+    options = ["ANALYZE", "BUFFERS"] if element.analyze else ["COSTS"]
+    if element.json:
+        options.append("FORMAT JSON")
+    return f"EXPLAIN ({', '.join(options)}) " + compiler.process(
+        element.statement, **kw
+    )
+
+
+def explain_statement(db: Session, statement, analyze: bool = True) -> List[str]:
+    """
+    Return the plan lines of a statement.
+
+    With ``analyze`` the statement is executed, so it is subject to the
+    session's statement_timeout like the search itself.
+    """
+    return [row[0] for row in db.execute(Explain(statement, analyze))]
+
+
+def compile_statement(db: Session, statement) -> Tuple[str, Dict[str, Any]]:
+    """Return a statement's SQL for the session's dialect and its parameters."""
+    compiled = statement.compile(
+        dialect=db.get_bind().dialect,
+        compile_kwargs={"render_postcompile": True},
+    )
+    return str(compiled), dict(compiled.params)
+
+
+@dataclass
+class SlowSearch:
+    """A search sampled into the slow search log."""
+
+    user_id: int
+    request: Dict[str, Any]
+    execution_time_ms: float
+    phases: Dict[str, float]
+    searched_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+class SlowSearchLog:
+    """Ring buffer of the most recent searches slower than a threshold."""
+
+    def __init__(
+        self,
+        threshold_ms: float = settings.search_slow_log_threshold_ms,
+        capacity: int = settings.search_slow_log_size,
+    ):
+        self.threshold_ms = threshold_ms
+        self.capacity = capacity
+        self._entries: "deque[SlowSearch]" = deque(maxlen=max(capacity, 1))
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold_ms > 0
+
+    def record(self, user_id: int, request, profile: SearchProfile) -> bool:
+        """Sample the search if it was slow; return True when it was kept."""
+        if not self.enabled or profile.total_ms < self.threshold_ms:
+            return False
+        entry = SlowSearch(
+            user_id=user_id,
+            request=request.model_dump(mode="json"),
+            execution_time_ms=profile.total_ms,
+            phases=dict(profile.phases),
+        )
+        with self._lock:
+            self._entries.append(entry)
+        return True
+
+    def entries(self, limit: Optional[int] = None) -> List[SlowSearch]:
+        """Return sampled searches, newest first."""
+        with self._lock:
+            entries = list(reversed(self._entries))
+        return entries[:limit] if limit is not None else entries
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+# Process-wide slow search log fed by SearchService.search
+slow_search_log = SlowSearchLog()
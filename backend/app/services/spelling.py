@@ -0,0 +1,128 @@
+"""
+"Did you mean" suggestions for searches with few results.
+
+Every user has a dictionary of the lexemes in their notes with the number of
+notes containing each (``user_lexemes``), kept current by a trigger on notes.
+A query word whose lexeme is not in the dictionary is treated as misspelled
+and replaced by the dictionary lexemes most similar to it by trigrams, found
+through the (user_id, lexeme) GIN index rather than by scanning notes.
+
+Corrections are lexemes, i.e. stemmed forms ("meet" for "meeting"); searching
+for them matches the same notes as any word with that stem.
+"""
+
+import re
+from typing import Dict, List
+
+from sqlalchemy import desc, func, text
+from sqlalchemy.orm import Session
+
+from app.models import UserLexeme
+
+# Corrected queries returned per search
+MAX_SUGGESTIONS = 3
+
+# Query words worth correcting: plain words of three or more letters
+WORD_PATTERN = re.compile(r"^[^\W\d_]{3,}$")
+
+STEMS_SQL = text(
+    "SELECT w, tsvector_to_array(to_tsvector('english', w)) "
+    "FROM unnest(CAST(:words AS text[])) AS w"
+)
+
+
+def query_words(parsed: Dict) -> List[str]:
+    """Return the distinct free-text and intitle: words of a parsed query."""
+    words = []
+    for term in parsed["content_terms"] + parsed["title_terms"]:
+        for word in term.split():
+            word = word.lower()
+            if WORD_PATTERN.match(word) and word not in words:
+                words.append(word)
+    return words
+
+
+def corrected_queries(
+    query: str, corrections: Dict[str, List[str]], limit: int = MAX_SUGGESTIONS
+) -> List[str]:
+    """
+    Rewrite ``query`` with the corrections of its misspelled words.
+
+    The first suggestion uses every word's best correction, the next ones its
+    runners-up (falling back to the best one for words with fewer).
+    """
+    suggestions: List[str] = []
+    for choice in range(limit):
+        rewritten = query
+        for word, candidates in corrections.items():
+            replacement = candidates[min(choice, len(candidates) - 1)]
+            rewritten = re.sub(
+                # Not inside other words or tag:/-tag: filters
+                rf"(?<![\w-])(?<!tag:){re.escape(word)}\b",
+                replacement,
+                rewritten,
+                flags=re.IGNORECASE,
+            )
+        if rewritten != query and rewritten not in suggestions:
+            suggestions.append(rewritten)
+    return suggestions
+
+
+class SpellingService:
+    """Suggest corrected queries from a user's lexeme dictionary."""
+
+    def __init__(self, db: Session, user_id: int):
+        self.db = db
+        self.user_id = user_id
+
+    def suggest(
+        self, query: str, parsed: Dict, limit: int = MAX_SUGGESTIONS
+    ) -> List[str]:
+        """Return up to ``limit`` corrected versions of ``query``, best first."""
+        words = query_words(parsed)
+        if not words:
+            return []
+
+        # Stop words have no lexeme and are never corrected
+        stems = {
+            word: lexemes[0]
+            for word, lexemes in self.db.execute(STEMS_SQL, {"words": words})
+            if lexemes
+        }
+        if not stems:
+            return []
+
+        known = {
+            lexeme
+            for (lexeme,) in self.db.query(UserLexeme.lexeme).filter(
+                UserLexeme.user_id == self.user_id,
+                UserLexeme.lexeme.in_(set(stems.values())),
+            )
+        }
+
+        corrections = {}
+        for word, stem in stems.items():
+            if stem in known:
+                continue
+            candidates = self._similar_lexemes(stem, limit)
+            if candidates:
+                corrections[word] = candidates
+
+        return corrected_queries(query, corrections, limit) if corrections else []
+
+    def _similar_lexemes(self, stem: str, limit: int) -> List[str]:
+        """Lexemes of the user's notes closest to ``stem``, frequent ones first."""
+        rows = (
+            self.db.query(UserLexeme.lexeme)
+            .filter(
+                UserLexeme.user_id == self.user_id,
+                UserLexeme.lexeme.op("%")(stem),
+            )
+            .order_by(
+                desc(func.similarity(UserLexeme.lexeme, stem)),
+                desc(UserLexeme.note_count),
+            )
+            .limit(limit)
+            .all()
+        )
+        return [lexeme for (lexeme,) in rows]
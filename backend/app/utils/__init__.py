@@ -1,5 +1,17 @@
 """Utility modules for the notes2gogo backend."""
 
 from app.utils.date_parser import NaturalDateParser
+from app.utils.text_search import (
+    LIKE_ESCAPE_CHAR,
+    contains_pattern,
+    escape_like,
+    prefix_pattern,
+)
 
-__all__ = ["NaturalDateParser"]
+__all__ = [
+    "LIKE_ESCAPE_CHAR",
+    "NaturalDateParser",
+    "contains_pattern",
+    "escape_like",
+    "prefix_pattern",
+]
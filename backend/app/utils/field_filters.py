@@ -0,0 +1,152 @@
+"""
+Key-path filters over structured note content.
+
+``field:`` search operators name a section of a structured note, optionally
+followed by nested keys (``field:"Project Info".Owner``), and test it in one
+of three ways:
+
+- ``=value`` the value equals ``value`` or is an array containing it. Compiled
+  to ``content_structured @> '{"Project Info": {"Owner": "value"}}'``, which
+  the ``jsonb_path_ops`` GIN index on ``content_structured`` serves.
+- ``~value`` a string value (or array element) contains ``value``, ignoring
+  case. Compiled to a ``jsonb_path_exists`` filter with ``like_regex``.
+- no operator: the key path exists, via ``jsonb_path_exists``.
+
+Keys and ``=`` values are matched exactly, including case. Unquoted values that
+read as JSON numbers, booleans or null also match the typed value, so
+``field:Priority=2`` matches both ``"2"`` and ``2``.
+
+``FieldFilter.matches`` applies the same rules to a loaded document, for the
+saved search percolator.
+"""
+
+import json
+import re
+from dataclasses import dataclass
+from typing import Any, Iterator, List, Optional, Tuple
+
+# Operators after the key path: exact value, case-insensitive substring
+EQUALS = "="
+CONTAINS = "~"
+
+
+@dataclass(frozen=True)
+class FieldFilter:
+    """One ``field:`` operator: a key path and an optional value test."""
+
+    path: Tuple[str, ...]
+    operator: Optional[str] = None
+    value: Optional[str] = None
+    # Also match the JSON literal the unquoted value reads as
+    typed_value: Any = None
+    has_typed_value: bool = False
+
+    @classmethod
+    def parse(
+        cls, path: str, operator: Optional[str] = None, value: Optional[str] = None
+    ) -> "FieldFilter":
+        """Build a filter from the key path and value text of a ``field:`` match."""
+        keys = tuple(
+            key.strip('"') for key in re.findall(r'"[^"]+"|[^."]+', path) if key
+        )
+        if operator is None or value is None:
+            return cls(path=keys)
+
+        if value.startswith('"') and value.endswith('"') and len(value) >= 2:
+            return cls(path=keys, operator=operator, value=value[1:-1])
+
+        typed_value, has_typed_value = None, False
+        if operator == EQUALS:
+            try:
+                typed_value = json.loads(value)
+                has_typed_value = typed_value is None or isinstance(
+                    typed_value, (bool, int, float)
+                )
+            except ValueError:
+                pass
+        return cls(
+            path=keys,
+            operator=operator,
+            value=value,
+            typed_value=typed_value if has_typed_value else None,
+            has_typed_value=has_typed_value,
+        )
+
+    def candidates(self) -> List[Any]:
+        """The JSON values an ``=`` filter accepts."""
+        values: List[Any] = [self.value]
+        if self.has_typed_value:
+            values.append(self.typed_value)
+        return values
+
+    def containment_documents(self) -> List[Any]:
+        """Documents that ``content_structured @> doc`` tests for ``=``."""
+        documents = []
+        for candidate in self.candidates():
+            # A scalar only contains itself; an array has to be matched as one
+            for leaf in (candidate, [candidate]):
+                document = leaf
+                for key in reversed(self.path):
+                    document = {key: document}
+                documents.append(document)
+        return documents
+
+    def jsonpath(self) -> str:
+        """The SQL/JSON path tested with ``jsonb_path_exists`` for ``~`` and presence."""
+        path = "$" + "".join(f".{_jsonpath_string(key)}" for key in self.path)
+        if self.operator == CONTAINS:
+            pattern = _jsonpath_string(re.escape(self.value or ""))
+            path += f' ? (@ like_regex {pattern} flag "i")'
+        return path
+
+    def matches(self, content: Any) -> bool:
+        """Return True when structured ``content`` satisfies the filter."""
+        if self.operator == EQUALS:
+            value = content
+            for key in self.path:
+                if not isinstance(value, dict) or key not in value:
+                    return False
+                value = value[key]
+            items = value if isinstance(value, list) else [value]
+            return any(
+                _json_equal(item, candidate)
+                for item in items
+                for candidate in self.candidates()
+            )
+
+        values = list(_lax_values(content, self.path))
+        if self.operator == CONTAINS:
+            needle = (self.value or "").lower()
+            return any(
+                isinstance(item, str) and needle in item.lower()
+                for value in values
+                for item in (value if isinstance(value, list) else [value])
+            )
+        return bool(values)
+
+
+def _jsonpath_string(value: str) -> str:
+    """Quote ``value`` as a SQL/JSON path string literal."""
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def _json_equal(left: Any, right: Any) -> bool:
+    """Compare decoded JSON values the way jsonb does (1 == 1.0, true != 1)."""
+    if isinstance(left, bool) or isinstance(right, bool):
+        return isinstance(left, bool) and isinstance(right, bool) and left == right
+    if isinstance(left, (int, float)) and isinstance(right, (int, float)):
+        return left == right
+    return type(left) is type(right) and left == right
+
+
+def _lax_values(value: Any, path: Tuple[str, ...]) -> Iterator[Any]:
+    """Values at ``path`` in lax mode: arrays on the way are unwrapped."""
+    if not path:
+        yield value
+        return
+    if isinstance(value, list):
+        for item in value:
+            if isinstance(item, dict) and path[0] in item:
+                yield from _lax_values(item[path[0]], path[1:])
+    elif isinstance(value, dict) and path[0] in value:
+        yield from _lax_values(value[path[0]], path[1:])
@@ -0,0 +1,111 @@
+"""
+MinHash signatures for near-duplicate note detection.
+
+A note's content is reduced to its set of word 3-shingles. Each of
+``NUM_PERM`` hash functions keeps its minimum over the shingles, so the share
+of equal positions in two signatures estimates the Jaccard similarity of the
+two shingle sets.
+
+For locality-sensitive hashing the signature is cut into ``LSH_BANDS`` bands
+of ``LSH_ROWS`` values and each band is hashed to a 64-bit key. Notes sharing
+any key are duplicate candidates: with 16 bands of 8 rows, a pair at
+similarity 0.8 shares a band 95% of the time and a pair at 0.5 only 6%.
+"""
+
+import hashlib
+import re
+import zlib
+from typing import Any, List, Optional, Tuple
+
+import numpy as np
+
+from app.utils.note_features import _structured_values
+
+NUM_PERM = 128
+LSH_BANDS = 16
+LSH_ROWS = NUM_PERM // LSH_BANDS
+SHINGLE_SIZE = 3
+
+# Shingles hashed per block, bounding memory for very long notes
+_BLOCK = 2048
+
+# Smallest prime above 2**32; a * x + b stays below 2**64 for 32-bit a, x and b
+_PRIME = np.uint64(4294967311)
+# Fixed seed: stored signatures must stay comparable across processes
+_rng = np.random.RandomState(0x5EED)
+_A = _rng.randint(1, 2**32, size=NUM_PERM, dtype=np.uint64)
+_B = _rng.randint(0, 2**32, size=NUM_PERM, dtype=np.uint64)
+
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def shingles(text: str) -> set:
+    """Return the word 3-shingles of a text (the whole text if shorter)."""
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) < SHINGLE_SIZE:
+        return {" ".join(words)} if words else set()
+    return {
+        " ".join(words[i : i + SHINGLE_SIZE])
+        for i in range(len(words) - SHINGLE_SIZE + 1)
+    }
+
+
+def minhash_signature(text: str) -> Optional[np.ndarray]:
+    """Return the ``NUM_PERM`` uint32 MinHash values of a text, or None if empty."""
+    shingle_set = shingles(text)
+    if not shingle_set:
+        return None
+
+    hashes = np.fromiter(
+        (zlib.crc32(shingle.encode("utf-8")) for shingle in shingle_set),
+        dtype=np.uint64,
+        count=len(shingle_set),
+    )
+    signature = np.full(NUM_PERM, _PRIME, dtype=np.uint64)
+    for start in range(0, len(hashes), _BLOCK):
+        block = hashes[start : start + _BLOCK]
+        values = (np.outer(block, _A) + _B) % _PRIME
+        np.minimum(signature, values.min(axis=0), out=signature)
+    return signature.astype("<u4")
+
+
+def band_keys(signature: np.ndarray) -> List[int]:
+    """Hash each band of a signature, with its band number, to a signed 64-bit key."""
+    return [
+        int.from_bytes(
+            hashlib.blake2b(bytes([band]) + rows.tobytes(), digest_size=8).digest(),
+            "big",
+            signed=True,
+        )
+        for band, rows in enumerate(signature.reshape(LSH_BANDS, LSH_ROWS))
+    ]
+
+
+def decode_signature(data: bytes) -> np.ndarray:
+    """Return a signature stored in ``Note.minhash``."""
+    return np.frombuffer(data, dtype="<u4")
+
+
+def similarities(signature: np.ndarray, others: np.ndarray) -> np.ndarray:
+    """Estimated Jaccard similarity of a signature to each row of ``others``."""
+    return (others == signature).mean(axis=1)
+
+
+def note_signature(
+    content_text: Optional[str], content_structured: Any = None
+) -> Tuple[Optional[bytes], Optional[List[int]]]:
+    """
+    Compute the stored duplicate detection columns for a note's content.
+
+    Returns:
+        ``(minhash, lsh_bands)``, both None for notes without words.
+    """
+    if content_text is not None:
+        text = content_text
+    else:
+        text = _structured_values(content_structured)
+
+    signature = minhash_signature(text)
+    if signature is None:
+        return None, None
+    return signature.tobytes(), band_keys(signature)
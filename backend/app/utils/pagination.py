@@ -0,0 +1,42 @@
+"""
+Opaque cursors for keyset pagination.
+
+A cursor records the sort order of a listing and the sort key of the last row
+of a page, as URL-safe base64 of a small JSON document. The next page starts
+after that key, so deep pages cost as much as the first one and rows inserted
+meanwhile do not shift the pages already seen.
+"""
+
+import base64
+import binascii
+import json
+from typing import Any, List, Sequence
+
+
+def encode_cursor(sort: str, key: Sequence[Any]) -> str:
+    """Encode the sort key of the last row of a page."""
+    payload = json.dumps({"sort": sort, "after": list(key)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str, key_length: int) -> List[Any]:
+    """
+    Decode a cursor produced by ``encode_cursor`` for the same ``sort``.
+
+    Raises:
+        ValueError: the cursor is malformed or belongs to another sort order
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+
+    if not isinstance(payload, dict):
+        raise ValueError("Invalid cursor")
+    if payload.get("sort") != sort:
+        raise ValueError("Cursor does not match the requested sort order")
+    key = payload.get("after")
+    if not isinstance(key, list) or len(key) != key_length:
+        raise ValueError("Invalid cursor")
+    return key
@@ -0,0 +1,38 @@
+"""
+Helpers for building LIKE and trigram similarity filters.
+
+User input is escaped before it is wrapped in ``%`` wildcards so that
+characters such as ``%`` and ``_`` are matched literally. The patterns are
+meant for columns backed by ``pg_trgm`` GIN indexes, which serve both
+``LIKE``/``ILIKE`` and the ``%`` / ``<%`` similarity operators.
+"""
+
+# Same escape character SQLAlchemy uses for ``autoescape=True``
+LIKE_ESCAPE_CHAR = "/"
+
+
+def escape_like(value: str) -> str:
+    """
+    Escape LIKE wildcards in a user supplied string.
+
+    Args:
+        value: Raw search text
+
+    Returns:
+        The text with ``/``, ``%`` and ``_`` escaped using ``LIKE_ESCAPE_CHAR``
+    """
+    return (
+        value.replace(LIKE_ESCAPE_CHAR, LIKE_ESCAPE_CHAR * 2)
+        .replace("%", LIKE_ESCAPE_CHAR + "%")
+        .replace("_", LIKE_ESCAPE_CHAR + "_")
+    )
+
+
+def contains_pattern(value: str) -> str:
+    """Build an escaped ``%value%`` pattern for substring matching."""
+    return f"%{escape_like(value)}%"
+
+
+def prefix_pattern(value: str) -> str:
+    """Build an escaped ``value%`` pattern for prefix matching."""
+    return f"{escape_like(value)}%"
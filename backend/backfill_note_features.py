@@ -0,0 +1,94 @@
+"""
+Backfill the note feature columns (todo_done, todo_open, feature_flags).
+Run this after applying Alembic migration 9c0d1e2f3a4b. Notes saved after the
+migration are kept up to date automatically, so the script is safe to re-run.
+
+Usage:
+    python backfill_note_features.py [--batch-size 1000]
+"""
+import argparse
+import os
+import sys
+
+# Add the backend directory to path to import app modules
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import bindparam, select, update
+
+from app.core.database import SessionLocal
+from app.models import Note
+from app.utils.note_features import extract_note_features
+
+notes = Note.__table__
+
+# Keep updated_at untouched: a backfill is not a user edit
+update_features = (
+    update(notes)
+    .where(notes.c.id == bindparam("note_id"))
+    .values(
+        todo_done=bindparam("todo_done"),
+        todo_open=bindparam("todo_open"),
+        feature_flags=bindparam("feature_flags"),
+        updated_at=notes.c.updated_at,
+    )
+)
+
+
+def backfill_note_features(batch_size: int) -> int:
+    """Recompute features for every note in id order; returns rows changed."""
+    db = SessionLocal()
+    last_id = 0
+    changed = 0
+
+    try:
+        while True:
+            rows = db.execute(
+                select(
+                    notes.c.id,
+                    notes.c.content_text,
+                    notes.c.content_structured,
+                    notes.c.todo_done,
+                    notes.c.todo_open,
+                    notes.c.feature_flags,
+                )
+                .where(notes.c.id > last_id)
+                .order_by(notes.c.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+
+            params = []
+            for row in rows:
+                features = extract_note_features(
+                    row.content_text, row.content_structured
+                )
+                current = {
+                    "todo_done": row.todo_done,
+                    "todo_open": row.todo_open,
+                    "feature_flags": row.feature_flags,
+                }
+                if features != current:
+                    params.append({"note_id": row.id, **features})
+
+            if params:
+                db.execute(update_features, params)
+            db.commit()
+
+            changed += len(params)
+            last_id = rows[-1].id
+            print(f"Processed notes up to id {last_id} ({changed} updated)")
+
+        return changed
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill note feature columns")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    print("Starting note feature backfill...")
+    total = backfill_note_features(args.batch_size)
+    print(f"Backfill completed: {total} notes updated")
@@ -0,0 +1,88 @@
+"""
+Backfill MinHash signatures and LSH band keys (minhash, lsh_bands) of notes.
+Run this after applying Alembic migration 2f3a4b5c6d7e. Notes saved after the
+migration are kept up to date automatically, so the script is safe to re-run.
+
+Usage:
+    python backfill_note_minhash.py [--batch-size 1000]
+"""
+import argparse
+import os
+import sys
+
+# Add the backend directory to path to import app modules
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import bindparam, select, update
+
+from app.core.database import SessionLocal
+from app.models import Note
+from app.utils.minhash import note_signature
+
+notes = Note.__table__
+
+# Keep updated_at untouched: a backfill is not a user edit
+update_signature = (
+    update(notes)
+    .where(notes.c.id == bindparam("note_id"))
+    .values(
+        minhash=bindparam("minhash"),
+        lsh_bands=bindparam("lsh_bands"),
+        updated_at=notes.c.updated_at,
+    )
+)
+
+
+def backfill_note_minhash(batch_size: int) -> int:
+    """Compute signatures for every note in id order; returns rows changed."""
+    db = SessionLocal()
+    last_id = 0
+    changed = 0
+
+    try:
+        while True:
+            rows = db.execute(
+                select(
+                    notes.c.id,
+                    notes.c.content_text,
+                    notes.c.content_structured,
+                    notes.c.minhash,
+                )
+                .where(notes.c.id > last_id)
+                .order_by(notes.c.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+
+            params = []
+            for row in rows:
+                minhash, lsh_bands = note_signature(
+                    row.content_text, row.content_structured
+                )
+                if minhash != (bytes(row.minhash) if row.minhash else None):
+                    params.append(
+                        {"note_id": row.id, "minhash": minhash, "lsh_bands": lsh_bands}
+                    )
+
+            if params:
+                db.execute(update_signature, params)
+            db.commit()
+
+            changed += len(params)
+            last_id = rows[-1].id
+            print(f"Processed notes up to id {last_id} ({changed} updated)")
+
+        return changed
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill note MinHash signatures")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    print("Starting note MinHash backfill...")
+    total = backfill_note_minhash(args.batch_size)
+    print(f"Backfill completed: {total} notes updated")
@@ -0,0 +1 @@
+"""Performance benchmarks for the notes2gogo backend (run as scripts, not tests)."""
@@ -0,0 +1,85 @@
+"""
+Benchmark near-duplicate detection on a synthetic corpus with copied notes.
+
+Loads a corpus with benchmarks.corpus in which ``--duplicates`` of the notes
+are lightly edited copies of earlier ones (unless --user-id is given), then
+times MinHash signature computation, the per-note duplicate lookup and the
+account duplicate report.
+
+Usage:
+    python -m benchmarks.duplicates --notes 100000 --duplicates 0.1
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timezone
+
+from app.core.database import SessionLocal
+from app.models import Note
+from app.services.duplicates import DuplicateService
+from app.utils.minhash import note_signature
+from benchmarks.corpus import CorpusGenerator, load_corpus
+from benchmarks.search_backends import percentile
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--notes", type=int, default=100000, help="Notes to load")
+    parser.add_argument("--user-id", type=int, help="Benchmark an existing user")
+    parser.add_argument(
+        "--duplicates", type=float, default=0.1, help="Share of near-duplicates"
+    )
+    parser.add_argument("--lookups", type=int, default=200, help="Per-note lookups")
+    parser.add_argument("--seed", type=int, default=42, help="Corpus seed")
+    args = parser.parse_args()
+
+    generator = CorpusGenerator(args.seed, duplicate_ratio=args.duplicates)
+    now = datetime.now(timezone.utc)
+    sample = [generator.note(i, now) for i in range(1000)]
+    start = time.perf_counter()
+    for note in sample:
+        note_signature(note["content_text"], note["content_structured"])
+    signature_ms = (time.perf_counter() - start) * 1000 / len(sample)
+
+    db = SessionLocal()
+    try:
+        user_id = args.user_id
+        if user_id is None:
+            print(f"Loading {args.notes} notes ({args.duplicates:.0%} duplicates)...")
+            user_id = load_corpus(db, generator, args.notes)
+
+        service = DuplicateService(db, user_id)
+        start = time.perf_counter()
+        groups = service.report()
+        report_s = time.perf_counter() - start
+
+        note_ids = [
+            note_id
+            for (note_id,) in db.query(Note.id).filter(Note.user_id == user_id).all()
+        ]
+        rng = random.Random(args.seed)
+        lookups = []
+        for note_id in rng.sample(note_ids, min(args.lookups, len(note_ids))):
+            note = db.get(Note, note_id)
+            start = time.perf_counter()
+            service.duplicates_of(note)
+            lookups.append((time.perf_counter() - start) * 1000)
+    finally:
+        db.close()
+
+    print(f"Duplicate detection (user {user_id}, {len(note_ids)} notes)")
+    print("=" * 50)
+    print(f"signature per note       {signature_ms:>10.3f} ms")
+    print(
+        f"per-note lookup          p50 {percentile(lookups, 50):.2f} ms, "
+        f"p95 {percentile(lookups, 95):.2f} ms, p99 {percentile(lookups, 99):.2f} ms"
+    )
+    print(f"account report           {report_s:>10.2f} s")
+    print(
+        f"groups                   {len(groups):>10} "
+        f"({sum(len(group) - 1 for group in groups)} removable notes)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Benchmark field: key-path search on structured notes as the corpus grows.
+
+For each size in --sizes, loads a corpus with benchmarks.corpus for a new user
+and times three ways of finding notes by a section value sampled from that
+user's structured notes:
+
+- field:"Section"="value"   containment (@>), served by the jsonb_path_ops index
+- field:"Section"~word      jsonb_path_exists with like_regex
+- value                     substring match over the whole note, as the notes
+                            list search does (trigram index on the JSON text)
+
+Containment lookups should stay flat while the corpus grows; the other two
+depend on how many notes contain the word.
+
+Usage:
+    python -m benchmarks.field_search --sizes 10000,50000,100000
+"""
+import argparse
+import random
+import time
+
+from sqlalchemy import func, select
+
+from app.api.notes import _text_match_note_ids
+from app.core.database import SessionLocal
+from app.models import Note
+from app.schemas import SearchRequest
+from app.services.search import SearchService
+from app.services.search_backend import PostgresSearchBackend
+from benchmarks.corpus import CorpusGenerator, load_corpus
+from benchmarks.search_backends import percentile
+
+
+def sample_sections(db, user_id: int, count: int, seed: int) -> list:
+    """(section, value) pairs of string-valued sections of random notes."""
+    rows = (
+        db.query(Note.content_structured)
+        .filter(Note.user_id == user_id, Note.content_structured.isnot(None))
+        .order_by(func.random())
+        .limit(count * 2)
+        .all()
+    )
+    rng = random.Random(seed)
+    pairs = []
+    for (content,) in rows:
+        sections = [
+            (key, value) for key, value in content.items() if isinstance(value, str)
+        ]
+        if sections:
+            pairs.append(rng.choice(sections))
+    return pairs[:count]
+
+
+def time_lookups(run, lookups: list) -> list:
+    samples = []
+    for lookup in lookups:
+        start = time.perf_counter()
+        run(lookup)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--sizes", default="10000,50000,100000", help="Comma-separated note counts"
+    )
+    parser.add_argument("--lookups", type=int, default=200, help="Lookups per form")
+    parser.add_argument("--seed", type=int, default=42, help="Corpus seed")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    rows = []
+    db = SessionLocal()
+    try:
+        for size in sizes:
+            print(f"Loading {size} notes...")
+            user_id = load_corpus(db, CorpusGenerator(args.seed), size)
+            service = SearchService(db, user_id, backend=PostgresSearchBackend())
+            pairs = sample_sections(db, user_id, args.lookups, args.seed)
+
+            def search(query: str):
+                service.search(SearchRequest(query=query, per_page=20))
+
+            forms = {
+                "field =": time_lookups(
+                    lambda pair: search(f'field:"{pair[0]}"="{pair[1]}"'), pairs
+                ),
+                "field ~": time_lookups(
+                    lambda pair: search(f'field:"{pair[0]}"~{pair[1].split()[0]}'),
+                    pairs,
+                ),
+                "substring": time_lookups(
+                    lambda pair: db.execute(
+                        select(Note.id)
+                        .where(
+                            Note.id.in_(
+                                _text_match_note_ids(db, user_id, pair[1], False)
+                            )
+                        )
+                        .limit(20)
+                    ).all(),
+                    pairs,
+                ),
+            }
+            rows.extend((size, form, samples) for form, samples in forms.items())
+    finally:
+        db.close()
+
+    print("Structured key-path lookups")
+    print("=" * 50)
+    print(f"{'notes':>8} {'form':<10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    print("-" * 50)
+    for size, form, samples in rows:
+        print(
+            f"{size:>8} {form:<10} {percentile(samples, 50):>9.2f} "
+            f"{percentile(samples, 95):>9.2f} {percentile(samples, 99):>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
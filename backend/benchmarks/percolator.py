@@ -0,0 +1,162 @@
+"""
+Benchmark matching single notes against 1,000 saved searches per user.
+
+Seeds a synthetic user with tags and a set of saved searches (text terms,
+intitle:, tag: and filter-only queries), then measures compiling the user's
+matcher and percolating individual notes. For a few notes the matches are
+checked against running every saved search in SQL, restricted to that note,
+which is also the baseline the percolator replaces.
+
+Usage:
+    python -m benchmarks.percolator --notes 5000 --searches 1000
+"""
+import argparse
+import random
+import statistics
+import time
+
+from app.core.database import SessionLocal
+from app.models import Note, SavedSearch
+from app.schemas import SearchRequest
+from app.services.materialized_search import MaterializedSearchService
+from app.services.percolator import PercolatorService
+from benchmarks.search_backends import VOCABULARY, percentile, seed_user
+from benchmarks.search_facets import seed_tags_and_folders
+
+FILTERS = ["has:code", "has:links", "todo:incomplete", "todo:complete"]
+
+
+def random_query(rng: random.Random, tag_count: int) -> dict:
+    """One saved search definition drawn from a rough mix of query shapes."""
+    kind = rng.random()
+    words = " ".join(rng.sample(VOCABULARY, rng.randint(1, 3)))
+    tag = f"tag{rng.randint(1, tag_count)}"
+    if kind < 0.5:
+        query = words
+    elif kind < 0.7:
+        query = f"intitle:{rng.choice(VOCABULARY)}"
+    elif kind < 0.85:
+        query = f"{rng.choice(VOCABULARY)} tag:{tag}"
+    elif kind < 0.925:
+        query = f"{rng.choice(FILTERS)} tag:{tag}"
+    else:
+        query = f"tag:{tag}"
+    return SearchRequest(query=query).model_dump(mode="json")
+
+
+def seed_saved_searches(db, user_id: int, count: int, tag_count: int, seed: int):
+    rng = random.Random(seed)
+    db.bulk_insert_mappings(
+        SavedSearch,
+        [
+            {
+                "name": f"bench search {i}",
+                "search_query": random_query(rng, tag_count),
+                "user_id": user_id,
+            }
+            for i in range(count)
+        ],
+    )
+    db.commit()
+
+
+def sql_matches(db, user_id: int, note_id: int) -> list:
+    """Baseline: evaluate every saved search in SQL against one note."""
+    service = MaterializedSearchService(db, user_id)
+    matched = []
+    saved_searches = (
+        db.query(SavedSearch.id, SavedSearch.search_query)
+        .filter(SavedSearch.user_id == user_id)
+        .order_by(SavedSearch.id)
+        .all()
+    )
+    for saved_search_id, search_query in saved_searches:
+        query = service._match_query(SearchRequest(**search_query))
+        if query.filter(Note.id == note_id).first() is not None:
+            matched.append(saved_search_id)
+    return matched
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--notes", type=int, default=5000, help="Notes to seed")
+    parser.add_argument("--tags", type=int, default=200, help="Tags to seed")
+    parser.add_argument("--searches", type=int, default=1000, help="Saved searches")
+    parser.add_argument("--sample", type=int, default=200, help="Notes to percolate")
+    parser.add_argument("--verify", type=int, default=5, help="Notes checked in SQL")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        user_id = seed_user(db, args.notes, args.seed)
+        seed_tags_and_folders(db, user_id, args.tags, 20)
+        seed_saved_searches(db, user_id, args.searches, args.tags, args.seed)
+
+        note_ids = [
+            row.id for row in db.query(Note.id).filter(Note.user_id == user_id).all()
+        ]
+        sample = random.Random(args.seed).sample(
+            note_ids, min(args.sample, len(note_ids))
+        )
+        service = PercolatorService(db, user_id)
+
+        start = time.perf_counter()
+        percolator = service.compile()
+        compile_ms = (time.perf_counter() - start) * 1000
+        service.get_percolator()
+
+        lookup, load, match, matched = [], [], [], []
+        for note_id in sample:
+            start = time.perf_counter()
+            service.get_percolator()
+            lookup.append((time.perf_counter() - start) * 1000)
+
+            start = time.perf_counter()
+            note = service.load_note(note_id)
+            load.append((time.perf_counter() - start) * 1000)
+
+            start = time.perf_counter()
+            matched.append(percolator.match(note))
+            match.append((time.perf_counter() - start) * 1000)
+
+        candidates = statistics.mean(
+            len(percolator.candidates(service.load_note(note_id)))
+            for note_id in sample[:20]
+        )
+
+        print(f"Percolator benchmark (user {user_id}, {args.searches} saved searches)")
+        print("=" * 60)
+        print(f"Compile all saved searches: {compile_ms:9.2f} ms")
+        print(f"Unanchored searches:        {len(percolator.unanchored):9d}")
+        print(f"Mean candidates per note:   {candidates:9.1f}")
+        print(f"Mean matches per note:      {statistics.mean(map(len, matched)):9.1f}")
+        print("-" * 60)
+        print(f"{'phase':<28} {'p50 ms':>9} {'p95 ms':>9} {'mean':>9}")
+        for label, values in (
+            ("cached matcher lookup", lookup),
+            ("load note", load),
+            ("match in memory", match),
+            ("total per note", [sum(v) for v in zip(lookup, load, match)]),
+        ):
+            print(
+                f"{label:<28} {percentile(values, 50):>9.2f} "
+                f"{percentile(values, 95):>9.2f} {statistics.mean(values):>9.2f}"
+            )
+        print("-" * 60)
+
+        baseline = []
+        for note_id, expected in zip(sample[: args.verify], matched):
+            start = time.perf_counter()
+            actual = sql_matches(db, user_id, note_id)
+            baseline.append((time.perf_counter() - start) * 1000)
+            status = "ok" if actual == expected else f"MISMATCH {actual} != {expected}"
+            print(f"note {note_id}: {len(actual)} matches in SQL ({status})")
+        if baseline:
+            print(f"Re-running every search in SQL: {statistics.mean(baseline):.2f} ms")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
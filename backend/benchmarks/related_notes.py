@@ -0,0 +1,118 @@
+"""
+Benchmark the related notes TF-IDF engine on one large synthetic user.
+
+Builds a TfidfMatrix from benchmarks.corpus notes in memory (no database
+needed), then times related() on random notes, incremental writes with and
+without a pending delta, compaction, and a snapshot save and load.
+
+Usage:
+    python -m benchmarks.related_notes --notes 50000 --queries 500
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from app.models import Note
+from app.services.related_notes import TfidfMatrix
+from app.services.search_backend import note_body_text
+from benchmarks.corpus import CorpusGenerator
+from benchmarks.search_backends import percentile
+
+
+def body(note: dict) -> str:
+    return note_body_text(
+        Note(
+            content_text=note["content_text"],
+            content_structured=note["content_structured"],
+        )
+    )
+
+
+def time_queries(matrix: TfidfMatrix, note_ids, limit: int) -> list:
+    samples = []
+    for note_id in note_ids:
+        start = time.perf_counter()
+        matrix.related(note_id, limit)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def print_row(label: str, samples) -> None:
+    print(
+        f"{label:<28} {percentile(samples, 50):>8.2f} {percentile(samples, 95):>8.2f} "
+        f"{percentile(samples, 99):>8.2f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--notes", type=int, default=50000, help="Notes per user")
+    parser.add_argument("--queries", type=int, default=500, help="related() calls")
+    parser.add_argument("--writes", type=int, default=500, help="Incremental writes")
+    parser.add_argument("--limit", type=int, default=5, help="Neighbours per query")
+    parser.add_argument("--seed", type=int, default=42, help="Corpus seed")
+    args = parser.parse_args()
+
+    generator = CorpusGenerator(args.seed)
+    now = datetime.now(timezone.utc)
+    rng = random.Random(args.seed)
+
+    print(f"Generating {args.notes} notes (seed {args.seed})...")
+    notes = [(n["title"], body(n)) for n in generator.notes(args.notes, now)]
+
+    matrix = TfidfMatrix()
+    start = time.perf_counter()
+    for note_id, (title, text) in enumerate(notes, 1):
+        matrix.add(note_id, title, text)
+    build_s = time.perf_counter() - start
+    start = time.perf_counter()
+    matrix.compact()
+    compact_s = time.perf_counter() - start
+
+    print(
+        f"Related notes ({args.notes} notes, {len(matrix.vocabulary)} terms, "
+        f"{len(matrix.rows)} non-zeros)"
+    )
+    print(f"Build: {build_s:.2f} s, compaction: {compact_s * 1000:.0f} ms")
+    print()
+    print(f"{'operation':<28} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    print("-" * 55)
+
+    query_ids = [rng.randint(1, args.notes) for _ in range(args.queries)]
+    print_row("related (compacted)", time_queries(matrix, query_ids, args.limit))
+
+    # Rewrite random notes with other notes' text; every write is a delta row
+    writes = []
+    for _ in range(args.writes):
+        title, text = notes[rng.randrange(args.notes)]
+        start = time.perf_counter()
+        matrix.add(rng.randint(1, args.notes), title, text)
+        writes.append((time.perf_counter() - start) * 1000)
+    print_row("write", writes)
+    print_row(
+        f"related ({matrix.row_count - matrix.compacted_rows} delta rows)",
+        time_queries(matrix, query_ids, args.limit),
+    )
+
+    start = time.perf_counter()
+    matrix.compact()
+    print(f"{'compaction':<28} {(time.perf_counter() - start) * 1000:>8.2f}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "user_1.related.npz")
+        start = time.perf_counter()
+        matrix.save(path)
+        save_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        TfidfMatrix.load(path)
+        load_ms = (time.perf_counter() - start) * 1000
+        size_mb = os.path.getsize(path) / 1024**2
+    print(f"{'snapshot save':<28} {save_ms:>8.2f}")
+    print(f"{'snapshot load':<28} {load_ms:>8.2f}   ({size_mb:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Benchmark the Postgres and in-memory BM25 search backends on the same queries.
+
+Seeds a synthetic user (unless --user-id is given), then times every query in
+the query set against each backend and prints latency percentiles.
+
+Usage:
+    python -m benchmarks.search_backends --notes 20000 --repeat 20
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+
+from app.core.database import SessionLocal
+from app.models import Note, User
+from app.schemas import NoteType
+from app.services.search_backend import BM25SearchBackend, PostgresSearchBackend
+
+VOCABULARY = (
+    "budget meeting project review design report client invoice roadmap sprint "
+    "release deploy database index query latency cache backup migration schema "
+    "holiday travel flight hotel recipe dinner garden book movie workout doctor"
+).split()
+
+QUERY_SET = [
+    "budget",
+    "meeting review",
+    "database index latency",
+    "travel hotel",
+    "release deploy migration",
+    "recipe",
+    "client invoice budget",
+    "nonexistentterm",
+]
+
+
+def seed_user(db, note_count: int, seed: int) -> int:
+    """Create a benchmark user with ``note_count`` synthetic notes."""
+    rng = random.Random(seed)
+    user = User(
+        email=f"bench-{seed}-{time.time_ns()}@example.com",
+        username=f"bench{time.time_ns() % 10**12}",
+        hashed_password="benchmark",
+    )
+    db.add(user)
+    db.flush()
+
+    batch = []
+    for i in range(note_count):
+        words = rng.choices(VOCABULARY, k=rng.randint(20, 200))
+        batch.append(
+            {
+                "title": " ".join(rng.sample(VOCABULARY, 3)),
+                "note_type": NoteType.TEXT,
+                "content_text": " ".join(words),
+                "user_id": user.id,
+            }
+        )
+        if len(batch) == 1000:
+            db.bulk_insert_mappings(Note, batch)
+            batch = []
+    if batch:
+        db.bulk_insert_mappings(Note, batch)
+
+    db.commit()
+    db.execute(text("ANALYZE notes"))
+    return user.id
+
+
+def time_backend(db, backend, user_id: int, repeat: int) -> dict:
+    """Return per-query latency samples in milliseconds."""
+    # Warm up (builds the in-memory index for the BM25 backend)
+    start = time.perf_counter()
+    backend.query(db, user_id, QUERY_SET[0], limit=20)
+    warmup_ms = (time.perf_counter() - start) * 1000
+
+    samples = {query: [] for query in QUERY_SET}
+    for _ in range(repeat):
+        for query in QUERY_SET:
+            start = time.perf_counter()
+            backend.query(db, user_id, query, limit=20)
+            samples[query].append((time.perf_counter() - start) * 1000)
+
+    return {"warmup_ms": warmup_ms, "samples": samples}
+
+
+def percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--notes", type=int, default=10000, help="Notes to seed")
+    parser.add_argument("--user-id", type=int, help="Benchmark an existing user")
+    parser.add_argument("--repeat", type=int, default=10, help="Runs per query")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        user_id = args.user_id or seed_user(db, args.notes, args.seed)
+        backends = [PostgresSearchBackend(), BM25SearchBackend()]
+
+        print(f"Search backend benchmark (user {user_id})")
+        print("=" * 72)
+        print(f"{'backend':<10} {'query':<28} {'p50 ms':>9} {'p95 ms':>9} {'mean':>9}")
+        print("-" * 72)
+
+        for backend in backends:
+            result = time_backend(db, backend, user_id, args.repeat)
+            for query, values in result["samples"].items():
+                print(
+                    f"{backend.name:<10} {query[:28]:<28} "
+                    f"{percentile(values, 50):>9.2f} {percentile(values, 95):>9.2f} "
+                    f"{statistics.mean(values):>9.2f}"
+                )
+            print(
+                f"{backend.name:<10} {'(first query / index build)':<28} "
+                f"{result['warmup_ms']:>9.2f}"
+            )
+            print("-" * 72)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
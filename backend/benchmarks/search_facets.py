@@ -0,0 +1,128 @@
+"""
+Measure the overhead of facet counts on top of a plain search.
+
+Seeds a synthetic user with tags and folders (unless --user-id is given), then
+runs every query in the query set through SearchService with and without
+facets and prints latency percentiles for both.
+
+Usage:
+    python -m benchmarks.search_facets --notes 20000 --repeat 20
+"""
+import argparse
+import statistics
+import time
+
+from sqlalchemy import text
+
+from app.core.database import SessionLocal, engine
+from app.schemas import SearchFacet, SearchRequest
+from app.services.search import SearchService
+from app.services.search_backend import PostgresSearchBackend
+from benchmarks.search_backends import QUERY_SET, percentile, seed_user
+
+
+def seed_tags_and_folders(db, user_id: int, tag_count: int, folder_count: int):
+    """Attach tags (one in 50, so ~4 per note at 200 tags) and folders to notes."""
+    params = {"user_id": user_id, "tags": tag_count, "folders": folder_count}
+    db.execute(
+        text(
+            "INSERT INTO tags (name, user_id) "
+            "SELECT 'tag' || i, :user_id FROM generate_series(1, :tags) AS i"
+        ),
+        params,
+    )
+    db.execute(
+        text(
+            "INSERT INTO folders (name, user_id) "
+            "SELECT 'folder' || i, :user_id FROM generate_series(1, :folders) AS i"
+        ),
+        params,
+    )
+    db.execute(
+        text(
+            "INSERT INTO note_tags (note_id, tag_id) "
+            "SELECT n.id, t.id FROM notes n JOIN tags t ON t.user_id = n.user_id "
+            "WHERE n.user_id = :user_id AND (n.id + t.id) % 50 = 0"
+        ),
+        params,
+    )
+    db.execute(
+        text(
+            "UPDATE notes SET folder_id = f.id FROM folders f "
+            "WHERE notes.user_id = :user_id AND f.user_id = :user_id "
+            "AND f.name = 'folder' || (notes.id % :folders + 1)"
+        ),
+        params,
+    )
+    db.commit()
+
+    # Settle the visibility map so note_tags can be read with index-only scans
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("VACUUM ANALYZE notes, note_tags, tags, folders"))
+
+
+def time_search(db, user_id: int, facets, repeat: int) -> dict:
+    """Return per-query latency samples in milliseconds."""
+    service = SearchService(db, user_id, backend=PostgresSearchBackend())
+    samples = {query: [] for query in QUERY_SET}
+    for _ in range(repeat):
+        for query in QUERY_SET:
+            request = SearchRequest(query=query, facets=facets)
+            start = time.perf_counter()
+            service.search(request)
+            samples[query].append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--notes", type=int, default=10000, help="Notes to seed")
+    parser.add_argument("--tags", type=int, default=200, help="Tags to seed")
+    parser.add_argument("--folders", type=int, default=20, help="Folders to seed")
+    parser.add_argument("--user-id", type=int, help="Benchmark an existing user")
+    parser.add_argument("--repeat", type=int, default=10, help="Runs per query")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        user_id = args.user_id
+        if user_id is None:
+            user_id = seed_user(db, args.notes, args.seed)
+            seed_tags_and_folders(db, user_id, args.tags, args.folders)
+
+        variants = {
+            "plain": None,
+            "all facets": list(SearchFacet),
+        }
+
+        print(f"Facet overhead benchmark (user {user_id})")
+        print("=" * 72)
+        print(f"{'variant':<12} {'query':<26} {'p50 ms':>9} {'p95 ms':>9} {'mean':>9}")
+        print("-" * 72)
+
+        means = {}
+        for label, facets in variants.items():
+            samples = time_search(db, user_id, facets, args.repeat)
+            for query, values in samples.items():
+                print(
+                    f"{label:<12} {query[:26]:<26} "
+                    f"{percentile(values, 50):>9.2f} {percentile(values, 95):>9.2f} "
+                    f"{statistics.mean(values):>9.2f}"
+                )
+            means[label] = statistics.mean(
+                value for values in samples.values() for value in values
+            )
+            print("-" * 72)
+
+        overhead = means["all facets"] - means["plain"]
+        print(
+            f"Mean facet overhead: {overhead:.2f} ms "
+            f"({overhead / means['plain'] * 100:+.1f}%)"
+        )
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
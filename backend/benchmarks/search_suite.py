@@ -0,0 +1,297 @@
+"""
+Replayable search benchmark over a synthetic corpus.
+
+Loads a corpus with benchmarks.corpus (unless --user-id is given), builds a
+query mix covering text terms of different frequencies, operators, tag and
+date filters, sort modes, deep pages and facets, and runs it through
+SearchService. Each query type reports p50/p95/p99 latency and the rows its
+statements scanned, taken from one extra ``EXPLAIN (ANALYZE, BUFFERS)`` run.
+
+Results are written as JSON together with the query mix, so a run on another
+commit can replay exactly the same requests (--mix) and print the change per
+query type (--compare).
+
+Usage:
+    python -m benchmarks.search_suite --notes 100000 --output before.json
+    python -m benchmarks.search_suite --user-id 12 --mix before.json \\
+        --compare before.json --output after.json
+"""
+import argparse
+import json
+import random
+import subprocess
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+
+from app.core.database import SessionLocal
+from app.schemas import SearchFacet, SearchRequest, SearchSortBy
+from app.services.search import SearchService
+from app.services.search_backend import PostgresSearchBackend
+from app.services.search_profiler import Explain, SearchProfile
+from benchmarks.corpus import CorpusGenerator, load_corpus
+from benchmarks.search_backends import percentile
+
+# Relative frequency ranks (0 = most frequent word) of common, mid and rare terms
+COMMON_RANKS = (0.0, 0.0005)
+MID_RANKS = (0.005, 0.05)
+RARE_RANKS = (0.2, 0.9)
+
+
+def build_query_mix(generator: CorpusGenerator, seed: int, per_type: int) -> List[dict]:
+    """
+    Return ``per_type`` search requests for every query type.
+
+    Requests are plain dicts so the mix can be stored and replayed; absolute
+    dates are resolved now and stay fixed on replay.
+    """
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+
+    def word(ranks) -> str:
+        return generator.word_at(rng.uniform(*ranks))
+
+    def tag(top: int = 20) -> str:
+        return rng.choice(generator.tag_names[:top])
+
+    builders = {
+        "term_common": lambda: {"query": word(COMMON_RANKS)},
+        "term_mid": lambda: {"query": word(MID_RANKS)},
+        "term_rare": lambda: {"query": word(RARE_RANKS)},
+        "multi_term": lambda: {"query": f"{word(COMMON_RANKS)} {word(MID_RANKS)}"},
+        "phrase": lambda: {"query": f'"{word(COMMON_RANKS)} {word(COMMON_RANKS)}"'},
+        "intitle": lambda: {"query": f"intitle:{word(MID_RANKS)}"},
+        "tag_operator": lambda: {"query": f"{word(COMMON_RANKS)} tag:{tag()}"},
+        "exclude_tag": lambda: {"query": f"{word(MID_RANKS)} -tag:{tag(5)}"},
+        "tag_filter_and": lambda: {
+            "query": word(COMMON_RANKS),
+            "tags": [tag(5), tag(50)],
+            "tag_mode": "and",
+        },
+        "tag_filter_or": lambda: {
+            "query": word(MID_RANKS),
+            "tags": [tag(), tag(), tag()],
+            "tag_mode": "or",
+        },
+        "filter_only_tag": lambda: {"query": f"tag:{tag()}"},
+        "has_feature": lambda: {
+            "query": f"{rng.choice(['has:code', 'has:links', 'has:tables'])} "
+            f"{word(COMMON_RANKS)}"
+        },
+        "todo": lambda: {
+            "query": f"todo:{rng.choice(['incomplete', 'complete'])}",
+        },
+        "date_operator": lambda: {
+            "query": f"{word(COMMON_RANKS)} "
+            f"{rng.choice(['created', 'updated'])}:>=last-"
+            f"{rng.choice(['week', 'month', 'year'])}"
+        },
+        "date_filter": lambda: {
+            "query": word(MID_RANKS),
+            "created_after": (now - timedelta(days=rng.randint(30, 400))).isoformat(),
+            "created_before": (now - timedelta(days=rng.randint(0, 29))).isoformat(),
+        },
+        "deep_page": lambda: {"query": word(COMMON_RANKS), "page": rng.randint(10, 50)},
+        "facets": lambda: {
+            "query": word(MID_RANKS),
+            "facets": [facet.value for facet in SearchFacet],
+        },
+    }
+    for sort_by in SearchSortBy:
+        builders[f"sort_{sort_by.value}"] = lambda sort_by=sort_by: {
+            "query": word(COMMON_RANKS),
+            "sort_by": sort_by.value,
+        }
+
+    mix = []
+    for query_type, build in builders.items():
+        for _ in range(per_type):
+            request = build()
+            # Validate now so a bad mix fails before anything is timed
+            SearchRequest(**request)
+            mix.append({"type": query_type, "request": request})
+    return mix
+
+
+def rows_scanned(plan: dict) -> int:
+    """Rows read from tables by a plan node and its children, over all loops."""
+    total = 0
+    if "Relation Name" in plan:
+        rows = (
+            plan.get("Actual Rows", 0)
+            + plan.get("Rows Removed by Filter", 0)
+            + plan.get("Rows Removed by Index Recheck", 0)
+        )
+        total += rows * plan.get("Actual Loops", 1)
+    for child in plan.get("Plans", []):
+        total += rows_scanned(child)
+    return total
+
+
+def explain_search(db, user_id: int, request: SearchRequest) -> Dict[str, int]:
+    """Run one search with statement capture and measure what it read."""
+    profile = SearchProfile(capture_statements=True)
+    service = SearchService(
+        db, user_id, backend=PostgresSearchBackend(), profile=profile
+    )
+    service.search(request)
+
+    scanned = buffers = 0
+    for statement in profile.statements.values():
+        [[result]] = db.execute(Explain(statement, json=True)).all()
+        plan = result[0]["Plan"]
+        scanned += rows_scanned(plan)
+        buffers += plan.get("Shared Hit Blocks", 0) + plan.get("Shared Read Blocks", 0)
+    return {"rows_scanned": scanned, "shared_buffers": buffers}
+
+
+def run_mix(db, user_id: int, mix: List[dict], repeat: int) -> dict:
+    """Time every request in the mix and aggregate the samples per query type."""
+    service = SearchService(db, user_id, backend=PostgresSearchBackend())
+    requests = [SearchRequest(**entry["request"]) for entry in mix]
+
+    # Warm up caches so the first query type is not penalised
+    for request in requests:
+        service.search(request)
+
+    latencies = defaultdict(list)
+    scans = defaultdict(list)
+    buffers = defaultdict(list)
+    totals = defaultdict(list)
+    for entry, request in zip(mix, requests):
+        measured = explain_search(db, user_id, request)
+        scans[entry["type"]].append(measured["rows_scanned"])
+        buffers[entry["type"]].append(measured["shared_buffers"])
+
+    for _ in range(repeat):
+        for entry, request in zip(mix, requests):
+            start = time.perf_counter()
+            _, total, _ = service.search(request)
+            latencies[entry["type"]].append((time.perf_counter() - start) * 1000)
+            totals[entry["type"]].append(total)
+
+    return {
+        query_type: {
+            "queries": len(scans[query_type]),
+            "samples": len(values),
+            "p50_ms": percentile(values, 50),
+            "p95_ms": percentile(values, 95),
+            "p99_ms": percentile(values, 99),
+            "mean_rows_scanned": sum(scans[query_type]) / len(scans[query_type]),
+            "mean_shared_buffers": sum(buffers[query_type])
+            / len(buffers[query_type]),
+            "mean_total": sum(totals[query_type]) / len(totals[query_type]),
+        }
+        for query_type, values in latencies.items()
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_results(results: Dict[str, dict], baseline: Optional[Dict[str, dict]] = None):
+    print(
+        f"{'query type':<22} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+        f"{'rows scanned':>13} {'buffers':>9}"
+        + (f" {'Δp50':>8} {'Δp95':>8}" if baseline else "")
+    )
+    print("-" * (72 + (18 if baseline else 0)))
+    for query_type, stats in results.items():
+        line = (
+            f"{query_type:<22} {stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f} "
+            f"{stats['p99_ms']:>8.2f} {stats['mean_rows_scanned']:>13.0f} "
+            f"{stats['mean_shared_buffers']:>9.0f}"
+        )
+        previous = (baseline or {}).get(query_type)
+        if previous:
+            line += "".join(
+                f" {(stats[key] / previous[key] - 1) * 100:>+7.1f}%"
+                if previous[key]
+                else f" {'n/a':>8}"
+                for key in ("p50_ms", "p95_ms")
+            )
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--notes", type=int, default=10000, help="Notes to load")
+    parser.add_argument("--user-id", type=int, help="Benchmark an existing corpus")
+    parser.add_argument(
+        "--seed", type=int, default=42, help="Corpus seed (must match --user-id's)"
+    )
+    parser.add_argument("--per-type", type=int, default=5, help="Queries per type")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs of the mix")
+    parser.add_argument("--mix", help="Replay the query mix of an earlier result")
+    parser.add_argument("--compare", help="Earlier result to compare against")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    generator = CorpusGenerator(args.seed)
+    if args.mix:
+        with open(args.mix) as f:
+            mix = json.load(f)["mix"]
+    else:
+        mix = build_query_mix(generator, args.seed, args.per_type)
+
+    db = SessionLocal()
+    try:
+        user_id = args.user_id
+        if user_id is None:
+            print(f"Loading {args.notes} notes (seed {args.seed})...")
+            user_id = load_corpus(db, generator, args.notes)
+        note_count = db.execute(
+            text("SELECT count(*) FROM notes WHERE user_id = :user_id"),
+            {"user_id": user_id},
+        ).scalar()
+        server_version = db.execute(text("SHOW server_version")).scalar()
+
+        results = run_mix(db, user_id, mix, args.repeat)
+    finally:
+        db.close()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+
+    print(f"Search suite (user {user_id}, {note_count} notes, commit {git_commit()})")
+    print("=" * (72 + (18 if baseline else 0)))
+    print_results(results, baseline)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {
+                    "meta": {
+                        "commit": git_commit(),
+                        "run_at": datetime.now(timezone.utc).isoformat(),
+                        "user_id": user_id,
+                        "notes": note_count,
+                        "seed": args.seed,
+                        "repeat": args.repeat,
+                        "postgres": server_version,
+                    },
+                    "results": results,
+                    "mix": mix,
+                },
+                f,
+                indent=2,
+            )
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
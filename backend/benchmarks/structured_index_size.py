@@ -0,0 +1,145 @@
+"""
+Compare full-text index size for structured notes: raw JSON text vs. values only.
+
+Builds a temporary table of synthetic structured notes, then indexes it both
+the old way (to_tsvector of content_structured::text) and the new way
+(notes_structured_tsvector, added by migration 8b9c0d1e2f3a) and prints the
+GIN index size, distinct lexeme count and a sample of lexemes that only the
+old form produced. Nothing is written to the notes table.
+
+Usage:
+    python -m benchmarks.structured_index_size --notes 50000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+
+from app.core.database import engine
+
+SECTION_TITLES = [
+    "Summary",
+    "Agenda",
+    "Action Items",
+    "Ingredients",
+    "Steps",
+    "Attendees",
+    "Decisions",
+    "Follow Up",
+    "Links",
+    "Notes",
+]
+
+VOCABULARY = (
+    "budget meeting project review design report client invoice roadmap sprint "
+    "release deploy database index query latency cache backup migration schema "
+    "holiday travel flight hotel recipe dinner garden book movie workout doctor"
+).split()
+
+INDEX_FORMS = {
+    "raw json text": (
+        "setweight(to_tsvector('english', coalesce(content_structured::text, '')), 'B')"
+    ),
+    "values only": "notes_structured_tsvector(content_structured)",
+}
+
+
+def synthetic_note(rng: random.Random) -> dict:
+    """Sections map to a sentence, a list of items or a small nested object."""
+    content = {}
+    for title in rng.sample(SECTION_TITLES, rng.randint(2, 6)):
+        shape = rng.random()
+        if shape < 0.6:
+            content[title] = " ".join(rng.choices(VOCABULARY, k=rng.randint(5, 40)))
+        elif shape < 0.85:
+            content[title] = [
+                " ".join(rng.choices(VOCABULARY, k=rng.randint(2, 6)))
+                for _ in range(rng.randint(2, 8))
+            ]
+        else:
+            content[title] = {
+                "text": " ".join(rng.choices(VOCABULARY, k=rng.randint(3, 10))),
+                "done": rng.random() < 0.5,
+                "priority": rng.randint(1, 5),
+            }
+    return content
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--notes", type=int, default=20000, help="Notes to generate")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    rows = [{"content": json.dumps(synthetic_note(rng))} for _ in range(args.notes)]
+
+    with engine.connect() as conn:
+        conn.execute(
+            text(
+                "CREATE TEMP TABLE structured_size_bench "
+                "(id serial PRIMARY KEY, content_structured jsonb, "
+                "raw_tsv tsvector, values_tsv tsvector)"
+            )
+        )
+        conn.execute(
+            text(
+                "INSERT INTO structured_size_bench (content_structured) "
+                "VALUES (CAST(:content AS jsonb))"
+            ),
+            rows,
+        )
+
+        results = {}
+        for (label, expression), column in zip(
+            INDEX_FORMS.items(), ("raw_tsv", "values_tsv")
+        ):
+            conn.execute(
+                text(f"UPDATE structured_size_bench SET {column} = {expression}")
+            )
+            conn.execute(
+                text(
+                    f"CREATE INDEX ix_bench_{column} ON structured_size_bench "
+                    f"USING gin ({column})"
+                )
+            )
+            results[label] = conn.execute(
+                text(
+                    f"SELECT pg_relation_size('ix_bench_{column}'), "
+                    f"(SELECT count(DISTINCT word) "
+                    f" FROM structured_size_bench, unnest({column}) AS u(word))"
+                )
+            ).one()
+
+        junk = list(
+            conn.execute(
+                text(
+                    "SELECT word FROM structured_size_bench, unnest(raw_tsv) AS u(word) "
+                    "EXCEPT "
+                    "SELECT word FROM structured_size_bench, unnest(values_tsv) AS u(word) "
+                    "ORDER BY 1 LIMIT 10"
+                )
+            ).scalars()
+        )
+        conn.rollback()
+
+    before = results["raw json text"][0]
+    print(f"Structured note index size ({args.notes} synthetic notes)")
+    print("=" * 56)
+    print(f"{'index form':<16} {'GIN size':>14} {'lexemes':>10}")
+    print("-" * 56)
+    for label, (size, lexemes) in results.items():
+        print(f"{label:<16} {size / 1024:>11.0f} KB {lexemes:>10}")
+    print("-" * 56)
+    after = results["values only"][0]
+    print(f"Size change: {(after - before) / before * 100:+.1f}%")
+    print(f"Lexemes only in raw JSON text: {', '.join(junk) or '(none)'}")
+
+
+if __name__ == "__main__":
+    main()
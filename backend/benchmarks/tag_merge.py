@@ -0,0 +1,133 @@
+"""
+Benchmark tag merges as the number of moved associations grows.
+
+For each size in --sizes, creates a user whose notes carry two source tags
+(half the associations each, every note tagged with both) and a target tag
+already on a tenth of the notes, then times:
+
+- per-note   the previous merge: load the source's notes and append the target
+             to each note's tags through the ORM, then delete the source
+- set-based  POST /api/tags/merge's _merge_tags: INSERT ... SELECT ... ON
+             CONFLICT DO NOTHING and two deletes for both sources at once
+
+Each run works on a fresh copy of the data. The per-note merge is skipped
+above --max-per-note associations.
+
+Usage:
+    python -m benchmarks.tag_merge --sizes 10000,100000
+"""
+import argparse
+import time
+
+from sqlalchemy import text
+
+from app.api.tags import _merge_tags
+from app.core.database import SessionLocal
+from app.models import Tag, User
+
+
+def load_tagged_notes(db, associations: int) -> tuple:
+    """Create a user with notes tagged by two sources; returns tag ids."""
+    user = User(
+        email=f"merge-{time.time_ns()}@example.com",
+        username=f"merge{time.time_ns() % 10**12}",
+        hashed_password="benchmark",
+    )
+    db.add(user)
+    db.flush()
+    first, second, target = (
+        Tag(name=name, user_id=user.id) for name in ("source-a", "source-b", "target")
+    )
+    db.add_all([first, second, target])
+    db.flush()
+
+    db.execute(
+        text(
+            "INSERT INTO notes (title, note_type, content_text, user_id) "
+            "SELECT 'Note ' || n, 'TEXT', 'Benchmark note', :user_id "
+            "FROM generate_series(1, :count) AS n"
+        ),
+        {"user_id": user.id, "count": associations // 2},
+    )
+    db.execute(
+        text(
+            "INSERT INTO note_tags (note_id, tag_id) "
+            "SELECT notes.id, tags.id FROM notes, tags "
+            "WHERE notes.user_id = :user_id AND tags.id IN (:first, :second) "
+            "UNION ALL "
+            "SELECT id, :target FROM notes WHERE user_id = :user_id AND id % 10 = 0"
+        ),
+        {
+            "user_id": user.id,
+            "first": first.id,
+            "second": second.id,
+            "target": target.id,
+        },
+    )
+    db.commit()
+    return user.id, [first.id, second.id], target.id
+
+
+def per_note_merge(db, source_ids: list, target_id: int) -> None:
+    """The merge as it was: one ORM append per note."""
+    target = db.get(Tag, target_id)
+    for source_id in source_ids:
+        source = db.get(Tag, source_id)
+        for note in source.notes:
+            if target not in note.tags:
+                note.tags.append(target)
+        db.delete(source)
+    db.commit()
+
+
+def time_merge(merge, associations: int) -> float:
+    db = SessionLocal()
+    try:
+        user_id, source_ids, target_id = load_tagged_notes(db, associations)
+        start = time.perf_counter()
+        merge(db, source_ids, target_id)
+        db.commit()
+        elapsed = (time.perf_counter() - start) * 1000
+        for table in ("notes", "tags", "users"):
+            column = "id" if table == "users" else "user_id"
+            db.execute(
+                text(f"DELETE FROM {table} WHERE {column} = :id"), {"id": user_id}
+            )
+        db.commit()
+        return elapsed
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--sizes", default="10000,100000", help="Comma-separated association counts"
+    )
+    parser.add_argument(
+        "--max-per-note",
+        type=int,
+        default=20000,
+        help="Largest size timed with the per-note merge",
+    )
+    args = parser.parse_args()
+
+    rows = []
+    for size in (int(size) for size in args.sizes.split(",")):
+        print(f"Merging {size} associations...")
+        per_note = None
+        if size <= args.max_per_note:
+            per_note = time_merge(per_note_merge, size)
+        rows.append((size, per_note, time_merge(_merge_tags, size)))
+
+    print("Tag merge")
+    print("=" * 44)
+    print(f"{'associations':>12} {'per-note ms':>14} {'set-based ms':>14}")
+    print("-" * 44)
+    for size, per_note, set_based in rows:
+        per_note_text = f"{per_note:>14.1f}" if per_note is not None else f"{'-':>14}"
+        print(f"{size:>12} {per_note_text} {set_based:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Measure database CPU for search-as-you-type with and without cancellation.
+
+Replays users typing phrases one keystroke at a time; every keystroke sends a
+search for the text so far and supersedes the previous one, whose client then
+disconnects. Searches run through the same cancellable path as the API. With
+``--mode complete`` disconnects are ignored, as before cancellation existed.
+
+Database CPU is read from /proc for each search's backend process, so the
+database must run on the same Linux host as the benchmark.
+
+Usage:
+    python -m benchmarks.typing_load --user-id 11 --typists 3
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import time
+
+from sqlalchemy import text
+
+from app.core.database import SessionLocal
+from app.schemas import SearchFacet, SearchRequest
+from app.services.search import SearchService
+from app.services.search_backend import PostgresSearchBackend
+from app.services.search_cancellation import (
+    SearchCancellation,
+    SearchCancelled,
+    run_cancellable,
+    set_statement_timeout,
+)
+from benchmarks.search_backends import QUERY_SET, percentile, seed_user
+from benchmarks.search_facets import seed_tags_and_folders
+
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+
+
+def backend_cpu_seconds(pid: int) -> float:
+    """User plus system CPU time consumed so far by a Postgres backend."""
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+
+
+class Keystroke:
+    """The client side of one search: disconnected once superseded."""
+
+    def __init__(self, honour_disconnects: bool):
+        self.honour_disconnects = honour_disconnects
+        self.superseded = False
+
+    async def is_disconnected(self) -> bool:
+        return self.honour_disconnects and self.superseded
+
+
+async def run_search(user_id: int, query: str, client: Keystroke, stats: dict):
+    db = SessionLocal()
+    try:
+        pid = db.execute(text("SELECT pg_backend_pid()")).scalar()
+        set_statement_timeout(db, 30000)
+        cpu_start = backend_cpu_seconds(pid)
+        cancellation = SearchCancellation()
+        service = SearchService(
+            db, user_id, backend=PostgresSearchBackend(), cancellation=cancellation
+        )
+        request = SearchRequest(query=query, facets=list(SearchFacet))
+        start = time.perf_counter()
+        try:
+            await run_cancellable(client, db, cancellation, service.search, request)
+            stats["completed"] += 1
+            stats["latency"].append((time.perf_counter() - start) * 1000)
+        except SearchCancelled:
+            stats["cancelled"] += 1
+        db.rollback()
+        stats["cpu"] += backend_cpu_seconds(pid) - cpu_start
+    finally:
+        db.close()
+
+
+async def type_phrase(user_id, phrase, rng, interval_ms, honour, stats):
+    """Type a phrase, searching after every keystroke from the second one."""
+    tasks, previous = [], None
+    for end in range(2, len(phrase) + 1):
+        if phrase[end - 1] == " ":
+            continue
+        client = Keystroke(honour)
+        tasks.append(
+            asyncio.ensure_future(run_search(user_id, phrase[:end], client, stats))
+        )
+        if previous is not None:
+            previous.superseded = True
+        previous = client
+        await asyncio.sleep(rng.uniform(0.5, 1.5) * interval_ms / 1000)
+    await asyncio.gather(*tasks)
+
+
+async def replay(user_id: int, args, honour: bool) -> dict:
+    stats = {"completed": 0, "cancelled": 0, "cpu": 0.0, "latency": []}
+    rng = random.Random(args.seed)
+    phrases = [q for q in QUERY_SET if q != "nonexistentterm"]
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(
+            type_phrase(
+                user_id,
+                phrases[i % len(phrases)],
+                random.Random(rng.random()),
+                args.interval_ms,
+                honour,
+                stats,
+            )
+            for i in range(args.typists)
+        )
+    )
+    stats["wall"] = time.perf_counter() - start
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--notes", type=int, default=10000, help="Notes to seed")
+    parser.add_argument("--user-id", type=int, help="Benchmark an existing user")
+    parser.add_argument("--typists", type=int, default=3, help="Concurrent typists")
+    parser.add_argument(
+        "--interval-ms", type=float, default=150, help="Mean time between keystrokes"
+    )
+    parser.add_argument(
+        "--mode",
+        choices=["both", "cancel", "complete"],
+        default="both",
+        help="Cancel superseded searches, run them to completion, or compare",
+    )
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    args = parser.parse_args()
+
+    user_id = args.user_id
+    if user_id is None:
+        db = SessionLocal()
+        try:
+            user_id = seed_user(db, args.notes, args.seed)
+            seed_tags_and_folders(db, user_id, 200, 20)
+        finally:
+            db.close()
+
+    modes = ["complete", "cancel"] if args.mode == "both" else [args.mode]
+    print(f"Search-as-you-type load (user {user_id}, {args.typists} typists)")
+    print("=" * 76)
+    print(
+        f"{'mode':<10} {'searches':>9} {'cancelled':>10} {'db cpu s':>9} "
+        f"{'wall s':>8} {'p50 ms':>8} {'p95 ms':>8}"
+    )
+    print("-" * 76)
+    for mode in modes:
+        stats = asyncio.run(replay(user_id, args, honour=mode == "cancel"))
+        latency = stats["latency"] or [0.0]
+        print(
+            f"{mode:<10} {stats['completed'] + stats['cancelled']:>9} "
+            f"{stats['cancelled']:>10} {stats['cpu']:>9.2f} {stats['wall']:>8.2f} "
+            f"{percentile(latency, 50):>8.1f} {percentile(latency, 95):>8.1f}"
+        )
+        if len(latency) > 1:
+            print(f"{'':<10} mean completed latency {statistics.mean(latency):.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Recount tags.note_count from note_tags and fix any drift.
+
+Triggers on note_tags keep the counts current (migration 7e8f9a0b1c2d), but
+anything that bypasses them, such as TRUNCATE, session_replication_role=replica
+or manual repairs, leaves counts behind. Run this periodically (e.g. nightly
+from cron); it only writes tags whose count is wrong and is safe to re-run.
+
+Usage:
+    python reconcile_tag_counts.py [--batch-size 5000]
+"""
+import argparse
+import os
+import sys
+
+# Add the backend directory to path to import app modules
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import select, text
+
+from app.core.database import SessionLocal
+from app.models import Tag
+
+reconcile = text("SELECT tags_reconcile_note_counts(CAST(:ids AS integer[]))")
+
+
+def reconcile_tag_counts(batch_size: int) -> int:
+    """Recount every tag in id order; returns the number of counts fixed."""
+    db = SessionLocal()
+    last_id = 0
+    fixed = 0
+
+    try:
+        while True:
+            ids = (
+                db.execute(
+                    select(Tag.id)
+                    .where(Tag.id > last_id)
+                    .order_by(Tag.id)
+                    .limit(batch_size)
+                )
+                .scalars()
+                .all()
+            )
+            if not ids:
+                break
+
+            fixed += db.execute(reconcile, {"ids": ids}).scalar()
+            db.commit()
+
+            last_id = ids[-1]
+            print(f"Checked tags up to id {last_id} ({fixed} fixed)")
+
+        return fixed
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reconcile tag note counts")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    print("Starting tag note count reconciliation...")
+    total = reconcile_tag_counts(args.batch_size)
+    print(f"Reconciliation completed: {total} tag counts fixed")
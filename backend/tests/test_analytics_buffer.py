@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy.dialects import postgresql
+
+from app.services.analytics import (
+    SearchAnalyticsBuffer,
+    SearchEvent,
+    aggregate_search_events,
+    build_upsert_statement,
+)
+
+START = datetime(2025, 11, 1, 12, 0, 0)
+
+
+def event(user_id, query, results, seconds):
+    return SearchEvent(user_id, query, results, START + timedelta(seconds=seconds))
+
+
+def test_aggregate_folds_events_per_user_and_query():
+    rows = aggregate_search_events(
+        [
+            event(1, "budget", 10, 0),
+            event(1, "budget", 20, 60),
+            event(2, "budget", 5, 0),
+        ]
+    )
+    by_user = {row["user_id"]: row for row in rows}
+
+    assert by_user[1]["search_count"] == 2
+    assert by_user[1]["last_result_count"] == 20
+    assert by_user[1]["avg_result_count"] == 10 * 0.8 + 20 * 0.2
+    assert by_user[1]["created_at"] == START
+    assert by_user[2]["search_count"] == 1
+
+
+def test_aggregate_debounces_repeat_searches():
+    rows = aggregate_search_events(
+        [event(1, "budget", 10, 0), event(1, "budget", 12, 2)]
+    )
+
+    assert rows[0]["search_count"] == 1
+    assert rows[0]["last_result_count"] == 12
+    assert rows[0]["last_searched_at"] == START + timedelta(seconds=2)
+
+
+def test_record_drops_when_queue_is_full():
+    buffer = SearchAnalyticsBuffer(session_factory=None, max_queue_size=2)
+
+    assert buffer.record(1, "a", 1)
+    assert buffer.record(1, "b", 1)
+    assert not buffer.record(1, "c", 1)
+    assert not buffer.record(1, "   ", 1)
+
+    assert buffer.stats()["dropped"] == 1
+    assert buffer.stats()["queued"] == 2
+    assert [e.query_text for e in buffer.drain()] == ["a", "b"]
+
+
+def test_upsert_statement_targets_user_query_conflict():
+    rows = aggregate_search_events([event(1, "budget", 3, 0)])
+    sql = str(build_upsert_statement(rows).compile(dialect=postgresql.dialect()))
+
+    assert "ON CONFLICT (user_id, query_text) DO UPDATE" in sql
+    assert "interval '5 seconds'" in sql
@@ -0,0 +1,83 @@
+from app.services.search import SearchQueryParser
+from app.utils.field_filters import FieldFilter
+
+CONTENT = {
+    "Status": "In progress",
+    "Priority": 2,
+    "Owners": ["alice", "bob"],
+    "Project Info": {"Owner": "carol", "Phase": "design"},
+    "Milestones": [{"Name": "Beta launch"}, {"Name": "GA"}],
+}
+
+
+def parse_fields(query: str):
+    parsed = SearchQueryParser(query).parse()
+    return parsed["field_filters"], parsed["content_terms"]
+
+
+def test_parser_extracts_paths_operators_and_quoted_values():
+    filters, terms = parse_fields(
+        'field:"Project Info".Owner=carol field:Status~"in prog" field:Due budget'
+    )
+
+    assert [(f.path, f.operator, f.value) for f in filters] == [
+        (("Project Info", "Owner"), "=", "carol"),
+        (("Status",), "~", "in prog"),
+        (("Due",), None, None),
+    ]
+    assert terms == ["budget"]
+
+
+def test_field_values_are_not_read_as_other_operators():
+    parsed = SearchQueryParser('field:Note="tag:work" report').parse()
+
+    assert parsed["field_filters"][0].value == "tag:work"
+    assert parsed["tags"] == []
+    assert parsed["quoted_phrases"] == []
+    assert parsed["content_terms"] == ["report"]
+
+
+def test_equals_builds_scalar_and_array_containment_documents():
+    owner = FieldFilter.parse('"Project Info".Owner', "=", "carol")
+    priority = FieldFilter.parse("Priority", "=", "2")
+
+    assert owner.containment_documents() == [
+        {"Project Info": {"Owner": "carol"}},
+        {"Project Info": {"Owner": ["carol"]}},
+    ]
+    assert priority.containment_documents() == [
+        {"Priority": "2"},
+        {"Priority": ["2"]},
+        {"Priority": 2},
+        {"Priority": [2]},
+    ]
+    # Quoted values are always strings
+    assert FieldFilter.parse("Priority", "=", '"2"').candidates() == ["2"]
+
+
+def test_jsonpath_quotes_keys_and_escapes_the_pattern():
+    contains = FieldFilter(path=('Say "hi"',), operator="~", value="a.b")
+
+    assert FieldFilter.parse("Project.Owner").jsonpath() == '$."Project"."Owner"'
+    assert contains.jsonpath() == r'$."Say \"hi\"" ? (@ like_regex "a\\.b" flag "i")'
+
+
+def test_equals_matches_exact_values_and_array_elements():
+    assert FieldFilter.parse('"Project Info".Owner', "=", "carol").matches(CONTENT)
+    assert FieldFilter.parse("Owners", "=", "bob").matches(CONTENT)
+    assert FieldFilter.parse("Priority", "=", "2").matches(CONTENT)
+    assert not FieldFilter.parse("Priority", "=", "true").matches(CONTENT)
+    assert not FieldFilter.parse("Status", "=", "in progress").matches(CONTENT)
+    # Containment does not look inside arrays of objects
+    assert not FieldFilter.parse("Milestones.Name", "=", "GA").matches(CONTENT)
+
+
+def test_contains_and_presence_unwrap_arrays():
+    assert FieldFilter.parse("Status", "~", "PROGRESS").matches(CONTENT)
+    assert FieldFilter.parse("Milestones.Name", "~", "beta").matches(CONTENT)
+    assert FieldFilter.parse("Owners", "~", "ali").matches(CONTENT)
+    assert not FieldFilter.parse("Priority", "~", "2").matches(CONTENT)
+
+    assert FieldFilter.parse("Milestones.Name").matches(CONTENT)
+    assert not FieldFilter.parse("Project Info.Budget").matches(CONTENT)
+    assert not FieldFilter.parse("Status").matches(None)
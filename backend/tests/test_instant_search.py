@@ -0,0 +1,138 @@
+import threading
+import time
+
+from app.services.instant_search import InstantSearchIndex, TitlePrefixIndex
+
+
+def build_index():
+    index = TitlePrefixIndex()
+    index.load(
+        [
+            (1, "Budget meeting", 100.0),
+            (2, "Quarterly budget review", 300.0),
+            (3, "Trip plan", 200.0),
+            (4, "Buddy list", 50.0),
+        ],
+        ["budgeting", "travel", "buddies"],
+    )
+    return index
+
+
+def test_title_prefix_matches_any_word():
+    index = build_index()
+
+    assert [note_id for note_id, _ in index.search_notes("bud")] == [1, 4, 2]
+    assert index.search_notes("budg") == [
+        (1, "Budget meeting"),
+        (2, "Quarterly budget review"),
+    ]
+    assert index.search_notes("xyz") == []
+    assert index.search_notes("  ") == []
+
+
+def test_every_token_must_match_a_title_word():
+    index = build_index()
+
+    assert [n for n, _ in index.search_notes("budget rev")] == [2]
+    assert [n for n, _ in index.search_notes("Meet, BUD")] == [1]
+    assert index.search_notes("budget trip") == []
+
+
+def test_limit_keeps_best_ranked():
+    index = build_index()
+
+    # Titles starting with the query first, then the most recently updated
+    assert [n for n, _ in index.search_notes("b", limit=2)] == [1, 4]
+
+
+def test_updates_and_deletes_replace_entries():
+    index = build_index()
+    index.add(3, "Budget trip", 400.0)
+    index.remove(1)
+
+    assert [n for n, _ in index.search_notes("budget")] == [3, 2]
+    assert index.search_notes("plan") == []
+    assert len(index) == 3
+
+
+def test_tag_prefixes():
+    index = build_index()
+    index.add_tag("budget")
+    index.add_tag("budget")
+
+    assert index.search_tags("BUD") == ["buddies", "budget", "budgeting"]
+    assert index.search_tags("budg", limit=1) == ["budget"]
+    assert index.search_tags("") == []
+
+
+class CountingIndex(InstantSearchIndex):
+    """Builds from a fixed title list, counting and slowing down builds."""
+
+    def __init__(self, titles, delay=0.05, max_age_seconds=300):
+        super().__init__(session_factory=None, max_age_seconds=max_age_seconds)
+        self.titles = titles
+        self.delay = delay
+        self.builds = 0
+
+    def _load(self, user_id):
+        self.builds += 1
+        time.sleep(self.delay)
+        index = TitlePrefixIndex()
+        index.load([(i, title, 0.0) for i, title in enumerate(self.titles, 1)], ["tag"])
+        return index
+
+
+def test_concurrent_searches_share_one_build():
+    engine = CountingIndex(["Budget", "Trip"])
+    results = []
+
+    def search():
+        results.append(engine.search(1, "bud")[0])
+
+    threads = [threading.Thread(target=search) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert engine.builds == 1
+    assert results == [[(1, "Budget")]] * 8
+
+
+def test_writes_during_a_build_are_replayed():
+    engine = CountingIndex(["Budget"], delay=0.1)
+    thread = threading.Thread(target=engine.search, args=(1, "x"))
+    thread.start()
+    time.sleep(0.03)
+
+    class Stub:
+        id, user_id, title, updated_at, tags = 7, 1, "Budget draft", None, []
+
+    engine.index(Stub())
+    thread.join()
+
+    assert [n for n, _ in engine.search(1, "draft")[0]] == [7]
+
+
+def test_stale_index_answers_while_rebuilding():
+    engine = CountingIndex(["Budget"], delay=0.1, max_age_seconds=0)
+    engine.search(1, "bud")
+
+    start = time.monotonic()
+    notes, tags = engine.search(1, "bud")
+    assert time.monotonic() - start < 0.05
+    assert notes == [(1, "Budget")]
+    assert tags == []
+
+    time.sleep(0.2)
+    assert engine.builds == 2
+
+
+def test_invalidate_rebuilds_on_next_search():
+    engine = CountingIndex(["Budget"], delay=0)
+    engine.search(1, "bud")
+    engine.titles = ["Travel"]
+    engine.invalidate(1)
+
+    assert engine.search(1, "tra")[0] == [(1, "Travel")]
+    assert engine.builds == 2
@@ -0,0 +1,206 @@
+"""
+Trigger checks that tag names and folder paths stay searchable in content_tsv
+through tag renames, merges and reassignments and folder renames and moves,
+and that user_lexemes counts them. Migrates the test database to head; skipped
+when the test database is not available.
+"""
+from pathlib import Path
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, func, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.models import Folder, Note, NoteType, Tag, User, UserLexeme
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+engine = create_engine(settings.test_database_url)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture(scope="module")
+def alembic_config():
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    except OperationalError as exc:
+        pytest.skip(f"test database unavailable: {exc}")
+
+    # alembic/env.py migrates settings.database_url
+    database_url = settings.database_url
+    settings.database_url = settings.test_database_url
+    config = Config(str(BACKEND_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BACKEND_DIR / "alembic"))
+    try:
+        command.upgrade(config, "head")
+        yield config
+        command.downgrade(config, "base")
+    finally:
+        settings.database_url = database_url
+
+
+@pytest.fixture
+def db(alembic_config):
+    session = TestingSessionLocal()
+    user = User(email="labels@example.com", username="labels", hashed_password="x")
+    session.add(user)
+    session.commit()
+    yield session
+    session.rollback()
+    for table in ("notes", "tags", "folders"):
+        session.execute(
+            text(f"DELETE FROM {table} WHERE user_id = :id"), {"id": user.id}
+        )
+    session.execute(text("DELETE FROM users WHERE id = :id"), {"id": user.id})
+    session.commit()
+    session.close()
+
+
+def matches(db, word: str) -> set:
+    return {
+        note_id
+        for (note_id,) in db.query(Note.id).filter(
+            Note.content_tsv.op("@@")(func.plainto_tsquery("english", word))
+        )
+    }
+
+
+def make_note(db, user_id: int, tags=(), folder=None) -> Note:
+    note = Note(
+        title="Weekly sync",
+        note_type=NoteType.TEXT,
+        content_text="Agenda and follow-ups",
+        user_id=user_id,
+        folder=folder,
+        tags=list(tags),
+    )
+    db.add(note)
+    db.commit()
+    return note
+
+
+def user_id_of(db) -> int:
+    return db.query(User.id).filter(User.username == "labels").scalar()
+
+
+def test_tags_are_indexed_and_follow_renames(db):
+    user_id = user_id_of(db)
+    tag = Tag(name="quarterly", user_id=user_id)
+    note = make_note(db, user_id, tags=[tag])
+    assert matches(db, "quarterly") == {note.id}
+    assert matches(db, "agenda") == {note.id}
+
+    tag.name = "roadmap"
+    db.commit()
+    assert matches(db, "roadmap") == {note.id}
+    assert matches(db, "quarterly") == set()
+    assert matches(db, "agenda") == {note.id}
+
+    note.tags.remove(tag)
+    db.commit()
+    assert matches(db, "roadmap") == set()
+
+
+def test_merge_replaces_source_tag_name(db):
+    user_id = user_id_of(db)
+    source = Tag(name="budgets", user_id=user_id)
+    target = Tag(name="finance", user_id=user_id)
+    both = make_note(db, user_id, tags=[source, target])
+    only_source = make_note(db, user_id, tags=[source])
+
+    # Same steps as POST /api/tags/merge
+    for note in source.notes:
+        if target not in note.tags:
+            note.tags.append(target)
+    db.delete(source)
+    db.commit()
+
+    assert matches(db, "finance") == {both.id, only_source.id}
+    assert matches(db, "budget") == set()
+
+
+def test_folder_path_follows_renames_and_moves(db):
+    user_id = user_id_of(db)
+    parent = Folder(name="Clients", user_id=user_id)
+    child = Folder(name="Acme", user_id=user_id, parent=parent)
+    other = Folder(name="Archive", user_id=user_id)
+    note = make_note(db, user_id, folder=child)
+    assert matches(db, "clients") == matches(db, "acme") == {note.id}
+
+    parent.name = "Customers"
+    db.commit()
+    assert matches(db, "customers") == {note.id}
+    assert matches(db, "clients") == set()
+
+    child.parent = other
+    db.commit()
+    assert matches(db, "archive") == {note.id}
+    assert matches(db, "customers") == set()
+
+    note.folder = None
+    db.commit()
+    assert matches(db, "acme") == set()
+    assert matches(db, "agenda") == {note.id}
+
+
+def test_reassigned_note_tags_refresh_labels(db):
+    user_id = user_id_of(db)
+    source = Tag(name="drafts", user_id=user_id)
+    target = Tag(name="published", user_id=user_id)
+    db.add(target)
+    note = make_note(db, user_id, tags=[source])
+
+    db.execute(
+        text("UPDATE note_tags SET tag_id = :target WHERE tag_id = :source"),
+        {"target": target.id, "source": source.id},
+    )
+    db.commit()
+
+    assert matches(db, "published") == {note.id}
+    assert matches(db, "drafts") == set()
+
+
+def test_lexeme_counts_follow_label_changes(db):
+    user_id = user_id_of(db)
+
+    def dictionary() -> dict:
+        return dict(
+            db.query(UserLexeme.lexeme, UserLexeme.note_count).filter(
+                UserLexeme.user_id == user_id
+            )
+        )
+
+    def recounted() -> dict:
+        return dict(
+            db.execute(
+                text(
+                    "SELECT word, ndoc FROM ts_stat(format("
+                    "'SELECT title_tsv || content_tsv FROM notes WHERE user_id = %s',"
+                    " CAST(:user_id AS integer)))"
+                ),
+                {"user_id": user_id},
+            ).all()
+        )
+
+    tag = Tag(name="roadmap", user_id=user_id)
+    folder = Folder(name="Planning", user_id=user_id)
+    first = make_note(db, user_id, tags=[tag], folder=folder)
+    make_note(db, user_id, tags=[tag])
+    assert dictionary()["roadmap"] == 2
+    assert dictionary()["plan"] == 1
+
+    tag.name = "milestones"
+    folder.name = "Archive"
+    db.commit()
+    assert "roadmap" not in dictionary()
+    assert dictionary()["mileston"] == 2
+
+    db.delete(first)
+    db.commit()
+    assert dictionary()["mileston"] == 1
+    assert "archiv" not in dictionary()
+    assert dictionary() == recounted()
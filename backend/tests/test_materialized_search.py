@@ -0,0 +1,48 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models import Note, SavedSearch
+from app.schemas import SearchRequest
+from app.services.materialized_search import MaterializedSearchService
+
+
+def build_service():
+    return MaterializedSearchService(Session(), user_id=1)
+
+
+def test_match_query_is_unsorted_id_and_rank():
+    request = SearchRequest(query="budget tag:work", facets=["tags"])
+    query = build_service()._match_query(request).filter(Note.id.in_([7]))
+    sql = str(query.statement.compile(dialect=postgresql.dialect()))
+
+    assert sql.startswith("SELECT notes.id, ")
+    assert "AS rank" in sql
+    assert "ORDER BY" not in sql
+    assert "OVER" not in sql
+    assert "notes.id IN" in sql
+
+
+def test_freshness_follows_staleness_setting():
+    service = build_service()
+    now = datetime.now(timezone.utc)
+    max_age = timedelta(seconds=settings.saved_search_max_staleness_seconds)
+
+    assert not service.is_fresh(SavedSearch(materialized_at=None))
+    assert service.is_fresh(SavedSearch(materialized_at=now))
+    assert not service.is_fresh(
+        SavedSearch(materialized_at=now - max_age - timedelta(seconds=1))
+    )
+
+
+def test_unmaterialized_searches_run_live():
+    class LiveSearch:
+        def search(self, request):
+            return [], 42, None
+
+    service = MaterializedSearchService(Session(), 1, search_service=LiveSearch())
+    saved = SavedSearch(materialized=False, search_query={"query": "x"})
+
+    assert service.execute(saved, SearchRequest(query="x")) == ([], 42, None)
@@ -0,0 +1,97 @@
+import random
+
+import numpy as np
+
+from app.models import Note, _update_note_features
+from app.services.duplicates import cluster_buckets
+from app.utils.minhash import (
+    LSH_BANDS,
+    NUM_PERM,
+    band_keys,
+    decode_signature,
+    minhash_signature,
+    note_signature,
+    shingles,
+    similarities,
+)
+
+WORDS = [f"word{i}" for i in range(500)]
+
+
+def text(seed: int, length: int = 200) -> str:
+    rng = random.Random(seed)
+    return " ".join(rng.choice(WORDS) for _ in range(length))
+
+
+def edit(content: str, changes: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    words = content.split()
+    for _ in range(changes):
+        words[rng.randrange(len(words))] = "edited"
+    return " ".join(words)
+
+
+def test_shingles_are_lowercase_word_triples():
+    assert shingles("The quick, brown fox") == {"the quick brown", "quick brown fox"}
+    assert shingles("Hi there") == {"hi there"}
+    assert shingles("  ") == set()
+
+
+def test_signature_is_deterministic_and_estimates_jaccard():
+    original = text(1)
+    signature = minhash_signature(original)
+
+    assert signature.dtype == np.dtype("<u4") and len(signature) == NUM_PERM
+    assert np.array_equal(signature, minhash_signature(original))
+
+    near = minhash_signature(edit(original, 3))
+    other = minhash_signature(text(2))
+    assert similarities(signature, np.stack([near, other])).tolist()[0] > 0.8
+    assert similarities(signature, np.stack([other]))[0] < 0.2
+
+
+def test_near_duplicates_share_a_band_key():
+    original = minhash_signature(text(3))
+    near = minhash_signature(edit(text(3), 2))
+    other = minhash_signature(text(4))
+
+    keys = band_keys(original)
+    assert len(keys) == LSH_BANDS
+    assert set(keys) & set(band_keys(near))
+    assert not set(keys) & set(band_keys(other))
+
+
+def test_note_signature_round_trips_and_skips_empty_notes():
+    minhash, lsh_bands = note_signature(None, {"Agenda": ["budget review", "q3"]})
+    assert np.array_equal(
+        decode_signature(minhash), minhash_signature("budget review\nq3")
+    )
+    assert len(lsh_bands) == LSH_BANDS
+
+    assert note_signature("", None) == (None, None)
+
+
+def test_signature_is_recomputed_when_content_changes():
+    note = Note(content_text=text(5))
+    _update_note_features(Note.__mapper__, None, note)
+
+    assert note.minhash == note_signature(text(5))[0]
+    assert note.lsh_bands == note_signature(text(5))[1]
+
+
+def test_cluster_buckets_groups_verified_pairs():
+    base = text(6)
+    signatures = {
+        1: minhash_signature(base),
+        2: minhash_signature(edit(base, 2, seed=1)),
+        3: minhash_signature(edit(base, 2, seed=2)),
+        4: minhash_signature(text(7)),
+        5: minhash_signature(text(8)),
+    }
+    # 4 collides with 1 in one band but is not similar
+    buckets = [[1, 2, 3], [3, 2], [1, 4], [5]]
+
+    [group] = cluster_buckets(buckets, signatures, threshold=0.8)
+    assert [note_id for note_id, _ in group] == [1, 2, 3]
+    assert group[0][1] == 1.0
+    assert all(similarity >= 0.8 for _, similarity in group)
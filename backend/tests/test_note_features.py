@@ -0,0 +1,59 @@
+from app.models import Note, _update_note_features
+from app.utils.note_features import (
+    FEATURE_CODE,
+    FEATURE_IMAGES,
+    FEATURE_LINKS,
+    FEATURE_TABLES,
+    extract_note_features,
+)
+
+MARKDOWN = """# Plan
+- [x] book flights
+- [ ] pack
+1. [ ] renew passport
+
+See [the itinerary](https://example.com/trip) and ![map](map.png).
+
+| Day | City |
+|-----|------|
+| 1   | Rome |
+
+Run `make trip` first.
+"""
+
+
+def test_extracts_checkboxes_and_flags_from_markdown():
+    features = extract_note_features(MARKDOWN)
+
+    assert features["todo_done"] == 1
+    assert features["todo_open"] == 2
+    assert features["feature_flags"] == (
+        FEATURE_LINKS | FEATURE_CODE | FEATURE_TABLES | FEATURE_IMAGES
+    )
+
+
+def test_plain_text_has_no_features():
+    features = extract_note_features("Brackets [x] and pipes | are not markup")
+    assert features == {"todo_done": 0, "todo_open": 0, "feature_flags": 0}
+
+
+def test_image_alone_is_not_a_link():
+    assert extract_note_features("![logo](logo.png)")["feature_flags"] == FEATURE_IMAGES
+
+
+def test_structured_notes_use_section_values():
+    features = extract_note_features(
+        None, {"Tasks": "- [ ] call http://example.com", "Done": ["- [X] email"]}
+    )
+
+    assert features["todo_open"] == 1
+    assert features["todo_done"] == 1
+    assert features["feature_flags"] == FEATURE_LINKS
+
+
+def test_features_are_computed_on_insert():
+    note = Note(content_text="- [ ] write tests")
+    _update_note_features(Note.__mapper__, None, note)
+
+    assert note.todo_open == 1
+    assert note.feature_flags == 0
@@ -0,0 +1,65 @@
+from datetime import datetime, timezone
+
+from sqlalchemy.orm import Session
+
+from app.models import Note
+from app.schemas import NoteType
+from app.services.search import SearchQueryParser, SearchService, SectionHit
+
+NOW = datetime(2025, 11, 15, tzinfo=timezone.utc)
+
+
+def make_note(**fields) -> Note:
+    values = {
+        "id": 1,
+        "title": "Handbook",
+        "note_type": NoteType.STRUCTURED,
+        "user_id": 1,
+        "created_at": NOW,
+        "updated_at": NOW,
+        "tags": [],
+    }
+    values.update(fields)
+    return Note(**values)
+
+
+def test_best_sections_skip_queries_without_structured_content_matches():
+    # An unbound session fails on any query, so these must not run one
+    service = SearchService(Session(), user_id=1)
+    text_note = make_note(note_type=NoteType.TEXT, content_text="budget")
+    structured = make_note(id=2, content_structured={"Budget": "q3"})
+
+    assert (
+        service._best_sections([text_note], SearchQueryParser("budget").parse()) == {}
+    )
+    assert (
+        service._best_sections([structured], SearchQueryParser("tag:x").parse()) == {}
+    )
+    assert (
+        service._best_sections(
+            [structured], SearchQueryParser("budget").parse(), title_only=True
+        )
+        == {}
+    )
+
+
+def test_result_snippet_and_path_come_from_the_best_section():
+    sections = {f"Chapter {i}": f"filler text {i} " * 30 for i in range(40)}
+    sections["Chapter 33"] = "Travel policy: the budget for flights is set yearly."
+    note = make_note(content_structured=sections)
+    parsed = SearchQueryParser("budget").parse()
+    service = SearchService(Session(), user_id=1)
+
+    result = service._create_search_result(
+        note,
+        parsed,
+        None,
+        "budget",
+        SectionHit(path=["Chapter 33"], body=sections["Chapter 33"]),
+    )
+
+    assert result.section_path == ["Chapter 33"]
+    assert result.snippet == sections["Chapter 33"]
+
+    without_section = service._create_search_result(note, parsed, None, "budget")
+    assert without_section.section_path is None
@@ -0,0 +1,88 @@
+import time
+
+from app.schemas import OmniboxResult
+from app.services.omnibox import (
+    FOLDERS,
+    NOTES,
+    SAVED_SEARCHES,
+    TAGS,
+    OmniboxHit,
+    OmniboxService,
+    match_score,
+    merge_hits,
+)
+
+
+def test_match_score_prefers_exact_then_prefix_matches():
+    assert match_score("Budget", "budget") == 1.0
+    assert match_score("Budget 2024", "budg") == 0.8
+    assert match_score("Q3 budget review", "bud rev") == 0.6
+    assert match_score("Rebudgeting", "budget") == 0.4
+    assert match_score("Travel", "budget") == 0.2
+
+
+def test_merge_caps_each_type_and_orders_by_score():
+    hits = {
+        NOTES: [OmniboxHit(NOTES, i, f"Budget {i}", 0.8) for i in range(4)],
+        TAGS: [OmniboxHit(TAGS, 1, "budget", 1.0)],
+        FOLDERS: [OmniboxHit(FOLDERS, 1, "Old budgets", 0.6)],
+    }
+
+    merged = merge_hits(hits, per_type=2)
+
+    assert [(hit.type, hit.id) for hit in merged] == [
+        (TAGS, 1),
+        (NOTES, 0),
+        (NOTES, 1),
+        (FOLDERS, 1),
+    ]
+
+
+class FakeOmnibox(OmniboxService):
+    """Answers every source from memory after a per-source delay."""
+
+    def __init__(self, delays, budget_ms=100):
+        super().__init__(user_id=1, session_factory=None, budget_ms=budget_ms)
+        self.delays = delays
+
+    def _in_session(self, cancellation, lookup, *args):
+        return lookup(None, *args)
+
+    def _answer(self, source, title):
+        time.sleep(self.delays.get(source, 0))
+        return [OmniboxHit(source, 1, title, 0.8)]
+
+    def _notes(self, query, limit):
+        return self._answer(NOTES, "Budget meeting")
+
+    def _tags(self, db, query, limit):
+        return self._answer(TAGS, "budget")
+
+    def _folders(self, db, query, limit):
+        return self._answer(FOLDERS, "Budgets")
+
+    def _saved_searches(self, db, query, limit):
+        return self._answer(SAVED_SEARCHES, "Budget notes")
+
+
+def test_all_sources_within_budget_are_merged():
+    hits, timed_out = FakeOmnibox({}).search("budget")
+
+    assert {hit.type for hit in hits} == {NOTES, TAGS, FOLDERS, SAVED_SEARCHES}
+    assert timed_out == []
+    assert OmniboxResult.model_validate(hits[0]).type.value == NOTES
+
+
+def test_slow_sources_are_dropped_without_waiting():
+    service = FakeOmnibox({FOLDERS: 1.0, TAGS: 1.0}, budget_ms=100)
+
+    start = time.monotonic()
+    hits, timed_out = service.search("budget")
+
+    assert time.monotonic() - start < 0.5
+    assert timed_out == [FOLDERS, TAGS]
+    assert {hit.type for hit in hits} == {NOTES, SAVED_SEARCHES}
+
+
+def test_blank_query_skips_all_sources():
+    assert FakeOmnibox({}).search("  ") == ([], [])
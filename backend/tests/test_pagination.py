@@ -0,0 +1,33 @@
+import base64
+
+import pytest
+
+from app.utils.pagination import decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor("count", [12, "café/notes"])
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor, "count", 2) == [12, "café/notes"]
+
+
+def test_cursor_from_another_sort_is_rejected():
+    cursor = encode_cursor("name", ["work"])
+
+    with pytest.raises(ValueError, match="sort order"):
+        decode_cursor(cursor, "count", 2)
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not a cursor",
+        base64.urlsafe_b64encode(b"[1, 2]").decode(),
+        base64.urlsafe_b64encode(b'{"sort": "name", "after": "work"}').decode(),
+        encode_cursor("name", ["work", 3]),
+    ],
+)
+def test_malformed_cursors_are_rejected(cursor):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        decode_cursor(cursor, "name", 1)
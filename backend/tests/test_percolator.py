@@ -0,0 +1,143 @@
+from datetime import datetime, timedelta, timezone
+
+from app.schemas import SearchRequest
+from app.services.percolator import (
+    NoteDocument,
+    Percolator,
+    compile_saved_search,
+    search_text_strings,
+)
+from app.services.search import SearchQueryParser
+from app.utils.note_features import FEATURE_CODE, FEATURE_LINKS
+
+NOW = datetime(2025, 11, 7, 12, 0, tzinfo=timezone.utc)
+
+# Stand-in for Postgres' english lexemes: lowercase words, "&" dropped,
+# "the" as a stop word
+STOP_WORDS = {"the"}
+
+
+def fake_lexemes(string):
+    words = string.lower().replace("&", " ").split()
+    return frozenset(word.rstrip("s") for word in words if word not in STOP_WORDS)
+
+
+def compile_search(saved_search_id, query, **options):
+    request = SearchRequest(query=query, **options)
+    parsed = SearchQueryParser(query).parse()
+    lexemes = {
+        string: fake_lexemes(string)
+        for string in search_text_strings(request, parsed).values()
+    }
+    return compile_saved_search(saved_search_id, request, parsed, lexemes)
+
+
+def make_note(title="", content="", tags=(), **fields):
+    values = {
+        "id": 1,
+        "note_type": "text",
+        "title_lexemes": fake_lexemes(title),
+        "content_lexemes": fake_lexemes(content),
+        "tags": frozenset(tags),
+        "created_at": NOW,
+        "updated_at": NOW,
+    }
+    values.update(fields)
+    return NoteDocument(**values)
+
+
+def test_text_terms_must_all_appear_in_title_or_content():
+    search = compile_search(1, "budget review")
+
+    assert search.matches(make_note(content="Quarterly budget reviews"))
+    assert not search.matches(make_note(content="budget only"))
+    # Title and content conditions are ORed, each requiring all its lexemes
+    assert not search.matches(make_note(title="budget", content="review"))
+
+
+def test_intitle_and_title_only_restrict_the_branch():
+    intitle = compile_search(1, "intitle:roadmap")
+    title_only = compile_search(2, "launch", title_only=True)
+
+    assert intitle.matches(make_note(title="Roadmap 2026"))
+    assert not intitle.matches(make_note(content="roadmap"))
+    # title_only drops content terms, leaving a filter-only search
+    assert title_only.title_lexemes is None and title_only.content_lexemes is None
+
+
+def test_stop_word_only_query_never_matches():
+    search = compile_search(1, "the")
+
+    assert not search.matches(make_note(title="the", content="the"))
+
+
+def test_tag_type_and_feature_filters():
+    search = compile_search(
+        1, "tag:work -tag:archived has:code todo:incomplete", note_type="text"
+    )
+    note = make_note(tags={"work"}, feature_flags=FEATURE_CODE, todo_open=1)
+
+    assert search.matches(note)
+    assert not search.matches(make_note(tags={"work", "archived"}))
+    assert not search.matches(
+        make_note(tags={"work"}, feature_flags=FEATURE_LINKS, todo_open=1)
+    )
+    assert not search.matches(make_note(tags={"work"}, feature_flags=FEATURE_CODE))
+
+
+def test_request_tag_modes():
+    any_tag = compile_search(1, "x", tags=["A", "b"], tag_mode="or")
+    all_tags = compile_search(2, "x", tags=["a", "b"])
+
+    assert any_tag.matches(make_note(content="x", tags={"a"}))
+    assert not all_tags.matches(make_note(content="x", tags={"a"}))
+    assert all_tags.matches(make_note(content="x", tags={"a", "b"}))
+
+
+def test_date_bounds_accept_naive_datetimes():
+    search = compile_search(
+        1, "created:>2025-11-01", updated_before=(NOW - timedelta(days=1))
+    )
+
+    assert search.matches(make_note(updated_at=NOW - timedelta(days=2)))
+    assert not search.matches(make_note(updated_at=NOW))
+    assert not search.matches(
+        make_note(
+            created_at=datetime(2025, 10, 1, tzinfo=timezone.utc),
+            updated_at=NOW - timedelta(days=2),
+        )
+    )
+
+
+def test_percolator_verifies_only_anchored_candidates():
+    searches = [
+        compile_search(1, "budget review"),
+        compile_search(2, "intitle:roadmap"),
+        compile_search(3, "tag:work"),
+        compile_search(4, "has:links"),
+        compile_search(5, "kubernetes"),
+    ]
+    percolator = Percolator(searches)
+    note = make_note(
+        title="Roadmap",
+        content="budget review",
+        tags={"work"},
+        feature_flags=FEATURE_LINKS,
+    )
+
+    candidate_ids = {search.saved_search_id for search in percolator.candidates(note)}
+    assert candidate_ids == {1, 2, 3, 4}
+    assert percolator.match(note) == [1, 2, 3, 4]
+    assert percolator.match(make_note(content="kubernetes")) == [5]
+
+
+def test_field_filters_match_structured_content():
+    search = compile_search(1, "field:Status=done field:Owner~ali")
+
+    assert search.matches(
+        make_note(content_structured={"Status": "done", "Owner": "Alice"})
+    )
+    assert not search.matches(
+        make_note(content_structured={"Status": "Done", "Owner": "Alice"})
+    )
+    assert not search.matches(make_note(content="Status done Owner alice"))
@@ -0,0 +1,75 @@
+import pytest
+
+from app.services.related_notes import TfidfMatrix
+
+
+def build_matrix():
+    matrix = TfidfMatrix()
+    matrix.add(1, "Budget meeting", "Quarterly budget review with finance")
+    matrix.add(2, "Finance review", "Budget review notes for the quarter")
+    matrix.add(3, "Trip plan", "Flights and hotels for the summer trip")
+    matrix.add(4, "Hotel list", "Hotels near the conference")
+    return matrix
+
+
+def test_related_ranks_by_cosine_and_skips_the_note_itself():
+    related = build_matrix().related(1)
+
+    assert [note_id for note_id, _ in related] == [2]
+    assert 0 < related[0][1] <= 1
+
+
+def test_related_respects_limit():
+    matrix = build_matrix()
+    matrix.add(5, "Budget", "Budget finance quarterly")
+
+    assert len(matrix.related(1, limit=1)) == 1
+    assert len(matrix.related(1, limit=10)) == 2
+
+
+def test_compaction_keeps_scores():
+    matrix = build_matrix()
+    before = matrix.related(3)
+    matrix.compact()
+
+    after = matrix.related(3)
+    assert [n for n, _ in after] == [n for n, _ in before]
+    assert [s for _, s in after] == pytest.approx([s for _, s in before])
+
+
+def test_updates_and_deletes_replace_rows():
+    matrix = build_matrix()
+    matrix.compact()
+    matrix.add(4, "Budget", "Budget review quarterly finance")
+    matrix.remove(2)
+
+    assert len(matrix) == 3
+    assert [note_id for note_id, _ in matrix.related(1)] == [4]
+    assert matrix.related(2) == []
+
+    matrix.compact()
+    assert matrix.row_count == 3
+    assert [note_id for note_id, _ in matrix.related(1)] == [4]
+
+
+def test_compaction_is_needed_once_enough_rows_are_dead():
+    matrix = build_matrix()
+    matrix.compact()
+    assert not matrix.needs_compaction()
+
+    matrix.remove(1)
+    matrix.remove(2)
+    assert matrix.needs_compaction()
+
+
+def test_snapshot_round_trip(tmp_path):
+    matrix = build_matrix()
+    path = str(tmp_path / "user_1.related.npz")
+    matrix.save(path)
+
+    loaded = TfidfMatrix.load(path)
+    assert len(loaded) == 4
+    assert loaded.related(3) == pytest.approx(matrix.related(3))
+
+    loaded.add(5, "Summer trip", "Hotels and flights")
+    assert loaded.related(3)[0][0] == 5
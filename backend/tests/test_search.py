@@ -0,0 +1,142 @@
+import pytest
+from pydantic import ValidationError
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from app.schemas import BulkTagOperation, SearchRequest
+from app.services.search import SearchQueryParser, SearchService
+
+
+def compile_sql(query) -> str:
+    return str(query.statement.compile(dialect=postgresql.dialect()))
+
+
+def build_ranked_sql(**request_fields) -> str:
+    request = SearchRequest(**request_fields)
+    service = SearchService(Session(), user_id=1)
+    parsed = SearchQueryParser(request.query).parse()
+    query, _ = service._build_ranked_query(request, parsed)
+    return compile_sql(query)
+
+
+def test_ranked_query_selects_ids_with_window_total():
+    sql = build_ranked_sql(query="budget meeting")
+    assert sql.startswith("SELECT notes.id,")
+    assert "count(*) OVER ()" in sql
+    assert "notes.content_tsv" in sql
+    assert "JOIN" not in sql
+
+
+def test_tag_filters_do_not_multiply_rows():
+    sql = build_ranked_sql(
+        query="report tag:work", tags=["a", "b"], tag_mode="or", exclude_tags=["x"]
+    )
+    assert "JOIN" not in sql
+    assert "DISTINCT" not in sql
+    assert "EXISTS" in sql
+
+
+def test_ranked_query_has_stable_tiebreak():
+    sql = build_ranked_sql(query="notes", sort_by="created_desc")
+    assert "ORDER BY notes.created_at DESC, notes.id" in sql
+
+
+def test_todo_filters_match_partial_index_predicates():
+    assert "notes.todo_open >" in build_ranked_sql(query="todo:incomplete")
+
+    sql = build_ranked_sql(query="todo:complete")
+    assert "notes.todo_done >" in sql
+    assert "notes.todo_open =" in sql
+
+
+def test_has_filters_use_feature_flags():
+    sql = build_ranked_sql(query="has:links has:attachments has:unknown")
+    assert sql.count("notes.feature_flags &") == 2
+
+
+def test_filter_only_relevance_sort_orders_by_recency():
+    sql = build_ranked_sql(query="has:code")
+    assert "ORDER BY notes.updated_at DESC, notes.id" in sql
+
+
+def test_facets_are_computed_from_a_cte_in_the_ranked_query():
+    sql = build_ranked_sql(
+        query="budget", facets=["tags", "folder", "created"], sort_by="title_asc"
+    )
+    assert sql.startswith("WITH matches AS")
+    assert sql.count("jsonb_agg") == 3
+    assert "ORDER BY matches.title, matches.id" in sql
+
+
+def test_parse_facets_applies_cardinality_cap():
+    request = SearchRequest(query="x", facets=["tags", "folder"], facet_limit=2)
+    raw = {"tags": [["a", 5, None], ["b", 3, None], ["c", 1, None]]}
+
+    facets = SearchService._parse_facets(raw, request)
+
+    assert [bucket.value for bucket in facets["tags"].buckets] == ["a", "b"]
+    assert facets["tags"].truncated is True
+    assert facets["folder"].buckets == []
+    assert facets["folder"].truncated is False
+
+
+class RecordingSearchService(SearchService):
+    """Skips the database; fails for queries containing 'boom'."""
+
+    def search(self, request):
+        parsed = self.parse_query(request.query)
+        if "boom" in parsed["content_terms"]:
+            raise RuntimeError("boom")
+        return [], len(request.query), None
+
+
+def test_search_batch_keeps_order_and_isolates_errors():
+    service = RecordingSearchService(Session(), user_id=1)
+    requests = [SearchRequest(query=q) for q in ("alpha", "boom", "gamma query")]
+
+    outcomes = service.search_batch(requests)
+
+    assert [outcome.total for outcome in outcomes] == [5, 0, 11]
+    assert [outcome.error for outcome in outcomes] == [None, "boom", None]
+    assert all(outcome.execution_time_ms >= 0 for outcome in outcomes)
+
+
+def test_search_batch_shares_parsed_queries_across_workers():
+    service = RecordingSearchService(Session(), user_id=1)
+    requests = [SearchRequest(query="tag:work report")] * 6
+
+    outcomes = service.search_batch(requests, session_factory=Session, max_workers=3)
+
+    assert [outcome.total for outcome in outcomes] == [15] * 6
+    assert list(service.parse_cache) == ["tag:work report"]
+
+
+def test_stream_query_is_ranked_without_window_total_or_offset():
+    request = SearchRequest(query="budget", facets=["tags"], page=3)
+    service = SearchService(Session(), user_id=1)
+    parsed = SearchQueryParser(request.query).parse()
+
+    query, _ = service._build_stream_query(request, parsed, limit=1000)
+    sql = compile_sql(query)
+
+    assert sql.startswith("SELECT notes.id,")
+    assert "OVER" not in sql
+    assert "OFFSET" not in sql
+    assert sql.index("ORDER BY") < sql.index("LIMIT")
+
+
+def test_bulk_tag_operation_takes_ids_or_a_search():
+    BulkTagOperation(note_ids=[1], tag_names=["work"], operation="add")
+    BulkTagOperation(
+        search=SearchRequest(query="budget"), tag_names=["work"], operation="add"
+    )
+
+    for targets in ({}, {"note_ids": [1], "search": SearchRequest(query="x")}):
+        with pytest.raises(ValidationError):
+            BulkTagOperation(tag_names=["work"], operation="add", **targets)
+
+
+def test_field_filters_use_containment_and_jsonpath():
+    sql = build_ranked_sql(query="field:Status=done field:Owner~ali field:Due")
+    assert sql.count("notes.content_structured @>") == 2
+    assert sql.count("jsonb_path_exists(notes.content_structured") == 2
@@ -0,0 +1,80 @@
+from app.models import Note
+from app.services.search_backend import (
+    InvertedIndex,
+    note_body_text,
+    structured_text,
+    tokenize,
+)
+
+
+def build_index():
+    index = InvertedIndex()
+    index.add(
+        1, "Budget meeting", "Quarterly budget review with finance", tags=["work"]
+    )
+    index.add(2, "Groceries", "Milk, eggs and a budget for the week", tags=["home"])
+    index.add(3, "Trip plan", "Flights and hotels", "structured", tags=["home"])
+    return index
+
+
+def test_tokenize_drops_stop_words_and_punctuation():
+    assert tokenize("The budget, for Q3!") == ["budget", "q3"]
+
+
+def test_structured_text_uses_values_only():
+    text = structured_text({"Agenda": ["intro", {"Item": "budget"}], "Count": 3})
+    assert text.split() == ["intro", "budget"]
+
+
+def test_structured_body_includes_section_titles():
+    note = Note(content_structured={"Action Items": ["call client"], "Done": True})
+    assert note_body_text(note).split() == ["Action", "Items", "Done", "call", "client"]
+
+
+def test_bm25_ranks_title_matches_first():
+    hits = build_index().search(["budget"])
+
+    assert [note_id for note_id, _ in hits] == [1, 2]
+    assert hits[0][1] > hits[1][1]
+
+
+def test_search_requires_every_term():
+    index = build_index()
+
+    assert [note_id for note_id, _ in index.search(["budget", "finance"])] == [1]
+    assert index.search(["budget", "hotels"]) == []
+
+
+def test_search_by_field():
+    hits = build_index().search(["budget"], fields=("title",))
+    assert [note_id for note_id, _ in hits] == [1]
+
+
+def test_update_and_delete_are_incremental():
+    index = build_index()
+    index.add(2, "Groceries", "Bread and cheese")
+    index.remove(3)
+
+    assert [note_id for note_id, _ in index.search(["budget"])] == [1]
+    assert index.search(["flights"]) == []
+    assert len(index) == 2
+
+
+def test_facet_counts():
+    counts = build_index().facet_counts([1, 2, 3])
+
+    assert counts["tags"] == {"work": 1, "home": 2}
+    assert counts["note_type"] == {"text": 2, "structured": 1}
+
+
+def test_snapshot_round_trip(tmp_path):
+    index = build_index()
+    index.remove(2)
+    path = str(tmp_path / "user_1.bm25")
+    index.save(path)
+
+    restored = InvertedIndex.load(path)
+
+    assert len(restored) == 2
+    assert restored.search(["budget"]) == index.search(["budget"])
+    assert restored.facet_counts([1, 3]) == index.facet_counts([1, 3])
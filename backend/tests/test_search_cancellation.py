@@ -0,0 +1,143 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.schemas import SearchRequest
+from app.services import search as search_module
+from app.services.search import SearchService
+from app.services.search_cancellation import (
+    QUERY_CANCELED,
+    SearchCancellation,
+    SearchCancelled,
+    SearchTimedOut,
+    is_query_canceled,
+    run_cancellable,
+)
+
+
+class FakeConnection:
+    """Stands in for a psycopg2 connection; cancel() interrupts the 'query'."""
+
+    def __init__(self):
+        self.interrupted = threading.Event()
+        self.cancel_calls = 0
+
+    def cancel(self):
+        self.cancel_calls += 1
+        self.interrupted.set()
+
+
+class FakeSession:
+    def __init__(self, dbapi_connection):
+        self._connection = SimpleNamespace(
+            connection=SimpleNamespace(dbapi_connection=dbapi_connection)
+        )
+
+    def connection(self):
+        return self._connection
+
+
+class FakeRequest:
+    def __init__(self, disconnected=False):
+        self.disconnected = disconnected
+
+    async def is_disconnected(self):
+        return self.disconnected
+
+
+def query_canceled_error():
+    return OperationalError(
+        "SELECT 1", {}, SimpleNamespace(pgcode=QUERY_CANCELED), False
+    )
+
+
+def test_disconnect_cancels_running_statement():
+    connection = FakeConnection()
+    cancellation = SearchCancellation()
+
+    def slow_query():
+        assert connection.interrupted.wait(5)
+        raise query_canceled_error()
+
+    with pytest.raises(SearchCancelled):
+        asyncio.run(
+            run_cancellable(
+                FakeRequest(disconnected=True),
+                FakeSession(connection),
+                cancellation,
+                slow_query,
+            )
+        )
+
+    assert cancellation.cancelled
+    assert connection.cancel_calls == 1
+
+
+def test_statement_timeout_is_reported_separately():
+    def timed_out():
+        raise query_canceled_error()
+
+    with pytest.raises(SearchTimedOut):
+        asyncio.run(
+            run_cancellable(
+                FakeRequest(),
+                FakeSession(FakeConnection()),
+                SearchCancellation(),
+                timed_out,
+            )
+        )
+
+
+def test_connected_client_gets_result_and_connection_is_released():
+    connection = FakeConnection()
+    cancellation = SearchCancellation()
+
+    result = asyncio.run(
+        run_cancellable(
+            FakeRequest(), FakeSession(connection), cancellation, lambda x: x * 2, 21
+        )
+    )
+
+    assert result == 42
+    cancellation.cancel()
+    assert connection.cancel_calls == 0
+
+
+def test_is_query_canceled_checks_sqlstate():
+    assert is_query_canceled(query_canceled_error())
+    assert not is_query_canceled(
+        OperationalError("SELECT 1", {}, SimpleNamespace(pgcode="08006"), False)
+    )
+    assert not is_query_canceled(ValueError("boom"))
+
+
+def test_cancelled_searches_are_not_tracked(monkeypatch):
+    recorded = []
+    monkeypatch.setattr(
+        search_module.search_analytics_buffer,
+        "record",
+        lambda *args: recorded.append(args),
+    )
+    cancellation = SearchCancellation()
+    service = SearchService(Session(), 1, cancellation=cancellation)
+
+    service._track_search_analytics("budget", 3)
+    cancellation.cancel()
+    service._track_search_analytics("budge", 0)
+
+    assert recorded == [(1, "budget", 3)]
+
+
+def test_cancelled_batch_skips_remaining_searches():
+    cancellation = SearchCancellation()
+    cancellation.cancel()
+    service = SearchService(Session(), 1, cancellation=cancellation)
+
+    outcome = service._timed_search(SearchRequest(query="budget"))
+
+    assert outcome.error == "Search cancelled"
+    assert outcome.results == []
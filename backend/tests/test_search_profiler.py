@@ -0,0 +1,77 @@
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from app.models import Note
+from app.schemas import SearchRequest
+from app.services.search_profiler import Explain, SearchProfile, SlowSearchLog
+
+
+def slow_profile(ms: float) -> SearchProfile:
+    profile = SearchProfile()
+    profile.phases["rank"] = ms
+    return profile
+
+
+def test_phase_times_accumulate():
+    profile = SearchProfile()
+    with profile.phase("rank"):
+        pass
+    first = profile.phases["rank"]
+    with profile.phase("rank"):
+        pass
+
+    assert list(profile.phases) == ["rank"]
+    assert profile.phases["rank"] >= first
+    assert profile.total_ms == profile.phases["rank"]
+
+
+def test_statements_are_captured_only_on_request():
+    query = Session().query(Note.id)
+
+    profile = SearchProfile()
+    profile.capture("page", query)
+    assert profile.statements == {}
+
+    profile = SearchProfile(capture_statements=True)
+    profile.capture("page", query)
+    assert list(profile.statements) == ["page"]
+
+
+def test_explain_wraps_the_statement():
+    statement = Session().query(Note.id).filter(Note.user_id == 1).statement
+
+    sql = str(Explain(statement).compile(dialect=postgresql.dialect()))
+    assert sql.startswith("EXPLAIN (ANALYZE, BUFFERS) SELECT notes.id")
+
+    sql = str(Explain(statement, analyze=False).compile(dialect=postgresql.dialect()))
+    assert sql.startswith("EXPLAIN (COSTS) SELECT")
+
+    sql = str(Explain(statement, json=True).compile(dialect=postgresql.dialect()))
+    assert sql.startswith("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) SELECT")
+
+
+def test_slow_log_samples_only_slow_searches():
+    log = SlowSearchLog(threshold_ms=100, capacity=10)
+    request = SearchRequest(query="budget")
+
+    assert not log.record(1, request, slow_profile(99))
+    assert log.record(1, request, slow_profile(150))
+
+    [entry] = log.entries()
+    assert entry.request["query"] == "budget"
+    assert entry.phases == {"rank": 150}
+
+
+def test_slow_log_keeps_newest_entries():
+    log = SlowSearchLog(threshold_ms=1, capacity=2)
+    for query in ("one", "two", "three"):
+        log.record(1, SearchRequest(query=query), slow_profile(5))
+
+    assert [e.request["query"] for e in log.entries()] == ["three", "two"]
+    assert len(log.entries(1)) == 1
+
+
+def test_disabled_slow_log_records_nothing():
+    log = SlowSearchLog(threshold_ms=0, capacity=10)
+    assert not log.record(1, SearchRequest(query="x"), slow_profile(10_000))
+    assert log.entries() == []
@@ -0,0 +1,40 @@
+from app.services.search import SearchQueryParser
+from app.services.spelling import corrected_queries, query_words
+
+
+def words_of(query: str):
+    return query_words(SearchQueryParser(query).parse())
+
+
+def test_query_words_skip_operators_numbers_and_short_words():
+    assert words_of("budgte intitle:meetng tag:wrok q3 2024 to") == [
+        "budgte",
+        "meetng",
+    ]
+
+
+def test_query_words_are_distinct_and_lowercase():
+    assert words_of("Budgte budgte AND review") == ["budgte", "review"]
+
+
+def test_best_correction_comes_first():
+    suggestions = corrected_queries(
+        "budgte review", {"budgte": ["budget", "budge"]}, limit=3
+    )
+    assert suggestions == ["budget review", "budge review"]
+
+
+def test_corrections_keep_operators_and_other_words():
+    suggestions = corrected_queries(
+        "intitle:meetng meetng tag:meetng -tag:meetng",
+        {"meetng": ["meet"]},
+    )
+    assert suggestions == ["intitle:meet meet tag:meetng -tag:meetng"]
+
+
+def test_words_with_fewer_candidates_reuse_their_best_one():
+    suggestions = corrected_queries(
+        "budgte revew",
+        {"budgte": ["budget"], "revew": ["review", "revue"]},
+    )
+    assert suggestions == ["budget review", "budget revue"]
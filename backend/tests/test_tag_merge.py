@@ -0,0 +1,173 @@
+"""
+Set-based tag merges: associations, counts and search labels after merging
+one or several tags, and the time to merge 100k associations. Migrates the
+test database to head; skipped when the test database is not available.
+"""
+import time
+from pathlib import Path
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, func, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.api.tags import _merge_tags
+from app.core.config import settings
+from app.models import Note, NoteType, Tag, User, note_tags
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+# Associations moved by the timing test, and the time it may take
+LARGE_MERGE_ASSOCIATIONS = 100_000
+LARGE_MERGE_MAX_SECONDS = 30
+
+engine = create_engine(settings.test_database_url)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture(scope="module")
+def alembic_config():
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    except OperationalError as exc:
+        pytest.skip(f"test database unavailable: {exc}")
+
+    # alembic/env.py migrates settings.database_url
+    database_url = settings.database_url
+    settings.database_url = settings.test_database_url
+    config = Config(str(BACKEND_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BACKEND_DIR / "alembic"))
+    try:
+        command.upgrade(config, "head")
+        yield config
+        command.downgrade(config, "base")
+    finally:
+        settings.database_url = database_url
+
+
+@pytest.fixture
+def db(alembic_config):
+    session = TestingSessionLocal()
+    user = User(email="merge@example.com", username="merge", hashed_password="x")
+    session.add(user)
+    session.commit()
+    session.info["user_id"] = user.id
+    yield session
+    session.rollback()
+    for table in ("notes", "tags"):
+        session.execute(
+            text(f"DELETE FROM {table} WHERE user_id = :id"), {"id": user.id}
+        )
+    session.execute(text("DELETE FROM users WHERE id = :id"), {"id": user.id})
+    session.commit()
+    session.close()
+
+
+def make_tags(db, *names):
+    tags = [Tag(name=name, user_id=db.info["user_id"]) for name in names]
+    db.add_all(tags)
+    db.commit()
+    return tags
+
+
+def make_note(db, tags=()) -> Note:
+    note = Note(
+        title="Weekly sync",
+        note_type=NoteType.TEXT,
+        content_text="Agenda",
+        user_id=db.info["user_id"],
+        tags=list(tags),
+    )
+    db.add(note)
+    db.commit()
+    return note
+
+
+def tag_ids_of(db, note: Note) -> set:
+    return set(
+        db.execute(
+            note_tags.select()
+            .with_only_columns(note_tags.c.tag_id)
+            .where(note_tags.c.note_id == note.id)
+        ).scalars()
+    )
+
+
+def test_merge_moves_notes_and_keeps_existing_targets(db):
+    source, target, other = make_tags(db, "budgets", "finance", "q3")
+    only_source = make_note(db, tags=[source, other])
+    both = make_note(db, tags=[source, target])
+    only_target = make_note(db, tags=[target])
+
+    _merge_tags(db, [source.id], target.id)
+    db.commit()
+
+    assert db.get(Tag, source.id) is None
+    assert tag_ids_of(db, only_source) == {target.id, other.id}
+    assert tag_ids_of(db, both) == {target.id}
+    assert tag_ids_of(db, only_target) == {target.id}
+    db.refresh(target)
+    assert target.note_count == 3
+
+
+def test_merge_many_sources_at_once(db):
+    first, second, third, target = make_tags(db, "todo", "to-do", "todos", "tasks")
+    notes = [
+        make_note(db, tags=[first, second]),
+        make_note(db, tags=[second, third]),
+        make_note(db, tags=[third, target]),
+    ]
+
+    _merge_tags(db, [first.id, second.id, third.id], target.id)
+    db.commit()
+
+    assert all(tag_ids_of(db, note) == {target.id} for note in notes)
+    assert db.query(Tag).filter(Tag.user_id == db.info["user_id"]).count() == 1
+    db.refresh(target)
+    assert target.note_count == 3
+
+    # The merged names leave the search vector, the target's stays
+    tsv_matches = (
+        db.query(func.count(Note.id))
+        .filter(
+            Note.user_id == db.info["user_id"],
+            Note.content_tsv.op("@@")(func.plainto_tsquery("english", "tasks")),
+        )
+        .scalar()
+    )
+    assert tsv_matches == 3
+
+
+def test_merge_of_100k_associations_is_fast(db):
+    user_id = db.info["user_id"]
+    first, second, target = make_tags(db, "import-a", "import-b", "imported")
+    note_count = LARGE_MERGE_ASSOCIATIONS // 2
+    db.execute(
+        text(
+            "INSERT INTO notes (title, note_type, content_text, user_id) "
+            "SELECT 'Imported ' || n, 'TEXT', 'Imported note', :user_id "
+            "FROM generate_series(1, :count) AS n"
+        ),
+        {"user_id": user_id, "count": note_count},
+    )
+    db.execute(
+        text(
+            "INSERT INTO note_tags (note_id, tag_id) "
+            "SELECT notes.id, tags.id FROM notes, tags "
+            "WHERE notes.user_id = :user_id AND tags.id IN (:first, :second)"
+        ),
+        {"user_id": user_id, "first": first.id, "second": second.id},
+    )
+    db.commit()
+
+    start = time.perf_counter()
+    _merge_tags(db, [first.id, second.id], target.id)
+    db.commit()
+    elapsed = time.perf_counter() - start
+
+    db.refresh(target)
+    assert target.note_count == note_count
+    assert elapsed < LARGE_MERGE_MAX_SECONDS
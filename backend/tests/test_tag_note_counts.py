@@ -0,0 +1,126 @@
+"""
+Trigger checks that tags.note_count follows note_tags inserts, deletes and
+updates, and that tags_reconcile_note_counts repairs drift. Migrates the test
+database to head; skipped when the test database is not available.
+"""
+from pathlib import Path
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.models import Note, NoteType, Tag, User
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+engine = create_engine(settings.test_database_url)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture(scope="module")
+def alembic_config():
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    except OperationalError as exc:
+        pytest.skip(f"test database unavailable: {exc}")
+
+    # alembic/env.py migrates settings.database_url
+    database_url = settings.database_url
+    settings.database_url = settings.test_database_url
+    config = Config(str(BACKEND_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BACKEND_DIR / "alembic"))
+    try:
+        command.upgrade(config, "head")
+        yield config
+        command.downgrade(config, "base")
+    finally:
+        settings.database_url = database_url
+
+
+@pytest.fixture
+def db(alembic_config):
+    session = TestingSessionLocal()
+    user = User(email="counts@example.com", username="counts", hashed_password="x")
+    session.add(user)
+    session.commit()
+    session.info["user_id"] = user.id
+    yield session
+    session.rollback()
+    for table in ("notes", "tags"):
+        session.execute(
+            text(f"DELETE FROM {table} WHERE user_id = :id"), {"id": user.id}
+        )
+    session.execute(text("DELETE FROM users WHERE id = :id"), {"id": user.id})
+    session.commit()
+    session.close()
+
+
+def make_note(db, tags=()) -> Note:
+    note = Note(
+        title="Weekly sync",
+        note_type=NoteType.TEXT,
+        content_text="Agenda",
+        user_id=db.info["user_id"],
+        tags=list(tags),
+    )
+    db.add(note)
+    db.commit()
+    return note
+
+
+def count_of(db, tag: Tag) -> int:
+    db.refresh(tag)
+    return tag.note_count
+
+
+def test_counts_follow_tagging_untagging_and_note_deletes(db):
+    work = Tag(name="work", user_id=db.info["user_id"])
+    home = Tag(name="home", user_id=db.info["user_id"])
+    first = make_note(db, tags=[work, home])
+    make_note(db, tags=[work])
+    assert count_of(db, work) == 2
+    assert count_of(db, home) == 1
+
+    first.tags.remove(home)
+    db.commit()
+    assert count_of(db, home) == 0
+
+    db.delete(first)
+    db.commit()
+    assert count_of(db, work) == 1
+
+
+def test_moving_associations_updates_both_tags(db):
+    source = Tag(name="budgets", user_id=db.info["user_id"])
+    target = Tag(name="finance", user_id=db.info["user_id"])
+    db.add(target)
+    make_note(db, tags=[source])
+    make_note(db, tags=[source])
+
+    db.execute(
+        text("UPDATE note_tags SET tag_id = :target WHERE tag_id = :source"),
+        {"source": source.id, "target": target.id},
+    )
+    db.commit()
+
+    assert count_of(db, source) == 0
+    assert count_of(db, target) == 2
+
+
+def test_reconcile_fixes_drift(db):
+    tag = Tag(name="drift", user_id=db.info["user_id"])
+    make_note(db, tags=[tag])
+    db.execute(text("UPDATE tags SET note_count = 7 WHERE id = :id"), {"id": tag.id})
+
+    fixed = db.execute(
+        text("SELECT tags_reconcile_note_counts(ARRAY[:id])"), {"id": tag.id}
+    ).scalar()
+    db.commit()
+
+    assert fixed == 1
+    assert count_of(db, tag) == 1
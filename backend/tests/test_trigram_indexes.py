@@ -0,0 +1,140 @@
+"""
+EXPLAIN-based checks that substring and autocomplete lookups use the pg_trgm
+GIN indexes. Seeds 100k notes into the test database; skipped when the test
+database or the pg_trgm extension is not available.
+"""
+import json
+
+import pytest
+from sqlalchemy import create_engine, literal, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from sqlalchemy.orm import sessionmaker
+
+from app.api.notes import _text_match_note_ids
+from app.core.config import settings
+from app.core.database import Base
+from app.models import Note, SearchAnalytics, Tag
+from app.utils.text_search import LIKE_ESCAPE_CHAR, contains_pattern, prefix_pattern
+
+NOTE_COUNT = 100_000
+
+engine = create_engine(settings.test_database_url)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture(scope="module")
+def db():
+    try:
+        with engine.begin() as conn:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    except (OperationalError, ProgrammingError) as exc:
+        pytest.skip(f"pg_trgm test database unavailable: {exc}")
+
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        user_id = conn.execute(
+            text(
+                "INSERT INTO users (email, username, hashed_password, is_active) "
+                "VALUES ('trgm@example.com', 'trgm', 'x', true) RETURNING id"
+            )
+        ).scalar()
+        conn.execute(
+            text(
+                """
+                INSERT INTO notes (title, note_type, content_text, content_structured,
+                                   user_id, title_tsv, content_tsv)
+                SELECT 'note ' || md5(i::text),
+                       CASE WHEN i % 4 = 0 THEN 'STRUCTURED' ELSE 'TEXT' END::notetype,
+                       CASE WHEN i % 4 = 0 THEN NULL
+                            ELSE repeat(md5((i * 7)::text) || ' ', 8) END,
+                       CASE WHEN i % 4 = 0
+                            THEN jsonb_build_object('Summary', md5((i * 3)::text))
+                            ELSE NULL END,
+                       :user_id, ''::tsvector, ''::tsvector
+                FROM generate_series(1, :count) AS i
+                """
+            ),
+            {"user_id": user_id, "count": NOTE_COUNT},
+        )
+        conn.execute(
+            text(
+                "INSERT INTO tags (name, user_id) "
+                "SELECT 'tag-' || md5(i::text), :user_id "
+                "FROM generate_series(1, 20000) AS i"
+            ),
+            {"user_id": user_id},
+        )
+        conn.execute(
+            text(
+                "INSERT INTO search_analytics (user_id, query_text, search_count) "
+                "SELECT :user_id, 'query ' || md5(i::text), 1 "
+                "FROM generate_series(1, 20000) AS i"
+            ),
+            {"user_id": user_id},
+        )
+        conn.execute(text("ANALYZE"))
+
+    session = TestingSessionLocal()
+    session.info["user_id"] = user_id
+    yield session
+    session.close()
+    Base.metadata.drop_all(bind=engine)
+
+
+def explain(db, query) -> str:
+    compiled = query.compile(
+        dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+    )
+    plan = db.execute(text(f"EXPLAIN (FORMAT JSON) {compiled}")).scalar()
+    return json.dumps(plan)
+
+
+def test_note_substring_search_uses_trigram_indexes(db):
+    ids = _text_match_note_ids(db, db.info["user_id"], "c4ca4238a0b9", fuzzy=False)
+    plan = explain(db, ids)
+
+    assert "ix_notes_title_trgm" in plan
+    assert "ix_notes_content_text_trgm" in plan
+    assert "ix_notes_content_structured_trgm" in plan
+    assert "ix_tags_name_trgm" in plan
+
+
+def test_fuzzy_note_search_uses_trigram_indexes(db):
+    ids = _text_match_note_ids(db, db.info["user_id"], "c4ca4238a0b9", fuzzy=True)
+    plan = explain(db, ids)
+
+    assert "ix_notes_title_trgm" in plan
+
+
+def test_tag_autocomplete_uses_trigram_index(db):
+    query = (
+        db.query(Tag.name)
+        .filter(
+            Tag.user_id == db.info["user_id"],
+            Tag.name.like(contains_pattern("c4ca4238"), escape=LIKE_ESCAPE_CHAR),
+        )
+        .statement
+    )
+    assert "ix_tags_name_trgm" in explain(db, query)
+
+
+def test_fuzzy_tag_autocomplete_uses_trigram_index(db):
+    query = (
+        db.query(Tag.name).filter(literal("tag-c4ca4238").op("<%")(Tag.name)).statement
+    )
+    assert "ix_tags_name_trgm" in explain(db, query)
+
+
+def test_search_suggestions_use_trigram_index(db):
+    query = (
+        db.query(SearchAnalytics)
+        .filter(
+            SearchAnalytics.user_id == db.info["user_id"],
+            SearchAnalytics.query_text.ilike(
+                prefix_pattern("query c4ca4238"), escape=LIKE_ESCAPE_CHAR
+            ),
+        )
+        .statement
+    )
+    assert "ix_search_analytics_query_text_trgm" in explain(db, query)
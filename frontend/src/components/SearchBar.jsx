@@ -2,14 +2,16 @@ import { useState, useEffect, useRef } from 'react';
 import { useNavigate, useLocation } from 'react-router-dom';
 import useSearchStore from '../store/searchStore';
 import { useNotesStore } from '../store/notesStore';
-import { analyticsAPI } from '../services/api';
+import { analyticsAPI, searchAPI } from '../services/api';
 import { 
   MagnifyingGlassIcon, 
   XMarkIcon, 
   AdjustmentsHorizontalIcon,
   BookmarkIcon,
   ClockIcon,
-  FireIcon
+  DocumentTextIcon,
+  FireIcon,
+  TagIcon
 } from '@heroicons/react/24/outline';
 
 const SearchBar = ({ inNavbar = true }) => {
@@ -41,6 +43,7 @@ const SearchBar = ({ inNavbar = true }) => {
   const [showSuggestions, setShowSuggestions] = useState(false);
   const [selectedSuggestionIndex, setSelectedSuggestionIndex] = useState(-1);
   const [isLoadingSuggestions, setIsLoadingSuggestions] = useState(false);
+  const [instantHits, setInstantHits] = useState({ notes: [], tags: [] });
   
   const isSearchPage = location.pathname === '/search';
   const isDashboard = location.pathname === '/dashboard' || location.pathname === '/';
@@ -110,8 +113,8 @@ const SearchBar = ({ inNavbar = true }) => {
           setIsLoadingSuggestions(false);
         }
       } else {
+        // Instant matches may still be showing for one-character queries
         setSuggestions([]);
-        setShowSuggestions(false);
       }
     };
 
@@ -124,6 +127,34 @@ const SearchBar = ({ inNavbar = true }) => {
     return () => clearTimeout(debounceTimer);
   }, [localQuery]);
 
+  // Title and tag prefix matches; cheap enough to fetch on (almost) every keystroke
+  useEffect(() => {
+    const prefix = localQuery.trim();
+    if (!prefix || prefix.includes(':')) {
+      setInstantHits({ notes: [], tags: [] });
+      return;
+    }
+
+    const controller = new AbortController();
+    const debounceTimer = setTimeout(async () => {
+      if (document.activeElement !== inputRef.current) return;
+      try {
+        const response = await searchAPI.instant(prefix, 5, controller.signal);
+        setInstantHits({ notes: response.data.notes, tags: response.data.tags });
+        setShowSuggestions(true);
+      } catch (error) {
+        if (error.name !== 'CanceledError') {
+          console.error('Error fetching instant matches:', error);
+        }
+      }
+    }, 80);
+
+    return () => {
+      clearTimeout(debounceTimer);
+      controller.abort();
+    };
+  }, [localQuery]);
+
   // Debounced live search - works on both search page and dashboard
   useEffect(() => {
     // Only perform live search on search page or dashboard
@@ -168,6 +199,7 @@ const SearchBar = ({ inNavbar = true }) => {
   const handleClear = () => {
     setLocalQuery('');
     setSuggestions([]);
+    setInstantHits({ notes: [], tags: [] });
     setShowSuggestions(false);
     if (isSearchPage) {
       setQuery('');
@@ -183,7 +215,7 @@ const SearchBar = ({ inNavbar = true }) => {
   };
 
   const handleInputFocus = () => {
-    if (localQuery.length >= 2 && suggestions.length > 0) {
+    if (suggestions.length > 0 || instantHits.notes.length > 0 || instantHits.tags.length > 0) {
       setShowSuggestions(true);
     }
   };
@@ -203,6 +235,11 @@ const SearchBar = ({ inNavbar = true }) => {
     }
   };
 
+  const handleInstantNoteClick = (noteId) => {
+    setShowSuggestions(false);
+    navigate(`/notes/${noteId}`);
+  };
+
   const handleToggleHelp = () => {
     setShowHelp(!showHelp);
     if (!showHelp) setShowSavedSearches(false); // Close saved searches if opening help
@@ -221,6 +258,7 @@ const SearchBar = ({ inNavbar = true }) => {
       { operator: '-tag:', example: '-tag:personal', description: 'Exclude tag' },
       { operator: 'created:', example: 'created:>=2024-10-01', description: 'Filter by creation date' },
       { operator: 'updated:', example: 'updated:<2024-12-31', description: 'Filter by update date' },
+      { operator: 'field:', example: 'field:"Status"=done', description: 'Match a section of structured notes (= exact, ~ contains)' },
       { operator: '"..."', example: '"exact phrase"', description: 'Search exact phrase' },
       { operator: 'NEAR', example: 'python NEAR/5 tutorial', description: 'Find words near each other' },
     ];
@@ -263,10 +301,39 @@ const SearchBar = ({ inNavbar = true }) => {
 
   // Render search suggestions dropdown
   const renderSuggestions = () => {
-    if (!showSuggestions || suggestions.length === 0) return null;
+    const hasInstantHits = instantHits.notes.length > 0 || instantHits.tags.length > 0;
+    if (!showSuggestions || (suggestions.length === 0 && !hasInstantHits)) return null;
 
     return (
       <div className="absolute top-full left-0 right-0 mt-2 bg-white dark:bg-gray-800 border border-gray-300 dark:border-gray-600 rounded-lg shadow-lg z-50 max-h-[50vh] sm:max-h-96 overflow-y-auto">
+        {hasInstantHits && (
+          <div className="py-1 border-b border-gray-200 dark:border-gray-700">
+            {instantHits.notes.map((note) => (
+              <button
+                key={`note-${note.id}`}
+                onClick={() => handleInstantNoteClick(note.id)}
+                className="w-full px-3 sm:px-4 py-3 sm:py-2 text-left hover:bg-gray-100 dark:hover:bg-gray-700 transition-colors touch-manipulation"
+              >
+                <div className="flex items-center space-x-2 min-w-0">
+                  <DocumentTextIcon className="w-4 h-4 text-gray-400 flex-shrink-0" />
+                  <span className="text-sm text-gray-900 dark:text-gray-100 truncate">{note.title}</span>
+                </div>
+              </button>
+            ))}
+            {instantHits.tags.map((tag) => (
+              <button
+                key={`tag-${tag}`}
+                onClick={() => handleSuggestionClick(`tag:${tag}`)}
+                className="w-full px-3 sm:px-4 py-3 sm:py-2 text-left hover:bg-gray-100 dark:hover:bg-gray-700 transition-colors touch-manipulation"
+              >
+                <div className="flex items-center space-x-2 min-w-0">
+                  <TagIcon className="w-4 h-4 text-gray-400 flex-shrink-0" />
+                  <span className="text-sm text-gray-900 dark:text-gray-100 truncate">{tag}</span>
+                </div>
+              </button>
+            ))}
+          </div>
+        )}
         <div className="py-1">
           {suggestions.map((suggestion, index) => (
             <button
@@ -3,19 +3,29 @@ import { TagIcon, PencilIcon, TrashIcon, XMarkIcon, CheckIcon } from '@heroicons
 import { useNavigate } from 'react-router-dom'
 import api, { tagsAPI } from '../services/api'
 
+// Tags fetched per page of the sidebar
+const PAGE_SIZE = 100
+
 const TagManager = ({ onTagClick, selectedTags = [], onChanged }) => {
   const [tags, setTags] = useState([])
+  const [total, setTotal] = useState(0)
+  const [nextCursor, setNextCursor] = useState(null)
   const [loading, setLoading] = useState(true)
   const [editingTagId, setEditingTagId] = useState(null)
   const [editingTagName, setEditingTagName] = useState('')
   const [error, setError] = useState(null)
   const navigate = useNavigate()
 
-  // Fetch all tags
-  const fetchTags = async () => {
+  // Fetch the first page of tags, or the page after `cursor`
+  const fetchTags = async (cursor = null) => {
     try {
-  const response = await tagsAPI.list()
-      setTags(response.data.tags || [])
+      const params = { limit: PAGE_SIZE }
+      if (cursor) params.cursor = cursor
+      const response = await tagsAPI.list(params)
+      const page = response.data.tags || []
+      setTags((current) => (cursor ? [...current, ...page] : page))
+      setTotal(response.data.total ?? page.length)
+      setNextCursor(response.data.next_cursor || null)
     } catch (error) {
       console.error('Error fetching tags:', error)
       setError('Failed to load tags')
@@ -120,7 +130,7 @@ const TagManager = ({ onTagClick, selectedTags = [], onChanged }) => {
         </div>
         <div className="flex items-center gap-2">
           <span className="text-xs text-gray-500 dark:text-gray-400">
-            {tags.length} {tags.length === 1 ? 'tag' : 'tags'}
+            {total} {total === 1 ? 'tag' : 'tags'}
           </span>
           <button
             onClick={() => navigate('/tags/manage')}
@@ -207,6 +217,14 @@ const TagManager = ({ onTagClick, selectedTags = [], onChanged }) => {
               )}
             </div>
           ))}
+          {nextCursor && (
+            <button
+              onClick={() => fetchTags(nextCursor)}
+              className="w-full p-2 text-xs text-blue-600 dark:text-blue-400 hover:underline"
+            >
+              Show more tags
+            </button>
+          )}
         </div>
       )}
     </div>
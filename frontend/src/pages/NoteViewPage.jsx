@@ -108,6 +108,7 @@ const NoteViewPage = () => {
   const [searchParams] = useSearchParams()
   const [showExportMenu, setShowExportMenu] = useState(false)
   const [isExporting, setIsExporting] = useState(false)
+  const [relatedNotes, setRelatedNotes] = useState([])
   
   const { 
     currentNote, 
@@ -153,6 +154,25 @@ const NoteViewPage = () => {
     }
   }, [id, fetchNote, clearCurrentNote])
 
+  useEffect(() => {
+    if (!id) return
+
+    let cancelled = false
+    setRelatedNotes([])
+    notesAPI.getRelated(id)
+      .then((response) => {
+        if (!cancelled) setRelatedNotes(response.data.related)
+      })
+      .catch((error) => {
+        // The panel is optional; the note itself still renders
+        console.error('Failed to load related notes:', error)
+      })
+
+    return () => {
+      cancelled = true
+    }
+  }, [id])
+
   const handleDelete = async () => {
     if (window.confirm('Are you sure you want to delete this note?')) {
       const success = await deleteNote(id)
@@ -473,6 +493,37 @@ const NoteViewPage = () => {
           </div>
         )}
       </div>
+
+      {/* Related Notes */}
+      {relatedNotes.length > 0 && (
+        <div className="card mt-6">
+          <h2 className="text-lg font-semibold text-gray-900 dark:text-gray-100 mb-3">
+            Related notes
+          </h2>
+          <ul className="divide-y divide-gray-200 dark:divide-gray-700">
+            {relatedNotes.map((note) => (
+              <li key={note.id}>
+                <Link
+                  to={`/notes/${note.id}`}
+                  className="flex items-center justify-between py-2 text-gray-700 dark:text-gray-300 hover:text-primary-700 dark:hover:text-primary-300 transition-colors"
+                >
+                  <span className="flex items-center truncate">
+                    {note.note_type === 'text' ? (
+                      <DocumentTextIcon className="h-4 w-4 mr-2 flex-shrink-0 text-gray-400 dark:text-gray-500" />
+                    ) : (
+                      <RectangleStackIcon className="h-4 w-4 mr-2 flex-shrink-0 text-gray-400 dark:text-gray-500" />
+                    )}
+                    <span className="truncate">{note.title}</span>
+                  </span>
+                  <span className="ml-4 flex-shrink-0 text-xs text-gray-500 dark:text-gray-400">
+                    Updated {format(new Date(note.updated_at), 'MMM d, yyyy')}
+                  </span>
+                </Link>
+              </li>
+            ))}
+          </ul>
+        </div>
+      )}
     </div>
   )
 }
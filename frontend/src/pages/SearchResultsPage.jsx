@@ -28,7 +28,9 @@ const SearchResultsPage = () => {
     isLoading,
     error,
     executionTimeMs,
+    suggestions,
     isAdvancedFiltersOpen,
+    setQuery,
     setPage,
     search,
   } = useSearchStore();
@@ -46,6 +48,12 @@ const SearchResultsPage = () => {
     window.scrollTo({ top: 0, behavior: 'smooth' });
   };
 
+  const handleSuggestionClick = async (suggestion) => {
+    setQuery(suggestion);
+    setPage(1);
+    await search(1);
+  };
+
   const handleResultClick = (noteId) => {
     // Pass search query as URL param for highlighting
     const params = new URLSearchParams();
@@ -140,6 +148,25 @@ const SearchResultsPage = () => {
           </div>
         )}
 
+        {/* Did You Mean */}
+        {!isLoading && !error && suggestions.length > 0 && (
+          <div className="mb-6 text-sm text-gray-600 dark:text-gray-400">
+            Did you mean{' '}
+            {suggestions.map((suggestion, index) => (
+              <span key={suggestion}>
+                {index > 0 && ', '}
+                <button
+                  onClick={() => handleSuggestionClick(suggestion)}
+                  className="font-medium text-primary-600 dark:text-primary-400 hover:underline"
+                >
+                  {suggestion}
+                </button>
+              </span>
+            ))}
+            ?
+          </div>
+        )}
+
         {/* Loading State */}
         {isLoading && (
           <div className="text-center py-12">
@@ -190,6 +217,13 @@ const SearchResultsPage = () => {
                   )}
                 </div>
 
+                {/* Best matching section of a structured note */}
+                {result.section_path && (
+                  <p className="text-xs font-medium text-gray-500 dark:text-gray-400 mb-1">
+                    {result.section_path.join(' › ')}
+                  </p>
+                )}
+
                 {/* Snippet */}
                 <p className="text-gray-700 dark:text-gray-300 mb-4 line-clamp-3">
                   {highlightText(result.snippet, true)}
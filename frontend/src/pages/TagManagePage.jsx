@@ -7,7 +7,7 @@ const TagManagePage = () => {
   const [tags, setTags] = useState([])
   const [loading, setLoading] = useState(true)
   const [error, setError] = useState(null)
-  const [sourceId, setSourceId] = useState('')
+  const [sourceIds, setSourceIds] = useState([])
   const [targetId, setTargetId] = useState('')
   const navigate = useNavigate()
 
@@ -25,10 +25,10 @@ const TagManagePage = () => {
   useEffect(() => { loadTags() }, [])
 
   const merge = async () => {
-    if (!sourceId || !targetId || sourceId === targetId) return
+    if (!sourceIds.length || !targetId || sourceIds.includes(targetId)) return
     try {
-      await tagsAPI.merge(Number(sourceId), Number(targetId))
-      setSourceId('')
+      await tagsAPI.merge(sourceIds.map(Number), Number(targetId))
+      setSourceIds([])
       setTargetId('')
       await loadTags()
       // Optional: refresh current notes so counts/tags update
@@ -52,8 +52,13 @@ const TagManagePage = () => {
       <div className="card p-4 mb-6">
         <h2 className="font-medium mb-3">Merge Tags</h2>
         <div className="flex items-center gap-2">
-          <select className="input" value={sourceId} onChange={(e) => setSourceId(e.target.value)}>
-            <option value="">Source tag…</option>
+          <select
+            className="input"
+            multiple
+            value={sourceIds}
+            onChange={(e) => setSourceIds(Array.from(e.target.selectedOptions, (o) => o.value))}
+            title="Source tags (Ctrl/Cmd+click to select several)"
+          >
             {tags.map(t => <option key={t.id} value={t.id}>#{t.name}</option>)}
           </select>
           <span className="text-sm text-gray-500">into</span>
@@ -61,9 +66,9 @@ const TagManagePage = () => {
             <option value="">Target tag…</option>
             {tags.map(t => <option key={t.id} value={t.id}>#{t.name}</option>)}
           </select>
-          <button className="btn btn-primary" onClick={merge} disabled={!sourceId || !targetId || sourceId === targetId}>Merge</button>
+          <button className="btn btn-primary" onClick={merge} disabled={!sourceIds.length || !targetId || sourceIds.includes(targetId)}>Merge</button>
         </div>
-        <p className="text-xs text-gray-500 mt-2">All notes with the source tag will be updated to the target tag. The source tag will be deleted.</p>
+        <p className="text-xs text-gray-500 mt-2">All notes with a source tag will be updated to the target tag. The source tags will be deleted. Select several source tags to merge them in one step.</p>
       </div>
 
       <div className="card p-4">
@@ -58,6 +58,13 @@ export const notesAPI = {
   createNote: (data) => api.post('/api/notes/', data),
   updateNote: (id, data) => api.put(`/api/notes/${id}`, data),
   deleteNote: (id) => api.delete(`/api/notes/${id}`),
+  getRelated: (id, limit = 5) => api.get(`/api/notes/${id}/related`, { params: { limit } }),
+  getSections: (id) => api.get(`/api/notes/${id}/sections`),
+  // axios repeats array params as path[]=...; the API expects path=...&path=...
+  getSection: (id, path) => api.get(`/api/notes/${id}/section`, {
+    params: { path },
+    paramsSerializer: { indexes: null },
+  }),
   exportToPdf: (id, params = {}) => api.get(`/api/notes/${id}/export/pdf`, { 
     params,
     responseType: 'blob'
@@ -69,13 +76,27 @@ export const notesAPI = {
 
 // Tags API
 export const tagsAPI = {
-  list: () => api.get('/api/tags/'),
+  // params: { sort: 'name' | 'count', limit, cursor, prefix }; all tags without limit
+  list: (params = {}) => api.get('/api/tags/', { params }),
   update: (id, data) => api.put(`/api/tags/${id}`, data),
   remove: (id) => api.delete(`/api/tags/${id}`),
-  merge: (source_tag_id, target_tag_id) => api.post('/api/tags/merge', { source_tag_id, target_tag_id }),
+  // sourceIds: one tag id or an array of them, all merged into targetId
+  merge: (sourceIds, target_tag_id) => api.post('/api/tags/merge', {
+    source_tag_ids: [].concat(sourceIds),
+    target_tag_id,
+  }),
   autocomplete: (q, limit = 10) => api.get('/api/tags/autocomplete', { params: { q, limit } }),
 }
 
+// Search API
+export const searchAPI = {
+  // Title/tag prefix matches for the search bar; pass an AbortController
+  // signal so superseded keystrokes are dropped
+  instant: (q, limit = 8, signal) => api.get('/api/search/instant', { params: { q, limit }, signal }),
+  // Notes, tags, folders and saved searches in one time-boxed request
+  omnibox: (q, perType = 5, signal) => api.get('/api/search/omnibox', { params: { q, per_type: perType }, signal }),
+}
+
 // Search Analytics API
 export const analyticsAPI = {
   getPopularSearches: (limit = 10) => api.get('/api/analytics/popular', { params: { limit } }),
@@ -26,6 +26,8 @@ const useSearchStore = create((set, get) => ({
   hasNext: false,
   hasPrev: false,
   executionTimeMs: 0,
+  // "Did you mean" queries, sent when a search finds few results
+  suggestions: [],
   
   // UI state
   isLoading: false,
@@ -110,7 +112,7 @@ const useSearchStore = create((set, get) => ({
       // Extract search terms for highlighting
       const terms = state.query
         .split(/\s+/)
-        .filter(term => !term.match(/^(intitle:|tag:|-tag:|created:|updated:|has:|todo:)/i))
+        .filter(term => !term.match(/^(intitle:|tag:|-tag:|created:|updated:|has:|todo:|field:)/i))
         .map(term => term.replace(/['"]/g, ''));
       
       set({
@@ -121,6 +123,7 @@ const useSearchStore = create((set, get) => ({
         hasNext: response.data.has_next,
         hasPrev: response.data.has_prev,
         executionTimeMs: response.data.execution_time_ms,
+        suggestions: response.data.suggestions || [],
         highlightTerms: terms,
         isLoading: false,
         error: null,
@@ -131,6 +134,7 @@ const useSearchStore = create((set, get) => ({
         error: error.response?.data?.detail || 'Search failed',
         results: [],
         total: 0,
+        suggestions: [],
       });
     }
   },
@@ -144,6 +148,7 @@ const useSearchStore = create((set, get) => ({
     hasNext: false,
     hasPrev: false,
     executionTimeMs: 0,
+    suggestions: [],
     error: null,
     highlightTerms: [],
   }),